@@ -37,6 +37,7 @@ class ApiLinks {
     // Import endpoints
     static IMPORT_RIDERS = '/api/import/riders';
     static IMPORT_BULK_SURVEYS = '/api/import/bulk-surveys';
+    static IMPORT_JOB = (jobId) => `/api/import/jobs/${jobId}`;
 
     // Export endpoints
     static EXPORT_SURVEYS = '/api/export/surveys';
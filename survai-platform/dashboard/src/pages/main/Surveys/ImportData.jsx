@@ -10,6 +10,9 @@ import ApiBaseHelper from '../../../network/apiBaseHelper';
 import ApiLinks from '../../../network/apiLinks';
 import { exportAllSurveys, exportTranscripts } from '../../../utils/exportHelper';
 
+// Stop polling a bulk import job that has processed no rows for this long
+const BULK_JOB_STALL_MS = 5 * 60 * 1000;
+
 const ImportData = () => {
   const navigate = useNavigate();
   const fileInputRef = useRef(null);
@@ -91,7 +94,30 @@ const ImportData = () => {
         { headers: { 'Content-Type': 'multipart/form-data' } }
       );
 
-      setResult(response.data);
+      // Large files are processed in the background; poll the job until it finishes,
+      // giving up if it makes no progress for BULK_JOB_STALL_MS
+      let job = { status: response.data.status, created: 0, percent: 0 };
+      let lastProgress = Date.now();
+      let lastProcessed = -1;
+      while (job.status === 'queued' || job.status === 'running') {
+        if (Date.now() - lastProgress > BULK_JOB_STALL_MS) break;
+        setResult({ message: `Creating surveys... ${job.percent || 0}% (${job.created || 0} created)` });
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        job = (await ApiBaseHelper.axiosInstance.get(ApiLinks.IMPORT_JOB(response.data.job_id))).data;
+        if (job.processed_rows !== lastProcessed) {
+          lastProcessed = job.processed_rows;
+          lastProgress = Date.now();
+        }
+      }
+      if (job.status === 'queued' || job.status === 'running') {
+        setResult(null);
+        setError(`Bulk survey creation has made no progress for ${BULK_JOB_STALL_MS / 60000} minutes `
+          + `(${job.created} surveys created so far). Job ${response.data.job_id} may have been interrupted.`);
+      } else if (job.status === 'failed') {
+        setError(`Bulk survey creation failed after ${job.created} surveys: ${job.error}`);
+      } else {
+        setResult({ created: job.created, message: `Created ${job.created} surveys (${job.skipped} rows skipped).` });
+      }
     } catch (err) {
       console.error('Bulk survey error:', err);
       setError(err.response?.data?.detail || 'Bulk survey creation failed. Please check your CSV format.');
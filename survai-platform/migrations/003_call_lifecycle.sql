@@ -0,0 +1,8 @@
+-- Migration 003: LiveKit webhook call lifecycle
+-- voice-service upserts one call_transcripts row per LiveKit room (call_id = room name)
+
+ALTER TABLE call_transcripts ADD COLUMN IF NOT EXISTS call_id TEXT;
+ALTER TABLE call_transcripts ADD COLUMN IF NOT EXISTS call_answered_at TIMESTAMP;
+ALTER TABLE call_transcripts ADD COLUMN IF NOT EXISTS recording_url TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_call_transcripts_call_id ON call_transcripts(call_id);
@@ -0,0 +1,17 @@
+-- Migration 004: per-call latency telemetry from the LiveKit agent
+-- latency: {"llm_ttft": {"count", "p50", "p95", "max"}, "tts_ttfb": {...}, "eou_delay": {...}, ...} (seconds)
+-- config:  session settings the call ran with (models, VAD, preemptive generation)
+
+CREATE TABLE IF NOT EXISTS call_latency_metrics (
+    call_id             TEXT PRIMARY KEY,
+    survey_id           TEXT,
+    turns               INTEGER DEFAULT 0,
+    tool_calls          INTEGER DEFAULT 0,
+    latency             JSONB DEFAULT '{}',
+    usage               JSONB DEFAULT '{}',
+    config              JSONB DEFAULT '{}',
+    recorded_at         TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_call_latency_metrics_recorded ON call_latency_metrics(recorded_at);
+CREATE INDEX IF NOT EXISTS idx_call_latency_metrics_survey ON call_latency_metrics(survey_id);
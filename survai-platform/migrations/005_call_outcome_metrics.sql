@@ -0,0 +1,6 @@
+-- Migration 005: survey outcome on per-call telemetry
+-- Lets /analytics/latency report turns, tool calls and tokens per completed survey
+
+ALTER TABLE call_latency_metrics ADD COLUMN IF NOT EXISTS completed BOOLEAN;
+ALTER TABLE call_latency_metrics ADD COLUMN IF NOT EXISTS questions_answered INTEGER DEFAULT 0;
+ALTER TABLE call_latency_metrics ADD COLUMN IF NOT EXISTS questions_skipped INTEGER DEFAULT 0;
@@ -0,0 +1,6 @@
+-- Migration 006: normalized-phone index for rider lookups
+-- The livekit-agent rider cache matches riders on the last 10 digits of the phone,
+-- whatever format it was imported in.
+
+CREATE INDEX IF NOT EXISTS idx_riders_phone_key
+    ON riders ((RIGHT(regexp_replace(phone, '[^0-9]', '', 'g'), 10)));
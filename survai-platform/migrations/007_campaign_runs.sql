@@ -0,0 +1,30 @@
+-- Migration 007: campaign run tracking for the scheduler-service campaign executor
+-- campaign_runs holds one row per execution of a campaign (at most one 'running' per campaign);
+-- campaign_run_calls records each survey before it is dialed, so an interrupted run resumes
+-- without dialing anyone twice.
+
+ALTER TABLE campaigns ADD COLUMN IF NOT EXISTS config JSONB DEFAULT '{}';
+
+CREATE TABLE IF NOT EXISTS campaign_runs (
+    id              TEXT PRIMARY KEY,
+    campaign_id     TEXT NOT NULL REFERENCES campaigns(id),
+    status          TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'completed', 'failed', 'cancelled')),
+    error           TEXT,
+    started_at      TIMESTAMP DEFAULT NOW(),
+    updated_at      TIMESTAMP DEFAULT NOW(),
+    finished_at     TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_campaign_runs_active ON campaign_runs(campaign_id) WHERE status = 'running';
+
+CREATE TABLE IF NOT EXISTS campaign_run_calls (
+    run_id          TEXT NOT NULL REFERENCES campaign_runs(id) ON DELETE CASCADE,
+    survey_id       TEXT NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'dialing' CHECK (status IN ('dialing', 'dispatched', 'failed')),
+    error           TEXT,
+    dispatched_at   TIMESTAMP DEFAULT NOW(),
+    finished_at     TIMESTAMP,
+    PRIMARY KEY (run_id, survey_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_surveys_campaign_dialable
+    ON surveys(campaign_id, id) WHERE status = 'In-Progress' AND phone IS NOT NULL;
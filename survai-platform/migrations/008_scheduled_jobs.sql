@@ -0,0 +1,33 @@
+-- Migration 008: Postgres job queue for scheduler-service
+-- Replicas claim due jobs with FOR UPDATE SKIP LOCKED and hold a renewable lease while a job runs.
+-- scheduler_workers holds each replica's heartbeat and throughput counters.
+-- Campaign runs get the same lease so a surviving replica adopts the runs of one that died.
+
+CREATE TABLE IF NOT EXISTS scheduled_jobs (
+    id                  TEXT PRIMARY KEY,
+    kind                TEXT NOT NULL,
+    payload             JSONB NOT NULL DEFAULT '{}',
+    run_at              TIMESTAMPTZ NOT NULL,
+    interval_seconds    INTEGER,
+    status              TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'running', 'succeeded', 'failed', 'cancelled')),
+    attempts            INTEGER NOT NULL DEFAULT 0,
+    max_attempts        INTEGER NOT NULL DEFAULT 1,
+    lease_owner         TEXT,
+    lease_expires_at    TIMESTAMPTZ,
+    last_error          TEXT,
+    created_at          TIMESTAMPTZ DEFAULT NOW(),
+    updated_at          TIMESTAMPTZ DEFAULT NOW(),
+    finished_at         TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_due ON scheduled_jobs(run_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_lease ON scheduled_jobs(lease_expires_at) WHERE status = 'running';
+
+CREATE TABLE IF NOT EXISTS scheduler_workers (
+    id                  TEXT PRIMARY KEY,
+    started_at          TIMESTAMPTZ,
+    last_seen           TIMESTAMPTZ DEFAULT NOW(),
+    stats               JSONB DEFAULT '{}'
+);
+
+ALTER TABLE campaign_runs ADD COLUMN IF NOT EXISTS lease_owner TEXT;
+ALTER TABLE campaign_runs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP;
@@ -0,0 +1,7 @@
+-- Migration 009: de-duplication key for scheduled jobs
+-- At most one pending or running job per key (call jobs use 'call:<survey_id>'),
+-- so bulk and repeated callback requests collapse into one job per survey.
+
+ALTER TABLE scheduled_jobs ADD COLUMN IF NOT EXISTS dedup_key TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_scheduled_jobs_dedup
+    ON scheduled_jobs(dedup_key) WHERE status IN ('pending', 'running');
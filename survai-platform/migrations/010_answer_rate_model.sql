@@ -0,0 +1,15 @@
+-- Migration 010: answer-rate model for scheduler-service call timing
+-- Recency-weighted dials and answers per tenant, local day of week (0 = Sunday) and hour,
+-- refit nightly from call_transcripts. tenant_id '*' holds the all-tenant totals.
+
+CREATE TABLE IF NOT EXISTS answer_rate_model (
+    tenant_id   TEXT NOT NULL,
+    dow         SMALLINT NOT NULL,
+    hour        SMALLINT NOT NULL,
+    dials       REAL NOT NULL DEFAULT 0,
+    answers     REAL NOT NULL DEFAULT 0,
+    fitted_at   TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (tenant_id, dow, hour)
+);
+
+CREATE INDEX IF NOT EXISTS idx_call_transcripts_started ON call_transcripts(call_started_at);
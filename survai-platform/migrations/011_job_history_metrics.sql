@@ -0,0 +1,10 @@
+-- Migration 011: job type, duration and error on job_history
+-- Written in batches by the scheduler listener (pg) and the scheduler-service worker;
+-- read by /scheduler/metrics for per-type success rates and run-time percentiles.
+
+ALTER TABLE job_history ADD COLUMN IF NOT EXISTS job_type TEXT;
+ALTER TABLE job_history ADD COLUMN IF NOT EXISTS duration_ms INTEGER;
+ALTER TABLE job_history ADD COLUMN IF NOT EXISTS error TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_job_history_run_time ON job_history(run_time);
+CREATE INDEX IF NOT EXISTS idx_job_history_type_time ON job_history(job_type, run_time);
@@ -0,0 +1,56 @@
+-- Migration 012: precomputed rollups for /analytics/summary
+-- Materialized views refreshed concurrently by analytics-service (rollups.py).
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS analytics_summary_totals AS
+SELECT 1 AS id,
+       COUNT(*) AS total_surveys,
+       COUNT(*) FILTER (WHERE call_status = 'completed') AS completed,
+       AVG(call_duration_seconds) FILTER (WHERE call_duration_seconds > 0) AS avg_duration
+FROM call_transcripts;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_analytics_summary_totals ON analytics_summary_totals(id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS analytics_channel_counts AS
+SELECT COALESCE(channel, 'phone') AS channel, COUNT(*) AS cnt
+FROM surveys
+GROUP BY 1;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_analytics_channel_counts ON analytics_channel_counts(channel);
+
+-- Last answered question of each In-Progress survey, found with one grouped
+-- pass instead of a correlated MAX(ord) subquery per row
+CREATE MATERIALIZED VIEW IF NOT EXISTS analytics_dropout_points AS
+WITH last_answered AS (
+    SELECT sri.survey_id, MAX(sri.ord) AS ord
+    FROM survey_response_items sri
+    JOIN surveys s ON s.id = sri.survey_id
+    WHERE s.status = 'In-Progress'
+      AND sri.raw_answer IS NOT NULL AND sri.raw_answer != ''
+    GROUP BY sri.survey_id
+)
+SELECT la.ord, q.text AS question_text, COUNT(*) AS dropout_count
+FROM last_answered la
+JOIN survey_response_items sri ON sri.survey_id = la.survey_id AND sri.ord = la.ord
+JOIN questions q ON q.id = sri.question_id
+GROUP BY la.ord, q.text;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_analytics_dropout_points ON analytics_dropout_points(ord, question_text);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS analytics_response_types AS
+SELECT COALESCE(q.criteria, 'unknown') AS criteria, COUNT(*) AS cnt
+FROM survey_response_items sri
+JOIN questions q ON q.id = sri.question_id
+WHERE sri.raw_answer IS NOT NULL AND sri.raw_answer != ''
+GROUP BY 1;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_analytics_response_types ON analytics_response_types(criteria);
+
+CREATE INDEX IF NOT EXISTS idx_surveys_status ON surveys(status);
+
+-- When each rollup was last refreshed (staleness reported by /analytics/summary)
+CREATE TABLE IF NOT EXISTS analytics_rollup_state (
+    name            TEXT PRIMARY KEY,
+    refreshed_at    TIMESTAMPTZ,
+    duration_ms     INTEGER,
+    error           TEXT
+);
+INSERT INTO analytics_rollup_state (name, refreshed_at)
+VALUES ('analytics_summary_totals', NOW()), ('analytics_channel_counts', NOW()),
+       ('analytics_dropout_points', NOW()), ('analytics_response_types', NOW())
+ON CONFLICT (name) DO NOTHING;
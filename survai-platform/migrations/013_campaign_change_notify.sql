@@ -0,0 +1,20 @@
+-- Migration 013: campaign analytics cache invalidation
+-- NOTIFY analytics_campaign_changed <campaign_id> on survey inserts, deletes and status changes;
+-- identical notifications in one transaction are delivered once.
+
+CREATE OR REPLACE FUNCTION notify_campaign_survey_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.campaign_id IS NOT NULL THEN
+        PERFORM pg_notify('analytics_campaign_changed', OLD.campaign_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.campaign_id IS NOT NULL THEN
+        PERFORM pg_notify('analytics_campaign_changed', NEW.campaign_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_surveys_campaign_change ON surveys;
+CREATE TRIGGER trg_surveys_campaign_change
+    AFTER INSERT OR DELETE OR UPDATE OF status, channel, campaign_id, completion_date ON surveys
+    FOR EACH ROW EXECUTE FUNCTION notify_campaign_survey_change();
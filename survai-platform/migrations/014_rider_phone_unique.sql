@@ -0,0 +1,23 @@
+-- Migration 014: unique normalized phone on riders (analytics-service rider import)
+-- Riders without a phone number (no digits) are not constrained.
+
+-- Existing duplicates are collapsed onto the oldest rider; their surveys are repointed first.
+CREATE TEMP TABLE rider_phone_dupes AS
+SELECT id, keep_id FROM (
+    SELECT id,
+           FIRST_VALUE(id) OVER (
+               PARTITION BY RIGHT(regexp_replace(phone, '[^0-9]', '', 'g'), 10)
+               ORDER BY created_at NULLS LAST, id
+           ) AS keep_id
+    FROM riders
+    WHERE phone ~ '[0-9]'
+) ranked
+WHERE id <> keep_id;
+
+UPDATE surveys s SET rider_id = d.keep_id FROM rider_phone_dupes d WHERE s.rider_id = d.id;
+DELETE FROM riders r USING rider_phone_dupes d WHERE r.id = d.id;
+DROP TABLE rider_phone_dupes;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_riders_phone_key_unique
+    ON riders ((RIGHT(regexp_replace(phone, '[^0-9]', '', 'g'), 10)))
+    WHERE phone ~ '[0-9]';
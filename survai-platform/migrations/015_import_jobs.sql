@@ -0,0 +1,18 @@
+-- Migration 015: import_jobs
+-- Status and progress of background imports (POST /import/bulk-surveys, GET /import/jobs/{id}).
+
+CREATE TABLE IF NOT EXISTS import_jobs (
+    id              TEXT PRIMARY KEY,
+    kind            TEXT NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'queued',
+    filename        TEXT,
+    total_rows      INTEGER,
+    processed_rows  INTEGER NOT NULL DEFAULT 0,
+    created         INTEGER NOT NULL DEFAULT 0,
+    skipped         INTEGER NOT NULL DEFAULT 0,
+    error           TEXT,
+    result          JSONB,
+    created_at      TIMESTAMPTZ DEFAULT NOW(),
+    started_at      TIMESTAMPTZ,
+    finished_at     TIMESTAMPTZ
+);
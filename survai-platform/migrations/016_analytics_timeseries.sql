@@ -0,0 +1,285 @@
+-- Migration 016: hourly/daily analytics counters for /analytics/timeseries
+-- Counters per tenant, template, campaign and channel (UTC buckets, '' for a missing dimension).
+-- Maintained by the triggers below as surveys launch and complete, calls end and answers are
+-- recorded; existing rows are backfilled. Call durations are kept as a histogram
+-- (analytics_duration_hist) so percentiles can be rolled up over any range.
+
+CREATE TABLE IF NOT EXISTS analytics_hourly (
+    bucket              TIMESTAMP NOT NULL,
+    tenant_id           TEXT NOT NULL DEFAULT '',
+    template_name       TEXT NOT NULL DEFAULT '',
+    campaign_id         TEXT NOT NULL DEFAULT '',
+    channel             TEXT NOT NULL DEFAULT '',
+    surveys_launched    INTEGER NOT NULL DEFAULT 0,
+    surveys_completed   INTEGER NOT NULL DEFAULT 0,
+    calls               INTEGER NOT NULL DEFAULT 0,
+    calls_answered      INTEGER NOT NULL DEFAULT 0,
+    call_seconds        BIGINT NOT NULL DEFAULT 0,
+    duration_hist       INTEGER[] NOT NULL DEFAULT array_fill(0, ARRAY[17]),
+    responses           INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, tenant_id, template_name, campaign_id, channel)
+);
+CREATE TABLE IF NOT EXISTS analytics_daily (LIKE analytics_hourly INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING INDEXES);
+CREATE INDEX IF NOT EXISTS idx_analytics_hourly_tenant ON analytics_hourly(tenant_id, bucket);
+CREATE INDEX IF NOT EXISTS idx_analytics_hourly_campaign ON analytics_hourly(campaign_id, bucket);
+CREATE INDEX IF NOT EXISTS idx_analytics_daily_tenant ON analytics_daily(tenant_id, bucket);
+CREATE INDEX IF NOT EXISTS idx_analytics_daily_campaign ON analytics_daily(campaign_id, bucket);
+
+-- Duration histogram: bin upper bounds in seconds; bin 17 is 3600s and over
+CREATE OR REPLACE FUNCTION analytics_duration_hist(p_seconds INTEGER, p_count INTEGER DEFAULT 1)
+RETURNS INTEGER[] AS $$
+DECLARE
+    v_hist INTEGER[] := array_fill(0, ARRAY[17]);
+BEGIN
+    IF p_seconds > 0 THEN
+        v_hist[width_bucket(p_seconds, ARRAY[10, 20, 30, 45, 60, 90, 120, 180, 240, 300, 420, 600, 900, 1200, 1800, 3600]) + 1] := p_count;
+    END IF;
+    RETURN v_hist;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION analytics_hist_add(a INTEGER[], b INTEGER[]) RETURNS INTEGER[] AS $$
+    SELECT CASE
+        WHEN a IS NULL THEN b
+        WHEN b IS NULL THEN a
+        ELSE ARRAY(SELECT COALESCE(x, 0) + COALESCE(y, 0) FROM unnest(a, b) WITH ORDINALITY AS u(x, y, i) ORDER BY i)
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE AGGREGATE analytics_hist_sum(INTEGER[]) (SFUNC = analytics_hist_add, STYPE = INTEGER[]);
+
+-- Add (or, with negative counts, remove) one event's counts in its hourly and daily buckets
+CREATE OR REPLACE FUNCTION analytics_bump(
+    p_at TIMESTAMP, p_tenant TEXT, p_template TEXT, p_campaign TEXT, p_channel TEXT,
+    p_launched INTEGER DEFAULT 0, p_completed INTEGER DEFAULT 0,
+    p_calls INTEGER DEFAULT 0, p_answered INTEGER DEFAULT 0, p_seconds INTEGER DEFAULT 0,
+    p_responses INTEGER DEFAULT 0
+) RETURNS void AS $$
+DECLARE
+    v_hist INTEGER[] := analytics_duration_hist(p_seconds, p_calls);
+BEGIN
+    IF p_at IS NULL THEN
+        RETURN;
+    END IF;
+    INSERT INTO analytics_hourly AS t
+        (bucket, tenant_id, template_name, campaign_id, channel, surveys_launched, surveys_completed,
+         calls, calls_answered, call_seconds, duration_hist, responses)
+    VALUES (date_trunc('hour', p_at), COALESCE(p_tenant, ''), COALESCE(p_template, ''), COALESCE(p_campaign, ''),
+            COALESCE(p_channel, ''), p_launched, p_completed, p_calls, p_answered, p_calls * p_seconds, v_hist, p_responses)
+    ON CONFLICT (bucket, tenant_id, template_name, campaign_id, channel) DO UPDATE SET
+        surveys_launched = t.surveys_launched + EXCLUDED.surveys_launched,
+        surveys_completed = t.surveys_completed + EXCLUDED.surveys_completed,
+        calls = t.calls + EXCLUDED.calls,
+        calls_answered = t.calls_answered + EXCLUDED.calls_answered,
+        call_seconds = t.call_seconds + EXCLUDED.call_seconds,
+        duration_hist = analytics_hist_add(t.duration_hist, EXCLUDED.duration_hist),
+        responses = t.responses + EXCLUDED.responses;
+    INSERT INTO analytics_daily AS t
+        (bucket, tenant_id, template_name, campaign_id, channel, surveys_launched, surveys_completed,
+         calls, calls_answered, call_seconds, duration_hist, responses)
+    VALUES (date_trunc('day', p_at), COALESCE(p_tenant, ''), COALESCE(p_template, ''), COALESCE(p_campaign, ''),
+            COALESCE(p_channel, ''), p_launched, p_completed, p_calls, p_answered, p_calls * p_seconds, v_hist, p_responses)
+    ON CONFLICT (bucket, tenant_id, template_name, campaign_id, channel) DO UPDATE SET
+        surveys_launched = t.surveys_launched + EXCLUDED.surveys_launched,
+        surveys_completed = t.surveys_completed + EXCLUDED.surveys_completed,
+        calls = t.calls + EXCLUDED.calls,
+        calls_answered = t.calls_answered + EXCLUDED.calls_answered,
+        call_seconds = t.call_seconds + EXCLUDED.call_seconds,
+        duration_hist = analytics_hist_add(t.duration_hist, EXCLUDED.duration_hist),
+        responses = t.responses + EXCLUDED.responses;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Each trigger removes the old row's contribution and adds the new one's, so late or corrected
+-- writes (out-of-order call webhooks, status changes) move counts instead of double-counting.
+
+-- Inserted surveys are counted per statement from the transition table, so a bulk import of many
+-- surveys costs one bucket update per hour and dimension combination, not one per survey
+CREATE OR REPLACE FUNCTION analytics_track_survey_insert() RETURNS trigger AS $$
+BEGIN
+    PERFORM analytics_bump(g.at, g.tenant_id, g.template_name, g.campaign_id, g.channel,
+                           p_launched => g.launched::int)
+    FROM (SELECT date_trunc('hour', launch_date) AS at, tenant_id, template_name, campaign_id, channel,
+                 COUNT(*) AS launched
+          FROM new_surveys GROUP BY 1, 2, 3, 4, 5) g;
+    PERFORM analytics_bump(g.at, g.tenant_id, g.template_name, g.campaign_id, g.channel,
+                           p_completed => g.completed::int)
+    FROM (SELECT date_trunc('hour', COALESCE(completion_date, launch_date)) AS at, tenant_id, template_name,
+                 campaign_id, channel, COUNT(*) AS completed
+          FROM new_surveys WHERE status = 'Completed' GROUP BY 1, 2, 3, 4, 5) g;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION analytics_track_survey() RETURNS trigger AS $$
+DECLARE
+    v_dims_changed BOOLEAN := TG_OP = 'DELETE'
+        OR (OLD.tenant_id, OLD.template_name, OLD.campaign_id, OLD.channel)
+           IS DISTINCT FROM (NEW.tenant_id, NEW.template_name, NEW.campaign_id, NEW.channel);
+BEGIN
+    IF v_dims_changed OR OLD.launch_date IS DISTINCT FROM NEW.launch_date THEN
+        PERFORM analytics_bump(OLD.launch_date, OLD.tenant_id, OLD.template_name, OLD.campaign_id, OLD.channel,
+                               p_launched => -1);
+        IF TG_OP = 'UPDATE' THEN
+            PERFORM analytics_bump(NEW.launch_date, NEW.tenant_id, NEW.template_name, NEW.campaign_id, NEW.channel,
+                                   p_launched => 1);
+        END IF;
+    END IF;
+    IF v_dims_changed OR OLD.status IS DISTINCT FROM NEW.status OR OLD.completion_date IS DISTINCT FROM NEW.completion_date THEN
+        IF OLD.status = 'Completed' THEN
+            PERFORM analytics_bump(COALESCE(OLD.completion_date, OLD.launch_date), OLD.tenant_id, OLD.template_name,
+                                   OLD.campaign_id, OLD.channel, p_completed => -1);
+        END IF;
+        IF TG_OP = 'UPDATE' AND NEW.status = 'Completed' THEN
+            PERFORM analytics_bump(COALESCE(NEW.completion_date, NEW.launch_date), NEW.tenant_id, NEW.template_name,
+                                   NEW.campaign_id, NEW.channel, p_completed => 1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION analytics_track_call() RETURNS trigger AS $$
+DECLARE
+    v_tenant TEXT;
+    v_template TEXT;
+    v_campaign TEXT;
+    v_channel TEXT;
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND date_trunc('hour', OLD.call_ended_at) IS NOT DISTINCT FROM date_trunc('hour', NEW.call_ended_at)
+       AND (OLD.call_answered_at IS NULL) = (NEW.call_answered_at IS NULL)
+       AND OLD.call_duration_seconds IS NOT DISTINCT FROM NEW.call_duration_seconds
+       AND OLD.survey_id IS NOT DISTINCT FROM NEW.survey_id THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP <> 'INSERT' AND OLD.call_ended_at IS NOT NULL THEN
+        SELECT tenant_id, template_name, campaign_id, channel INTO v_tenant, v_template, v_campaign, v_channel
+        FROM surveys WHERE id = OLD.survey_id;
+        PERFORM analytics_bump(OLD.call_ended_at, v_tenant, v_template, v_campaign, v_channel,
+                               p_calls => -1, p_answered => -(OLD.call_answered_at IS NOT NULL)::int,
+                               p_seconds => COALESCE(OLD.call_duration_seconds, 0));
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.call_ended_at IS NOT NULL THEN
+        SELECT tenant_id, template_name, campaign_id, channel INTO v_tenant, v_template, v_campaign, v_channel
+        FROM surveys WHERE id = NEW.survey_id;
+        PERFORM analytics_bump(NEW.call_ended_at, v_tenant, v_template, v_campaign, v_channel,
+                               p_calls => 1, p_answered => (NEW.call_answered_at IS NOT NULL)::int,
+                               p_seconds => COALESCE(NEW.call_duration_seconds, 0));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Answers are stamped with responded_at when first recorded (no writer sets it), which places them in a bucket
+CREATE OR REPLACE FUNCTION analytics_stamp_response() RETURNS trigger AS $$
+BEGIN
+    NEW.responded_at := NOW() AT TIME ZONE 'UTC';
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fired (with WHEN filters) as two triggers: TG_ARGV[0] 'old' removes an answered row, 'new' adds one.
+-- Unanswered items, which bulk survey creation inserts by the thousand, fire neither.
+CREATE OR REPLACE FUNCTION analytics_track_response() RETURNS trigger AS $$
+DECLARE
+    v_survey_id TEXT;
+    v_at TIMESTAMP;
+    v_tenant TEXT;
+    v_template TEXT;
+    v_campaign TEXT;
+    v_channel TEXT;
+BEGIN
+    IF TG_ARGV[0] = 'old' THEN
+        v_survey_id := OLD.survey_id;
+        v_at := OLD.responded_at;
+    ELSE
+        v_survey_id := NEW.survey_id;
+        v_at := NEW.responded_at;
+    END IF;
+    SELECT tenant_id, template_name, campaign_id, channel INTO v_tenant, v_template, v_campaign, v_channel
+    FROM surveys WHERE id = v_survey_id;
+    PERFORM analytics_bump(v_at, v_tenant, v_template, v_campaign, v_channel,
+                           p_responses => CASE WHEN TG_ARGV[0] = 'old' THEN -1 ELSE 1 END);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill from existing rows, then attach the triggers, in one transaction so no write is missed
+BEGIN;
+LOCK TABLE surveys, call_transcripts, survey_response_items IN SHARE MODE;
+
+UPDATE survey_response_items sri
+SET responded_at = COALESCE(s.completion_date, s.launch_date)
+FROM surveys s
+WHERE s.id = sri.survey_id AND sri.responded_at IS NULL AND sri.raw_answer IS NOT NULL AND sri.raw_answer <> '';
+
+TRUNCATE analytics_hourly, analytics_daily;
+
+INSERT INTO analytics_hourly
+    (bucket, tenant_id, template_name, campaign_id, channel, surveys_launched, surveys_completed,
+     calls, calls_answered, call_seconds, duration_hist, responses)
+SELECT date_trunc('hour', e.at), COALESCE(e.tenant_id, ''), COALESCE(e.template_name, ''), COALESCE(e.campaign_id, ''),
+       COALESCE(e.channel, ''), SUM(e.launched), SUM(e.completed), SUM(e.calls), SUM(e.answered), SUM(e.seconds),
+       COALESCE(analytics_hist_sum(e.hist), array_fill(0, ARRAY[17])), SUM(e.responses)
+FROM (
+    SELECT launch_date AS at, tenant_id, template_name, campaign_id, channel,
+           1 AS launched, 0 AS completed, 0 AS calls, 0 AS answered, 0 AS seconds, NULL::INTEGER[] AS hist, 0 AS responses
+    FROM surveys
+    UNION ALL
+    SELECT COALESCE(completion_date, launch_date), tenant_id, template_name, campaign_id, channel, 0, 1, 0, 0, 0, NULL, 0
+    FROM surveys WHERE status = 'Completed'
+    UNION ALL
+    SELECT ct.call_ended_at, s.tenant_id, s.template_name, s.campaign_id, s.channel,
+           0, 0, 1, (ct.call_answered_at IS NOT NULL)::int, COALESCE(ct.call_duration_seconds, 0),
+           analytics_duration_hist(ct.call_duration_seconds), 0
+    FROM call_transcripts ct LEFT JOIN surveys s ON s.id = ct.survey_id
+    WHERE ct.call_ended_at IS NOT NULL
+    UNION ALL
+    SELECT sri.responded_at, s.tenant_id, s.template_name, s.campaign_id, s.channel, 0, 0, 0, 0, 0, NULL, 1
+    FROM survey_response_items sri JOIN surveys s ON s.id = sri.survey_id
+    WHERE sri.responded_at IS NOT NULL AND sri.raw_answer IS NOT NULL AND sri.raw_answer <> ''
+) e
+WHERE e.at IS NOT NULL
+GROUP BY 1, 2, 3, 4, 5;
+
+INSERT INTO analytics_daily
+SELECT date_trunc('day', bucket), tenant_id, template_name, campaign_id, channel,
+       SUM(surveys_launched), SUM(surveys_completed), SUM(calls), SUM(calls_answered), SUM(call_seconds),
+       analytics_hist_sum(duration_hist), SUM(responses)
+FROM analytics_hourly
+GROUP BY 1, 2, 3, 4, 5;
+
+DROP TRIGGER IF EXISTS trg_analytics_survey_insert ON surveys;
+CREATE TRIGGER trg_analytics_survey_insert
+    AFTER INSERT ON surveys REFERENCING NEW TABLE AS new_surveys
+    FOR EACH STATEMENT EXECUTE FUNCTION analytics_track_survey_insert();
+
+DROP TRIGGER IF EXISTS trg_analytics_survey ON surveys;
+CREATE TRIGGER trg_analytics_survey
+    AFTER DELETE OR UPDATE OF launch_date, status, completion_date, tenant_id, template_name, campaign_id, channel
+    ON surveys FOR EACH ROW EXECUTE FUNCTION analytics_track_survey();
+
+DROP TRIGGER IF EXISTS trg_analytics_call ON call_transcripts;
+CREATE TRIGGER trg_analytics_call
+    AFTER INSERT OR DELETE OR UPDATE OF call_ended_at, call_answered_at, call_duration_seconds, survey_id
+    ON call_transcripts FOR EACH ROW EXECUTE FUNCTION analytics_track_call();
+
+DROP TRIGGER IF EXISTS trg_analytics_stamp_response ON survey_response_items;
+CREATE TRIGGER trg_analytics_stamp_response
+    BEFORE INSERT OR UPDATE OF raw_answer ON survey_response_items
+    FOR EACH ROW WHEN (NEW.raw_answer IS NOT NULL AND NEW.raw_answer <> '' AND NEW.responded_at IS NULL)
+    EXECUTE FUNCTION analytics_stamp_response();
+
+DROP TRIGGER IF EXISTS trg_analytics_response_old ON survey_response_items;
+CREATE TRIGGER trg_analytics_response_old
+    AFTER DELETE OR UPDATE OF raw_answer, responded_at, survey_id ON survey_response_items
+    FOR EACH ROW WHEN (OLD.raw_answer IS NOT NULL AND OLD.raw_answer <> '' AND OLD.responded_at IS NOT NULL)
+    EXECUTE FUNCTION analytics_track_response('old');
+
+DROP TRIGGER IF EXISTS trg_analytics_response_new ON survey_response_items;
+CREATE TRIGGER trg_analytics_response_new
+    AFTER INSERT OR UPDATE OF raw_answer, responded_at, survey_id ON survey_response_items
+    FOR EACH ROW WHEN (NEW.raw_answer IS NOT NULL AND NEW.raw_answer <> '' AND NEW.responded_at IS NOT NULL)
+    EXECUTE FUNCTION analytics_track_response('new');
+COMMIT;
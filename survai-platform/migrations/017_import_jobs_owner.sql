@@ -0,0 +1,6 @@
+-- Migration 017: import_jobs owner
+-- Import jobs record the analytics-service instance (hostname) running them, so an instance that
+-- restarts can fail the jobs it was running: their spooled upload is gone with the old process.
+
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS owner TEXT;
+CREATE INDEX IF NOT EXISTS idx_import_jobs_active ON import_jobs(owner) WHERE status IN ('queued', 'running');
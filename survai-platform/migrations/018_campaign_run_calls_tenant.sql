@@ -0,0 +1,7 @@
+-- Migration 018: campaign_run_calls tenant
+-- Ledger rows carry the survey's tenant, so the campaign executor can cap a tenant's in-flight
+-- calls across scheduler-service replicas by counting its 'dialing' rows.
+
+ALTER TABLE campaign_run_calls ADD COLUMN IF NOT EXISTS tenant_id TEXT;
+CREATE INDEX IF NOT EXISTS idx_campaign_run_calls_dialing
+    ON campaign_run_calls(tenant_id, dispatched_at) WHERE status = 'dialing';
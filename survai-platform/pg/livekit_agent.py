@@ -7,12 +7,13 @@ For phone calls: intelligence (system prompt, answer parsing) comes from brain-s
 For sandbox/browser: uses a hardcoded demo prompt.
 """
 
+import asyncio
 import json
 import logging
 import os
 from datetime import datetime
 
-import requests
+import aiohttp
 from dotenv import load_dotenv
 
 from livekit import api
@@ -40,45 +41,54 @@ ORGANIZATION_NAME = os.getenv("ORGANIZATION_NAME", "IT Curves")
 
 
 # ─── Backend API helpers ─────────────────────────────────────────────────────
+# All calls are async (aiohttp): they run inside the agent's event loop, which
+# also drives audio and the LLM, so a blocking HTTP call would stall the call.
 
-def fetch_survey_data(survey_id: str) -> dict | None:
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=30)
+PARSE_TIMEOUT = aiohttp.ClientTimeout(total=10)
+# How long end-of-call submission waits for answers still being parsed
+PARSE_DRAIN_SECONDS = float(os.getenv("PARSE_DRAIN_SECONDS", "15"))
+
+
+async def fetch_survey_data(http: aiohttp.ClientSession, survey_id: str) -> dict | None:
     try:
-        resp = requests.get(f"{BACKEND_URL}/api/surveys/{survey_id}/questions")
-        if resp.status_code == 200:
-            return resp.json()
-        logger.error(f"Failed to fetch survey data: {resp.status_code}")
-        return None
+        async with http.get(f"{BACKEND_URL}/api/surveys/{survey_id}/questions") as resp:
+            if resp.status == 200:
+                return await resp.json()
+            logger.error(f"Failed to fetch survey data: {resp.status}")
+            return None
     except Exception as e:
         logger.error(f"Error fetching survey data: {e}")
         return None
 
 
-def fetch_survey_recipient(survey_id: str) -> dict | None:
+async def fetch_survey_recipient(http: aiohttp.ClientSession, survey_id: str) -> dict | None:
     try:
-        resp = requests.get(f"{BACKEND_URL}/api/surveys/{survey_id}/recipient_info")
-        if resp.status_code == 200:
-            return resp.json()
-        return None
+        async with http.get(f"{BACKEND_URL}/api/surveys/{survey_id}/recipient_info") as resp:
+            if resp.status == 200:
+                return await resp.json()
+            return None
     except Exception as e:
         logger.error(f"Error fetching recipient: {e}")
         return None
 
 
-def submit_survey_answers(survey_id: str, answers: dict) -> bool:
+async def submit_survey_answers(http: aiohttp.ClientSession, survey_id: str, answers: dict) -> bool:
     try:
         payload = {"SurveyId": survey_id, **answers}
-        resp = requests.post(
+        async with http.post(
             f"{BACKEND_URL}/api/surveys/{survey_id}/update_survey_qna_phone",
             json=payload,
-        )
-        logger.info(f"Submitted answers for {survey_id}: {resp.status_code}")
-        return resp.status_code == 200
+        ) as resp:
+            logger.info(f"Submitted answers for {survey_id}: {resp.status}")
+            return resp.status == 200
     except Exception as e:
         logger.error(f"Error submitting answers: {e}")
         return False
 
 
-def fetch_system_prompt(
+async def fetch_system_prompt(
+    http: aiohttp.ClientSession,
     survey_name: str,
     questions: list[dict],
     rider_data: dict | None = None,
@@ -86,7 +96,7 @@ def fetch_system_prompt(
     time_limit_minutes: int = 8,
 ) -> str | None:
     try:
-        resp = requests.post(
+        async with http.post(
             f"{BRAIN_SERVICE_URL}/api/brain/build-system-prompt",
             json={
                 "survey_name": survey_name,
@@ -95,33 +105,44 @@ def fetch_system_prompt(
                 "company_name": company_name,
                 "time_limit_minutes": time_limit_minutes,
             },
-            timeout=30,
-        )
-        if resp.status_code == 200:
-            prompt = resp.json().get("system_prompt", "")
-            logger.info(f"Got system prompt from brain-service ({len(prompt)} chars)")
-            return prompt
-        logger.error(f"Brain build-system-prompt failed: {resp.status_code}")
-        return None
+        ) as resp:
+            if resp.status == 200:
+                prompt = (await resp.json()).get("system_prompt", "")
+                logger.info(f"Got system prompt from brain-service ({len(prompt)} chars)")
+                return prompt
+            logger.error(f"Brain build-system-prompt failed: {resp.status}")
+            return None
     except Exception as e:
         logger.error(f"Error fetching system prompt: {e}")
         return None
 
 
-def parse_answer_via_brain(question: str, response: str, options: list[str], criteria: str = "categorical") -> str | None:
+async def parse_answer_via_brain(
+    http: aiohttp.ClientSession, question: str, response: str, options: list[str], criteria: str = "categorical"
+) -> str | None:
     try:
-        resp = requests.post(
+        async with http.post(
             f"{BRAIN_SERVICE_URL}/api/brain/parse",
             json={"question": question, "response": response, "options": options, "criteria": criteria},
-            timeout=10,
-        )
-        if resp.status_code == 200:
-            return resp.json().get("answer")
-        return None
+            timeout=PARSE_TIMEOUT,
+        ) as resp:
+            if resp.status == 200:
+                return (await resp.json()).get("answer")
+            return None
     except Exception:
         return None
 
 
+async def _backend_request(http: aiohttp.ClientSession, method: str, path: str, payload: dict) -> None:
+    """Best-effort status/duration/callback update; failures are logged, never raised."""
+    try:
+        async with http.request(method, f"{BACKEND_URL}{path}", json=payload) as resp:
+            if resp.status >= 300:
+                logger.warning(f"{method} {path} returned {resp.status}")
+    except Exception as e:
+        logger.warning(f"{method} {path} failed: {e}")
+
+
 # ─── Entrypoint ──────────────────────────────────────────────────────────────
 
 async def entrypoint(ctx: JobContext):
@@ -212,6 +233,24 @@ async def _run_phone_call(ctx: JobContext, phone_number: str, survey_id: str, pa
     metadata = metadata or {}
     logger.info(f"Phone call mode: survey={survey_id}, phone={phone_number}")
 
+    http = aiohttp.ClientSession(timeout=HTTP_TIMEOUT)
+    # Fire-and-forget work started by tool handlers (answer parsing, submission)
+    background: set[asyncio.Task] = set()
+
+    def spawn(coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        background.add(task)
+        task.add_done_callback(background.discard)
+        return task
+
+    async def _on_shutdown():
+        # Let submission started by submit_and_end/end_call finish before the session closes
+        while background:
+            await asyncio.gather(*list(background), return_exceptions=True)
+        await http.close()
+
+    ctx.add_shutdown_callback(_on_shutdown)
+
     # Check for enriched metadata (provided when dispatched from the dashboard)
     platform_prompt = metadata.get("system_prompt")
     platform_questions = metadata.get("questions")
@@ -227,7 +266,7 @@ async def _run_phone_call(ctx: JobContext, phone_number: str, survey_id: str, pa
         system_prompt = platform_prompt
     else:
         logger.info("No enriched metadata — fetching from backend and brain-service")
-        survey_data = fetch_survey_data(survey_id)
+        survey_data = await fetch_survey_data(http, survey_id)
         if not survey_data:
             logger.error(f"Could not fetch survey data for {survey_id}")
             return
@@ -237,7 +276,7 @@ async def _run_phone_call(ctx: JobContext, phone_number: str, survey_id: str, pa
             logger.error(f"No questions found for survey {survey_id}")
             return
 
-        recipient_info = fetch_survey_recipient(survey_id) or {}
+        recipient_info = await fetch_survey_recipient(http, survey_id) or {}
         recipient_name = recipient_info.get("Recipient", "")
         ride_id = recipient_info.get("RideID", "N/A")
         survey_name = recipient_info.get("Name", "Survey")
@@ -248,7 +287,8 @@ async def _run_phone_call(ctx: JobContext, phone_number: str, survey_id: str, pa
         if biodata:
             rider_data["biodata"] = biodata
 
-        system_prompt = fetch_system_prompt(
+        system_prompt = await fetch_system_prompt(
+            http,
             survey_name=survey_name,
             questions=questions,
             rider_data=rider_data,
@@ -266,6 +306,41 @@ async def _run_phone_call(ctx: JobContext, phone_number: str, survey_id: str, pa
     call_start_time = datetime.now()
     survey_responses: dict[str, str] = {}
     questions_by_id = {q.get("id", ""): q for q in questions}
+    parse_tasks: dict[str, asyncio.Task] = {}
+
+    async def _parse_answer(question_id: str, q: dict, answer: str):
+        criteria = q.get("criteria", "open")
+        scales = q.get("scales", q.get("scale"))
+        parsed = await parse_answer_via_brain(
+            http,
+            question=q.get("text", q.get("question_text", "")),
+            response=answer,
+            options=q.get("categories", []) if criteria == "categorical" else [str(i) for i in range(1, (scales or 5) + 1)],
+            criteria=criteria,
+        )
+        # Skip if the question was re-answered while this parse was in flight
+        if parsed and survey_responses.get(question_id) == answer:
+            logger.info(f"Brain parsed '{answer}' -> '{parsed}' for {question_id}")
+            survey_responses[question_id] = parsed
+
+    async def _finish_parsing():
+        pending = [t for t in parse_tasks.values() if not t.done()]
+        if not pending:
+            return
+        _, still_pending = await asyncio.wait(pending, timeout=PARSE_DRAIN_SECONDS)
+        if still_pending:
+            logger.warning(f"{len(still_pending)} answers not parsed in {PARSE_DRAIN_SECONDS}s — submitting raw text")
+
+    async def _submit(status: str, record_duration: bool):
+        """Runs after the tool returns: wait for parsing, then post answers and status."""
+        await _finish_parsing()
+        await submit_survey_answers(http, survey_id, dict(survey_responses))
+        await _backend_request(http, "PATCH", f"/api/surveys/{survey_id}/status", {"Status": status})
+        if record_duration:
+            duration = (datetime.now() - call_start_time).total_seconds()
+            await _backend_request(
+                http, "POST", f"/api/surveys/{survey_id}/duration", {"CompletionDuration": int(duration)}
+            )
 
     class SurveyAgent(Agent):
         async def on_enter(self):
@@ -289,30 +364,17 @@ async def _run_phone_call(ctx: JobContext, phone_number: str, survey_id: str, pa
                 question_id: The ID of the question being answered
                 answer: The user's answer (category name, rating number, or free text)
             """
+            # Store the raw answer now; categorical/scale answers are normalized
+            # by brain-service in the background and replaced before submission.
+            survey_responses[question_id] = answer
             q = questions_by_id.get(question_id)
-            if q:
-                criteria = q.get("criteria", "open")
-                categories = q.get("categories", [])
-                scales = q.get("scales", q.get("scale"))
-
-                if criteria in ("categorical", "scale") and categories:
-                    parsed = parse_answer_via_brain(
-                        question=q.get("text", q.get("question_text", "")),
-                        response=answer,
-                        options=categories if criteria == "categorical" else [str(i) for i in range(1, (scales or 5) + 1)],
-                        criteria=criteria,
-                    )
-                    if parsed:
-                        logger.info(f"Brain parsed '{answer}' -> '{parsed}' for {question_id}")
-                        survey_responses[question_id] = parsed
-                    else:
-                        survey_responses[question_id] = answer
-                else:
-                    survey_responses[question_id] = answer
-            else:
-                survey_responses[question_id] = answer
+            if q and q.get("criteria", "open") in ("categorical", "scale") and q.get("categories"):
+                previous = parse_tasks.get(question_id)
+                if previous and not previous.done():
+                    previous.cancel()
+                parse_tasks[question_id] = spawn(_parse_answer(question_id, q, answer))
 
-            logger.info(f"Recorded answer for {question_id}: {survey_responses[question_id]}")
+            logger.info(f"Recorded answer for {question_id}: {answer}")
             return f"Answer recorded for question {question_id}. Continue the conversation naturally."
 
         @function_tool()
@@ -323,30 +385,17 @@ async def _run_phone_call(ctx: JobContext, phone_number: str, survey_id: str, pa
                 callback_time: When the user wants to be called back (e.g. "tomorrow afternoon", "in 2 hours")
             """
             logger.info(f"Callback requested for survey {survey_id}: {callback_time}")
-            try:
-                requests.post(
-                    f"{BACKEND_URL}/api/surveys/callback",
-                    json={"survey_id": survey_id, "phone": "", "delay_minutes": 60, "provider": "livekit"},
-                    timeout=10,
-                )
-            except Exception as e:
-                logger.warning(f"Failed to schedule callback: {e}")
+            spawn(_backend_request(
+                http, "POST", "/api/surveys/callback",
+                {"survey_id": survey_id, "phone": "", "delay_minutes": 60, "provider": "livekit"},
+            ))
             return f"Callback noted for {callback_time}. Say goodbye warmly and end the call."
 
         @function_tool()
         async def submit_and_end(self, ctx: RunContext):
             """Submit all collected survey answers and end the call. Call this after the concluding statement."""
             logger.info(f"Submitting {len(survey_responses)} answers for survey {survey_id}")
-            submit_survey_answers(survey_id, survey_responses)
-            try:
-                requests.patch(f"{BACKEND_URL}/api/surveys/{survey_id}/status", json={"Status": "Completed"})
-            except Exception:
-                pass
-            duration = (datetime.now() - call_start_time).total_seconds()
-            try:
-                requests.post(f"{BACKEND_URL}/api/surveys/{survey_id}/duration", json={"CompletionDuration": int(duration)}, timeout=5)
-            except Exception:
-                pass
+            spawn(_submit("Completed", record_duration=True))
             return "Survey submitted and call ended."
 
         @function_tool()
@@ -354,11 +403,7 @@ async def _run_phone_call(ctx: JobContext, phone_number: str, survey_id: str, pa
             """End the call when the user declines, wants to stop, or isn't available."""
             logger.info(f"Ending call for survey {survey_id}")
             if survey_responses:
-                submit_survey_answers(survey_id, survey_responses)
-                try:
-                    requests.patch(f"{BACKEND_URL}/api/surveys/{survey_id}/status", json={"Status": "In-Progress"})
-                except Exception:
-                    pass
+                spawn(_submit("In-Progress", record_duration=False))
             return "Call ended."
 
         @function_tool()
@@ -409,7 +454,8 @@ async def _run_phone_call(ctx: JobContext, phone_number: str, survey_id: str, pa
 
         try:
             from utils import sql_execute
-            sql_execute(
+            await asyncio.to_thread(
+                sql_execute,
                 "UPDATE surveys SET call_id = :call_id WHERE id = :survey_id",
                 {"call_id": ctx.room.name, "survey_id": survey_id},
             )
@@ -2,13 +2,17 @@ import atexit
 import datetime
 import logging
 import os
+import threading
+import time
 import uuid
+from collections import OrderedDict, deque
 
-import psycopg2
 import requests
-from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED
+from apscheduler.events import EVENT_JOB_ADDED, EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_SUBMITTED
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 
 # Configure logging
 logging.basicConfig(
@@ -20,52 +24,175 @@ logger = logging.getLogger(__name__)
 DB_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/db"
 
 
-def job_listener(event):
-    """Log job execution results to database."""
-    try:
-        conn = psycopg2.connect(
-            dbname="db",
-            user=os.getenv("DB_USER"),
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT"),
-            password=os.getenv("DB_PASSWORD"),
-        )
-        cur = conn.cursor()
-
-        if event.exception:
-            status = "FAILED"
-            logger.error(f"Job {event.job_id} failed: {event.exception}")
+JOB_HISTORY_BATCH_SIZE = int(os.getenv("JOB_HISTORY_BATCH_SIZE", "200"))
+JOB_HISTORY_FLUSH_SECONDS = float(os.getenv("JOB_HISTORY_FLUSH_SECONDS", "2"))
+
+
+class JobHistoryWriter:
+    """
+    Buffers job outcomes and writes them to job_history in batches, through a
+    small connection pool, when JOB_HISTORY_BATCH_SIZE rows are waiting or
+    JOB_HISTORY_FLUSH_SECONDS have passed. A failed flush keeps its rows for
+    the next one.
+    """
+
+    def __init__(self, batch_size=JOB_HISTORY_BATCH_SIZE, flush_seconds=JOB_HISTORY_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pool = None
+        self._buffer = deque(maxlen=50000)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ThreadedConnectionPool(
+                1,
+                2,
+                dbname="db",
+                user=os.getenv("DB_USER"),
+                host=os.getenv("DB_HOST"),
+                port=os.getenv("DB_PORT"),
+                password=os.getenv("DB_PASSWORD"),
+            )
+        return self._pool
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="job-history", daemon=True)
+            self._thread.start()
+
+    def record(self, job_id, job_type, status, duration_ms=None, error=None):
+        with self._lock:
+            self._buffer.append((
+                job_id,
+                job_type,
+                datetime.datetime.utcnow(),
+                status,
+                duration_ms,
+                error[:1000] if error else None,
+            ))
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            if not batch:
+                return
+            conn = None
+            try:
+                conn = self._get_pool().getconn()
+                with conn.cursor() as cur:
+                    execute_values(
+                        cur,
+                        "INSERT INTO job_history (job_id, job_type, run_time, status, duration_ms, error) VALUES %s",
+                        batch,
+                    )
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Failed to log {len(batch)} job results (kept for retry): {e}")
+                if conn is not None:
+                    conn.rollback()
+                with self._lock:
+                    self._buffer.extendleft(reversed(batch))
+            finally:
+                if conn is not None:
+                    self._pool.putconn(conn)
+
+
+history_writer = JobHistoryWriter()
+# job_id -> job name (the job type in job_history), most recent last. One-off jobs are gone from
+# the store by the time they finish, and the result listener must not call into the scheduler
+# (it runs on executor threads that scheduler.shutdown() waits for while holding its locks).
+_job_names = OrderedDict()
+MAX_JOB_NAMES = 10000
+# (job_id, scheduled run time) -> monotonic start, for jobs submitted but not finished
+_started = {}
+# Runs that finished before their submission event was handled (fast jobs)
+_finished_early = set()
+
+
+def _remember_name(job_id, jobstore):
+    job = scheduler.get_job(job_id, jobstore)
+    if job:
+        _job_names[job_id] = job.name
+        _job_names.move_to_end(job_id)
+        while len(_job_names) > MAX_JOB_NAMES:
+            _job_names.popitem(last=False)
+
+
+def job_added_listener(event):
+    _remember_name(event.job_id, event.jobstore)
+
+
+def job_submitted_listener(event):
+    if event.job_id not in _job_names:
+        # Jobs loaded from the jobstore at startup (no added event in this process)
+        _remember_name(event.job_id, event.jobstore)
+    for run_time in event.scheduled_run_times:
+        key = (event.job_id, run_time)
+        if key in _finished_early:
+            _finished_early.discard(key)
         else:
-            status = "SUCCESS"
-            logger.info(f"Job {event.job_id} completed successfully")
+            _started[key] = time.monotonic()
 
-        cur.execute(
-            "INSERT INTO job_history (job_id, run_time, status) VALUES (%s, NOW(), %s)",
-            (event.job_id, status),
-        )
-        conn.commit()
 
-    except Exception as e:
-        logger.error(f"Failed to log job result: {e}")
-    finally:
-        if "cur" in locals():
-            cur.close()
-        if "conn" in locals():
-            conn.close()
+def job_listener(event):
+    """Queue job execution results for the job_history writer."""
+    key = (event.job_id, event.scheduled_run_time)
+    started = _started.pop(key, None)
+    if started is not None:
+        duration_ms = int((time.monotonic() - started) * 1000)
+    else:
+        _finished_early.add(key)
+        elapsed = datetime.datetime.now(datetime.timezone.utc) - event.scheduled_run_time
+        duration_ms = max(0, int(elapsed.total_seconds() * 1000))
+    name = _job_names.get(event.job_id)
+
+    if event.exception:
+        status = "FAILED"
+        logger.error(f"Job {event.job_id} failed: {event.exception}")
+    else:
+        status = "SUCCESS"
+        logger.info(f"Job {event.job_id} completed successfully")
+
+    history_writer.record(
+        event.job_id,
+        name,
+        status,
+        duration_ms=duration_ms,
+        error=str(event.exception) if event.exception else None,
+    )
 
 
 # Configure scheduler
 jobstores = {"default": SQLAlchemyJobStore(url=DB_URL)}
 scheduler = BackgroundScheduler(jobstores=jobstores)
+scheduler.add_listener(job_added_listener, EVENT_JOB_ADDED)
+scheduler.add_listener(job_submitted_listener, EVENT_JOB_SUBMITTED)
 scheduler.add_listener(job_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
 
 
 def start_scheduler():
     """Start the scheduler if not already running."""
     if not scheduler.running:
+        history_writer.start()
         scheduler.start()
         logger.info("Scheduler started")
-        # Ensure scheduler shuts down gracefully
+        # Ensure scheduler shuts down gracefully (and the last job results are written)
+        atexit.register(history_writer.flush)
         atexit.register(lambda: scheduler.shutdown())
     else:
         logger.info("Scheduler is already running")
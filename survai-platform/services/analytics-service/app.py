@@ -13,9 +13,12 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from bulk_survey_import import fail_orphaned_jobs
+from campaign_cache import get_campaign_cache
 from routes.analytics import router as analytics_router
 from routes.export import router as export_router
 from routes.import_data import router as import_router
+from rollups import get_refresher
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,7 +27,17 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Analytics Service starting up...")
+    try:
+        orphaned = fail_orphaned_jobs()
+        if orphaned:
+            logger.info(f"Marked {orphaned} interrupted import jobs as failed")
+    except Exception as e:
+        logger.error(f"Orphaned import job cleanup error: {e}")
+    get_refresher().start()
+    get_campaign_cache().start()
     yield
+    get_campaign_cache().stop()
+    get_refresher().stop()
     logger.info("Analytics Service shutting down...")
 
 
@@ -0,0 +1 @@
+"""Benchmarks for the analytics service."""
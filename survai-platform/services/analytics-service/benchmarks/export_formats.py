@@ -0,0 +1,114 @@
+"""
+Export formats compared: CSV, gzip CSV, Parquet and Arrow IPC stream.
+
+Each format encodes the same --rows synthetic survey-response rows (the
+export_stream query) from a server-side cursor into a file, using the
+encoders the export routes use. The benchmark reports write time, file size
+and the time to read the file back into an Arrow table (pyarrow's CSV reader
+for CSV, which is what the data team's re-parsing amounts to).
+
+"fetch" streams the rows and discards them: its time is the cursor cost
+included in every write time.
+
+Usage:
+    python -m benchmarks.export_formats                    # 1M rows
+    python -m benchmarks.export_formats --rows 5000000 --keep /tmp/exports
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyarrow as pa  # noqa: E402
+import pyarrow.csv as pa_csv  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+
+from benchmarks.export_stream import COLUMNS, SYNTHETIC_QUERY  # noqa: E402
+from columnar import SURVEY_RESPONSE_SCHEMA, iter_arrow_stream, iter_parquet  # noqa: E402
+from db import stream_rows  # noqa: E402
+from routes.export import EXPORT_BATCH_ROWS, iter_csv  # noqa: E402
+
+FORMATS = {
+    "csv": ("survey_responses.csv", lambda batches: iter_csv(batches, COLUMNS)),
+    "csv-gzip": ("survey_responses.csv.gz", lambda batches: iter_csv(batches, COLUMNS, gzip=True)),
+    "parquet": ("survey_responses.parquet", lambda batches: iter_parquet(batches, SURVEY_RESPONSE_SCHEMA)),
+    "arrow": ("survey_responses.arrows", lambda batches: iter_arrow_stream(batches, SURVEY_RESPONSE_SCHEMA)),
+}
+
+
+def _read(fmt: str, path: str) -> pa.Table:
+    if fmt == "csv":
+        return pa_csv.read_csv(path)
+    if fmt == "csv-gzip":
+        return pa_csv.read_csv(pa.input_stream(path, compression="gzip"))
+    if fmt == "parquet":
+        return pq.read_table(path)
+    with pa.OSFile(path, "rb") as f:
+        return pa.ipc.open_stream(f).read_all()
+
+
+def bench_fetch(rows: int) -> dict:
+    started = time.perf_counter()
+    for _ in stream_rows(SYNTHETIC_QUERY, {"rows": rows}, batch_size=EXPORT_BATCH_ROWS):
+        pass
+    seconds = time.perf_counter() - started
+    print(f"  {'fetch':<9} {seconds:>8.2f}s", file=sys.stderr)
+    return {"format": "fetch", "rows": rows, "write_seconds": round(seconds, 2)}
+
+
+def bench_format(fmt: str, rows: int, directory: str) -> dict:
+    filename, encode = FORMATS[fmt]
+    path = os.path.join(directory, filename)
+    started = time.perf_counter()
+    with open(path, "wb") as f:
+        for chunk in encode(stream_rows(SYNTHETIC_QUERY, {"rows": rows}, batch_size=EXPORT_BATCH_ROWS)):
+            f.write(chunk)
+    write_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    table = _read(fmt, path)
+    read_seconds = time.perf_counter() - started
+    if table.num_rows != rows:
+        raise RuntimeError(f"{fmt}: read back {table.num_rows} rows, expected {rows}")
+
+    size = os.path.getsize(path)
+    print(f"  {fmt:<9} {write_seconds:>8.2f}s write  {size / 1e6:>9.1f} MB  {read_seconds:>7.2f}s read", file=sys.stderr)
+    return {
+        "format": fmt,
+        "rows": rows,
+        "write_seconds": round(write_seconds, 2),
+        "bytes": size,
+        "read_seconds": round(read_seconds, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--formats", default=",".join(FORMATS), help="comma-separated subset of " + ", ".join(FORMATS))
+    parser.add_argument("--keep", help="write the files here and keep them (default: a temporary directory)")
+    parser.add_argument("--json", help="write the results here")
+    args = parser.parse_args()
+
+    print(f"{args.rows} synthetic rows, batches of {EXPORT_BATCH_ROWS}", file=sys.stderr)
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.keep or tmp
+        os.makedirs(directory, exist_ok=True)
+        results = [bench_fetch(args.rows)]
+        results += [bench_format(fmt, args.rows, directory) for fmt in args.formats.split(",") if fmt]
+
+    csv_row = next((r for r in results if r["format"] == "csv"), None)
+    if csv_row:
+        for r in results:
+            if "bytes" in r and r is not csv_row:
+                speedup = csv_row["read_seconds"] / r["read_seconds"] if r["read_seconds"] else float("inf")
+                print(f"{r['format']}: {r['bytes'] / csv_row['bytes']:.1%} of CSV size, read {speedup:.1f}x faster",
+                      file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2)
@@ -0,0 +1,138 @@
+"""
+CSV export: streamed through a server-side cursor vs materialized in memory.
+
+Exports --rows synthetic survey-response rows (generate_series, same 13
+columns as /export/surveys, nothing written to the database) and reports
+rows/s, output size and the process RSS growth while exporting:
+  - stream:   stream_rows + iter_csv, the path the export routes use
+  - gzip:     the same with gzip content-encoding
+  - buffered: the previous approach (sql_execute into a list, one StringIO);
+              only with --buffered, and expect it to need several GB at 5M rows
+
+With --url the export is downloaded from a running analytics-service
+instead (real data from /api/export/surveys) and only throughput and size
+are reported.
+
+Usage:
+    python -m benchmarks.export_stream                      # 5M rows, stream + gzip
+    python -m benchmarks.export_stream --rows 500000 --buffered
+    python -m benchmarks.export_stream --url http://localhost:8060 --gzip
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from db import sql_execute, stream_rows  # noqa: E402
+from routes.export import EXPORT_BATCH_ROWS, iter_csv  # noqa: E402
+
+COLUMNS = ["id", "template_name", "status", "rider_name", "phone", "email", "launch_date", "completion_date",
+           "channel", "question_id", "question_text", "raw_answer", "answer"]
+
+SYNTHETIC_QUERY = """
+    SELECT 'survey-' || (g / 10) AS id,
+           'Rider Satisfaction' AS template_name,
+           CASE WHEN g % 3 = 0 THEN 'Completed' ELSE 'In-Progress' END AS status,
+           'Rider ' || (g / 10) AS rider_name,
+           '+1555' || lpad((g / 10)::text, 7, '0') AS phone,
+           'rider' || (g / 10) || '@example.com' AS email,
+           TIMESTAMP '2026-01-01' + make_interval(mins => g % 100000) AS launch_date,
+           CASE WHEN g % 3 = 0 THEN TIMESTAMP '2026-01-02' + make_interval(mins => g % 100000) END AS completion_date,
+           'phone' AS channel,
+           'q' || (g % 10) AS question_id,
+           'How satisfied were you with part ' || (g % 10) || ' of your trip?' AS question_text,
+           'raw answer ' || g AS raw_answer,
+           (g % 5)::text AS answer
+    FROM generate_series(1, :rows) AS g
+"""
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _report(mode: str, rows: int, size: int, seconds: float, rss_growth_mb=None) -> dict:
+    row = {
+        "mode": mode,
+        "rows": rows,
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(rows / seconds, 1) if seconds else 0.0,
+        "output_mb": round(size / 1e6, 1),
+        "rss_growth_mb": round(rss_growth_mb, 1) if rss_growth_mb is not None else None,
+    }
+    rss = f"{rss_growth_mb:>8.1f} MB RSS growth" if rss_growth_mb is not None else ""
+    print(f"  {mode:<8} {rows:>9} rows  {seconds:>8.2f}s  {row['rows_per_second']:>10.1f} rows/s  "
+          f"{row['output_mb']:>8.1f} MB out  {rss}", file=sys.stderr)
+    return row
+
+
+def bench_stream(rows: int, gzip: bool) -> dict:
+    base = peak = _rss_mb()
+    size = 0
+    started = time.perf_counter()
+    for chunk in iter_csv(stream_rows(SYNTHETIC_QUERY, {"rows": rows}, batch_size=EXPORT_BATCH_ROWS), COLUMNS, gzip=gzip):
+        size += len(chunk)
+        peak = max(peak, _rss_mb())
+    return _report("gzip" if gzip else "stream", rows, size, time.perf_counter() - started, peak - base)
+
+
+def bench_buffered(rows: int) -> dict:
+    base = _rss_mb()
+    started = time.perf_counter()
+    result = sql_execute(SYNTHETIC_QUERY, {"rows": rows})
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(COLUMNS)
+    for row in result:
+        writer.writerow([row.get(c, "") for c in COLUMNS])
+    data = output.getvalue()
+    peak = _rss_mb()
+    return _report("buffered", rows, len(data.encode("utf-8")), time.perf_counter() - started, peak - base)
+
+
+def bench_url(url: str, gzip: bool) -> dict:
+    headers = {"Accept-Encoding": "gzip" if gzip else "identity"}
+    size = lines = 0
+    started = time.perf_counter()
+    with httpx.stream("GET", url.rstrip("/") + "/api/export/surveys", headers=headers, timeout=None) as r:
+        r.raise_for_status()
+        # iter_raw: count bytes on the wire, without decompressing
+        for chunk in r.iter_raw():
+            size += len(chunk)
+            if not gzip:
+                lines += chunk.count(b"\n")
+    return _report("http-gzip" if gzip else "http", max(lines - 1, 0), size, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--buffered", action="store_true", help="also run the materialize-everything baseline")
+    parser.add_argument("--url", help="analytics-service base URL (download /api/export/surveys instead)")
+    parser.add_argument("--gzip", action="store_true", help="with --url: request gzip")
+    parser.add_argument("--json", help="write the results here")
+    args = parser.parse_args()
+
+    if args.url:
+        results = [bench_url(args.url, args.gzip)]
+    else:
+        print(f"synthetic export, {args.rows} rows, batches of {EXPORT_BATCH_ROWS}", file=sys.stderr)
+        # Streaming modes first: RSS only grows, so the buffered run must come last
+        results = [bench_stream(args.rows, gzip=False), bench_stream(args.rows, gzip=True)]
+        if args.buffered:
+            results.append(bench_buffered(args.rows))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2)
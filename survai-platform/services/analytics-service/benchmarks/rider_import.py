@@ -0,0 +1,104 @@
+"""
+Rider import throughput: a generated CSV through the streaming COPY import.
+
+Writes a --rows CSV (default 1M) in which about 2% of rows repeat an earlier
+phone and about 1% are invalid, imports it, then imports it again (every
+row now updates an existing rider). Reports rows/s and the
+inserted/updated/rejected counts for both passes.
+
+Benchmark phones use a 0xx area code, which no real number has, so they
+never match existing riders; the riders are deleted afterwards.
+
+By default the import runs in-process (DB_* env, same as the service).
+With --url the file is uploaded to a running analytics-service instead.
+
+Usage:
+    python -m benchmarks.rider_import
+    python -m benchmarks.rider_import --rows 200000 --url http://localhost:8060
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from db import sql_execute  # noqa: E402
+from rider_import import PHONE_KEY_SQL, import_riders_csv  # noqa: E402
+
+
+def write_csv(path: str, rows: int, tag: int) -> None:
+    rng = random.Random(tag)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "phone", "email", "biodata"])
+        for i in range(rows):
+            n = rng.randrange(i) if i and rng.random() < 0.02 else i
+            phone = f"+1 (0{tag:02d}) {n // 10000:03d}-{n % 10000:04d}"
+            if rng.random() < 0.01:
+                phone = "12345"
+            writer.writerow([f"Bench Rider {n}", phone, f"rider{n}@example.com", json.dumps({"segment": n % 7})])
+
+
+def import_direct(path: str) -> dict:
+    with open(path, "rb") as f:
+        return import_riders_csv(f)
+
+
+def import_http(path: str, url: str) -> dict:
+    with open(path, "rb") as f:
+        r = httpx.post(url.rstrip("/") + "/api/import/riders", files={"file": ("riders.csv", f, "text/csv")}, timeout=None)
+    r.raise_for_status()
+    return r.json()
+
+
+def _timed(label: str, rows: int, fn) -> dict:
+    started = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - started
+    row = {
+        "pass": label,
+        "rows": rows,
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(rows / seconds, 1) if seconds else 0.0,
+        **{k: result.get(k) for k in ("inserted", "updated", "rejected", "duplicates_in_file")},
+    }
+    print(f"  {label:<8} {rows:>8} rows  {seconds:>7.2f}s  {row['rows_per_second']:>10.1f} rows/s  "
+          f"inserted={row['inserted']} updated={row['updated']} rejected={row['rejected']} "
+          f"duplicates={row['duplicates_in_file']}", file=sys.stderr)
+    return row
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="at most 10M (7-digit subscriber numbers)")
+    parser.add_argument("--url", help="analytics-service base URL (default: import in-process)")
+    parser.add_argument("--json", help="write the results here")
+    args = parser.parse_args()
+
+    tag = random.randrange(100)
+    importer = (lambda path: import_http(path, args.url)) if args.url else import_direct
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "riders.csv")
+        started = time.perf_counter()
+        write_csv(path, args.rows, tag)
+        print(f"{args.rows} rows, {os.path.getsize(path) / 1e6:.1f} MB, generated in "
+              f"{time.perf_counter() - started:.1f}s", file=sys.stderr)
+        try:
+            results = [
+                _timed("insert", args.rows, lambda: importer(path)),
+                _timed("reimport", args.rows, lambda: importer(path)),
+            ]
+        finally:
+            sql_execute(f"DELETE FROM riders WHERE {PHONE_KEY_SQL} LIKE :prefix", {"prefix": f"0{tag:02d}%"})
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2)
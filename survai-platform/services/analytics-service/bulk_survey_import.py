@@ -0,0 +1,197 @@
+"""
+Bulk survey creation from CSV, run as a background import job.
+
+The upload is spooled to a temporary file and processed after the request
+returns. Rows are validated in batches of BULK_SURVEY_BATCH_ROWS. Each batch
+takes one transaction and two statements, whatever the number of questions:
+a multi-row INSERT of the surveys (jsonb_to_recordset), and one
+INSERT ... SELECT that joins them to template_questions to create their
+survey_response_items. Progress is recorded in import_jobs after each batch
+and read by GET /import/jobs/{job_id}. Batches commit independently: a job
+that fails part-way keeps the surveys of the batches before the failure,
+and its created count says how many.
+
+A job runs in the analytics-service instance that received the upload, and
+import_jobs.owner records which (its hostname). An instance that restarts
+marks its unfinished jobs as failed (fail_orphaned_jobs), since their spooled
+files went with the old process.
+"""
+
+import csv
+import json
+import logging
+import os
+import socket
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from db import get_engine, sql_execute
+
+logger = logging.getLogger(__name__)
+
+BULK_SURVEY_BATCH_ROWS = int(os.getenv("BULK_SURVEY_BATCH_ROWS", "5000"))
+MAX_SKIP_SAMPLES = 100
+MAX_SURVEY_SAMPLES = 100
+INSTANCE = socket.gethostname()
+
+
+def create_job(kind: str, filename: Optional[str]) -> str:
+    job_id = str(uuid4())
+    sql_execute(
+        """INSERT INTO import_jobs (id, kind, status, filename, owner)
+           VALUES (:id, :kind, 'queued', :filename, :owner)""",
+        {"id": job_id, "kind": kind, "filename": filename, "owner": INSTANCE},
+    )
+    return job_id
+
+
+def fail_orphaned_jobs() -> int:
+    """At startup: fail this instance's queued/running jobs, which no process is running any more."""
+    # Not sql_execute: it does not commit statements that return rows
+    with get_engine().begin() as conn:
+        result = conn.execute(
+            text(
+                """UPDATE import_jobs
+                   SET status = 'failed', finished_at = NOW(),
+                       error = 'Interrupted: analytics-service restarted before the import finished'
+                   WHERE status IN ('queued', 'running') AND (owner = :owner OR owner IS NULL)"""
+            ),
+            {"owner": INSTANCE},
+        )
+        return result.rowcount
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    rows = sql_execute("SELECT * FROM import_jobs WHERE id = :id", {"id": job_id})
+    if not rows:
+        return None
+    job = rows[0]
+    total = job.get("total_rows")
+    job["percent"] = round(job["processed_rows"] / total * 100, 1) if total else (100.0 if job["status"] == "completed" else 0.0)
+    return job
+
+
+def _update_job(job_id: str, **fields) -> None:
+    if "result" in fields:
+        fields["result"] = json.dumps(fields["result"])
+    assignments = ", ".join(
+        f"{k} = CAST(:{k} AS jsonb)" if k == "result" else f"{k} = :{k}" for k in fields
+    )
+    sql_execute(f"UPDATE import_jobs SET {assignments} WHERE id = :job_id", {"job_id": job_id, **fields})
+
+
+def read_header(path: str) -> List[str]:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def has_data_rows(path: str) -> bool:
+    """True if the CSV has a non-blank line after its header (reads only up to that line)."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return any(row for row in reader)
+
+
+def _count_rows(path: str) -> int:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        # DictReader skips blank lines, so they are not counted either
+        return max(sum(1 for row in csv.reader(f) if row) - 1, 0)
+
+
+def _batches(reader: csv.DictReader, valid_templates: Set[str], launch_date: str,
+             result: dict) -> Iterator[Tuple[int, List[dict]]]:
+    """Yield (rows read so far, valid surveys) per batch."""
+    batch: List[dict] = []
+    read = 0
+    for row in reader:
+        read += 1
+        rider_name = (row.get("rider_name") or row.get("name") or "").strip()
+        phone = (row.get("phone") or "").strip()
+        email = (row.get("email") or "").strip()
+        template_name = (row.get("template_name") or "").strip()
+        reason = None
+        if not template_name or template_name not in valid_templates:
+            reason = f"unknown or unpublished template: {template_name}" if template_name else "missing template_name"
+        elif not rider_name and not phone:
+            reason = "missing rider_name and phone"
+        if reason:
+            result["skipped"] += 1
+            if len(result["skips"]) < MAX_SKIP_SAMPLES:
+                result["skips"].append({"line": reader.line_num, "reason": reason})
+            continue
+        batch.append({
+            "id": str(uuid4()),
+            "template_name": template_name,
+            "rider_name": rider_name or None,
+            "phone": phone or None,
+            "email": email or None,
+            "launch_date": launch_date,
+        })
+        if len(batch) >= BULK_SURVEY_BATCH_ROWS:
+            yield read, batch
+            batch = []
+    yield read, batch
+
+
+def _insert_batch(batch: List[dict]) -> int:
+    """Insert one batch of surveys and their response items; returns the number of items."""
+    rows = json.dumps(batch)
+    with get_engine().begin() as conn:
+        conn.execute(
+            text(
+                """INSERT INTO surveys (id, template_name, status, name, rider_name, phone, email, launch_date)
+                   SELECT r.id, r.template_name, 'In-Progress', r.template_name, r.rider_name, r.phone, r.email,
+                          r.launch_date::timestamp
+                   FROM jsonb_to_recordset(CAST(:rows AS jsonb))
+                        AS r(id TEXT, template_name TEXT, rider_name TEXT, phone TEXT, email TEXT, launch_date TEXT)"""
+            ),
+            {"rows": rows},
+        )
+        items = conn.execute(
+            text(
+                """INSERT INTO survey_response_items (survey_id, question_id, ord)
+                   SELECT r.id, tq.question_id, tq.ord
+                   FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(id TEXT, template_name TEXT)
+                   JOIN template_questions tq ON tq.template_name = r.template_name"""
+            ),
+            {"rows": rows},
+        )
+        return items.rowcount
+
+
+def run_bulk_survey_import(job_id: str, path: str) -> None:
+    """Process a spooled bulk-survey CSV for an import job, then delete the file."""
+    result = {"created": 0, "skipped": 0, "response_items": 0, "skips": [], "surveys": []}
+    try:
+        _update_job(job_id, status="running", started_at=datetime.now(timezone.utc), total_rows=_count_rows(path))
+
+        valid_templates = {t["name"] for t in sql_execute("SELECT name FROM templates WHERE status = 'Published'", {})}
+        launch_date = datetime.now(timezone.utc).isoformat()[:19].replace("T", " ")
+
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            for read, batch in _batches(reader, valid_templates, launch_date, result):
+                if batch:
+                    result["response_items"] += _insert_batch(batch)
+                    result["created"] += len(batch)
+                    room = MAX_SURVEY_SAMPLES - len(result["surveys"])
+                    result["surveys"].extend(
+                        {"survey_id": s["id"], "rider_name": s["rider_name"] or "", "phone": s["phone"] or "",
+                         "template_name": s["template_name"]}
+                        for s in batch[:max(room, 0)]
+                    )
+                _update_job(job_id, processed_rows=read, created=result["created"], skipped=result["skipped"])
+
+        _update_job(job_id, status="completed", finished_at=datetime.now(timezone.utc), result=result)
+    except Exception as e:
+        logger.error(f"Bulk survey import {job_id} failed: {e}")
+        _update_job(job_id, status="failed", finished_at=datetime.now(timezone.utc), error=str(e)[:1000], result=result)
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
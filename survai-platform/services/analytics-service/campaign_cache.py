@@ -0,0 +1,135 @@
+"""
+Per-campaign cache for /analytics/campaign/{campaign_id}.
+
+Survey completions are written by several services (survey-, voice- and
+agent-service), so invalidation comes from the database: a trigger on
+surveys (migration 013) sends NOTIFY analytics_campaign_changed with the
+campaign id whenever a campaign's survey is added, removed, or changes
+status or channel. A listener thread evicts that campaign. Entries also
+expire after CAMPAIGN_ANALYTICS_CACHE_TTL seconds, which bounds staleness
+for changes the trigger does not see (call durations) and while the
+listener is reconnecting; the cache is cleared on every reconnect.
+"""
+
+import logging
+import os
+import select
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGN_ANALYTICS_CACHE_TTL = float(os.getenv("CAMPAIGN_ANALYTICS_CACHE_TTL", "300"))
+CAMPAIGN_ANALYTICS_CACHE_SIZE = int(os.getenv("CAMPAIGN_ANALYTICS_CACHE_SIZE", "1000"))
+NOTIFY_CHANNEL = "analytics_campaign_changed"
+
+
+class CampaignAnalyticsCache:
+    def __init__(self, ttl: float = CAMPAIGN_ANALYTICS_CACHE_TTL, max_size: int = CAMPAIGN_ANALYTICS_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Bumped on invalidation, so a result computed before an invalidation is not stored after it
+        self._generations: dict = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, campaign_id: str, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(campaign_id)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(campaign_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generations.setdefault(campaign_id, 0)
+
+        value = compute()
+
+        with self._lock:
+            if self._generations.get(campaign_id, 0) == generation:
+                self._entries[campaign_id] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(campaign_id)
+                while len(self._entries) > self.max_size:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._generations.pop(evicted, None)
+        return value
+
+    def invalidate(self, campaign_id: Optional[str] = None) -> None:
+        """Drop one campaign, or everything when campaign_id is None."""
+        with self._lock:
+            self.invalidations += 1
+            if campaign_id is None:
+                self._entries.clear()
+                for key in self._generations:
+                    self._generations[key] += 1
+                return
+            self._entries.pop(campaign_id, None)
+            self._generations[campaign_id] = self._generations.get(campaign_id, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "listening": self._thread is not None and self._thread.is_alive(),
+            }
+
+    # ─── Invalidation listener ──────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._listen_loop, name="campaign-cache-listen", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _listen_loop(self) -> None:
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(
+                    dbname="db",
+                    user=os.getenv("DB_USER", "pguser"),
+                    password=os.getenv("DB_PASSWORD", "root"),
+                    host=os.getenv("DB_HOST", "localhost"),
+                    port=os.getenv("DB_PORT", "5432"),
+                )
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+                # Anything could have changed while we were not listening
+                self.invalidate()
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            self.invalidate(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.error(f"Campaign cache listener error: {e}")
+                self._stop.wait(5)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+_cache: Optional[CampaignAnalyticsCache] = None
+
+
+def get_campaign_cache() -> CampaignAnalyticsCache:
+    global _cache
+    if _cache is None:
+        _cache = CampaignAnalyticsCache()
+    return _cache
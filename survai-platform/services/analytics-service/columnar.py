@@ -0,0 +1,129 @@
+"""
+Columnar (Parquet / Arrow IPC stream) encoding for exports.
+
+Rows come from db.stream_rows batches and are grouped into row groups of
+EXPORT_ROW_GROUP_ROWS before they are converted to Arrow, so memory is
+bounded by one row group whatever the export size. Each row group is sent
+as soon as it is written. Columns listed in a schema as dictionary types
+(template_name, status, question_text, ...) are dictionary-encoded.
+"""
+
+import os
+from typing import Iterable, Iterator, List, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORT_ROW_GROUP_ROWS = int(os.getenv("EXPORT_ROW_GROUP_ROWS", "100000"))
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+ARROW_IPC_COMPRESSION = os.getenv("ARROW_IPC_COMPRESSION", "zstd") or None
+
+_DICT_STRING = pa.dictionary(pa.int32(), pa.string())
+
+SURVEY_RESPONSE_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("template_name", _DICT_STRING),
+    ("status", _DICT_STRING),
+    ("rider_name", pa.string()),
+    ("phone", pa.string()),
+    ("email", pa.string()),
+    ("launch_date", pa.timestamp("us")),
+    ("completion_date", pa.timestamp("us")),
+    ("channel", _DICT_STRING),
+    ("question_id", _DICT_STRING),
+    ("question_text", _DICT_STRING),
+    ("raw_answer", pa.string()),
+    ("answer", pa.string()),
+])
+
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to the generator."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _row_groups(batches: Iterable[Tuple[List[str], List[tuple]]], schema: pa.Schema,
+                rows_per_group: int) -> Iterator[pa.RecordBatch]:
+    pending: List[tuple] = []
+    positions = None
+    for result_columns, rows in batches:
+        if positions is None:
+            positions = [result_columns.index(name) for name in schema.names]
+        pending.extend(rows)
+        while len(pending) >= rows_per_group:
+            yield _to_record_batch(pending[:rows_per_group], positions, schema)
+            del pending[:rows_per_group]
+    if pending:
+        yield _to_record_batch(pending, positions, schema)
+
+
+def _to_record_batch(rows: List[tuple], positions: List[int], schema: pa.Schema) -> pa.RecordBatch:
+    arrays = []
+    for position, field in zip(positions, schema):
+        values = [row[position] for row in rows]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=field.type.value_type).dictionary_encode().cast(field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_parquet(batches: Iterable[Tuple[List[str], List[tuple]]], schema: pa.Schema,
+                 rows_per_group: int = EXPORT_ROW_GROUP_ROWS) -> Iterator[bytes]:
+    """Encode row batches as a Parquet file, yielding bytes after each row group."""
+    sink = _ChunkSink()
+    dictionary_columns = [f.name for f in schema if pa.types.is_dictionary(f.type)]
+    with pq.ParquetWriter(sink, schema, compression=PARQUET_COMPRESSION, use_dictionary=dictionary_columns) as writer:
+        for record_batch in _row_groups(batches, schema, rows_per_group):
+            writer.write_batch(record_batch, row_group_size=rows_per_group)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def iter_arrow_stream(batches: Iterable[Tuple[List[str], List[tuple]]], schema: pa.Schema,
+                      rows_per_group: int = EXPORT_ROW_GROUP_ROWS) -> Iterator[bytes]:
+    """Encode row batches as an Arrow IPC stream, one record batch per row group."""
+    sink = _ChunkSink()
+    options = pa.ipc.IpcWriteOptions(compression=ARROW_IPC_COMPRESSION)
+    with pa.ipc.new_stream(sink, schema, options=options) as writer:
+        for record_batch in _row_groups(batches, schema, rows_per_group):
+            writer.write_batch(record_batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    tail = sink.drain()
+    if tail:
+        yield tail
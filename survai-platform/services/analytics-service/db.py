@@ -5,7 +5,7 @@ Reads/Writes: call_transcripts, surveys, survey_response_items, survey_analytics
 
 import os
 import logging
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterator, List, Tuple, Union
 
 from sqlalchemy import create_engine, text
 
@@ -44,3 +44,16 @@ def sql_execute(query: str, params: Union[dict, List[dict], None] = None) -> Lis
             return [dict(zip(columns, row)) for row in rows]
         conn.commit()
         return []
+
+
+def stream_rows(query: str, params: dict = None, batch_size: int = 2000) -> Iterator[Tuple[List[str], List[tuple]]]:
+    """
+    Run a SELECT through a server-side cursor and yield (columns, rows) batches of up to
+    batch_size rows, so the full result is never held in memory.
+    """
+    engine = get_engine()
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(text(query), params or {})
+        columns = list(result.keys())
+        for partition in result.partitions():
+            yield columns, [tuple(row) for row in partition]
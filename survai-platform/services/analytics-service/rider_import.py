@@ -0,0 +1,177 @@
+"""
+Streaming rider CSV import.
+
+The upload is parsed row by row straight from its spooled file, validated
+and normalized, and written in batches of RIDER_IMPORT_BATCH_ROWS with
+COPY into a temporary staging table. One INSERT ... ON CONFLICT then merges
+the staging table into riders on the normalized phone (the last 10 digits,
+the key livekit-agent's rider lookups use), so re-importing a file updates
+riders instead of duplicating them. The import runs in a single transaction:
+it is applied completely or not at all.
+
+Within a file the last row for a phone wins. Rows without a phone are
+inserted as new riders (there is nothing to match them on).
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import re
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+from db import get_engine
+
+logger = logging.getLogger(__name__)
+
+RIDER_IMPORT_BATCH_ROWS = int(os.getenv("RIDER_IMPORT_BATCH_ROWS", "10000"))
+MAX_REJECTION_SAMPLES = 100
+
+# Same key as idx_riders_phone_key_unique (migration 014)
+PHONE_KEY_SQL = "RIGHT(regexp_replace(phone, '[^0-9]', '', 'g'), 10)"
+
+_NON_DIGITS = re.compile(r"\D")
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+STAGING_COLUMNS = ["line_no", "id", "name", "phone", "phone_key", "email", "biodata"]
+
+
+class RiderImportError(ValueError):
+    """The upload as a whole is unusable (not a CSV, missing columns, no rows)."""
+
+
+def normalize_rider(row: dict) -> Tuple[Optional[tuple], Optional[str]]:
+    """
+    Validate and normalize one CSV row. Returns (staging values without line_no, None)
+    or (None, rejection reason).
+    """
+    name = (row.get("name") or row.get("rider_name") or "").strip()
+    if not name:
+        return None, "missing name"
+
+    phone = phone_key = None
+    raw_phone = (row.get("phone") or "").strip()
+    if raw_phone:
+        digits = _NON_DIGITS.sub("", raw_phone)
+        if len(digits) < 10 or len(digits) > 15:
+            return None, f"invalid phone: {raw_phone}"
+        # US numbers (10 digits, or 11 with the country code) to E.164; longer ones keep their country code
+        phone = f"+1{digits}" if len(digits) == 10 else f"+{digits}"
+        phone_key = digits[-10:]
+
+    email = (row.get("email") or "").strip().lower() or None
+    if email and not _EMAIL.match(email):
+        return None, f"invalid email: {email}"
+
+    biodata = None
+    raw_biodata = (row.get("biodata") or "").strip()
+    if raw_biodata:
+        try:
+            parsed = json.loads(raw_biodata)
+        except ValueError:
+            return None, "biodata is not valid JSON"
+        if not isinstance(parsed, dict):
+            return None, "biodata must be a JSON object"
+        biodata = json.dumps(parsed)
+
+    return (str(uuid4()), name, phone, phone_key, email, biodata), None
+
+
+def _batches(reader: csv.DictReader, result: dict) -> Iterator[List[tuple]]:
+    batch: List[tuple] = []
+    for row in reader:
+        result["rows"] += 1
+        values, reason = normalize_rider(row)
+        if values is None:
+            result["rejected"] += 1
+            if len(result["rejections"]) < MAX_REJECTION_SAMPLES:
+                result["rejections"].append({"line": reader.line_num, "reason": reason})
+            continue
+        batch.append((reader.line_num,) + values)
+        if len(batch) >= RIDER_IMPORT_BATCH_ROWS:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy_batch(cursor, batch: List[tuple]) -> None:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(batch)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY rider_import ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def import_riders_csv(upload: BinaryIO) -> dict:
+    """
+    Import riders from a CSV file object (name or rider_name, phone, email, biodata).
+    Returns counts of inserted, updated, rejected and in-file duplicate rows.
+    """
+    text = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        fields = set(reader.fieldnames or [])
+        if not fields:
+            raise RiderImportError("CSV is empty or has no data rows")
+        if not fields & {"name", "rider_name"}:
+            raise RiderImportError("CSV needs a name (or rider_name) column")
+
+        result = {"rows": 0, "inserted": 0, "updated": 0, "rejected": 0, "duplicates_in_file": 0, "rejections": []}
+        conn = get_engine().raw_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """CREATE TEMP TABLE rider_import (
+                           line_no     INTEGER,
+                           id          TEXT,
+                           name        TEXT,
+                           phone       TEXT,
+                           phone_key   TEXT,
+                           email       TEXT,
+                           biodata     JSONB
+                       ) ON COMMIT DROP"""
+                )
+                staged = 0
+                for batch in _batches(reader, result):
+                    _copy_batch(cursor, batch)
+                    staged += len(batch)
+
+                if result["rows"] == 0:
+                    raise RiderImportError("CSV is empty or has no data rows")
+
+                if staged:
+                    cursor.execute(
+                        f"""WITH latest AS (
+                                SELECT DISTINCT ON (COALESCE(phone_key, id)) id, name, phone, email, biodata
+                                FROM rider_import
+                                ORDER BY COALESCE(phone_key, id), line_no DESC
+                            ),
+                            merged AS (
+                                INSERT INTO riders (id, name, phone, email, biodata)
+                                SELECT id, name, phone, email, COALESCE(biodata, '{{}}'::jsonb) FROM latest
+                                ON CONFLICT (({PHONE_KEY_SQL})) WHERE phone ~ '[0-9]'
+                                DO UPDATE SET
+                                    name = EXCLUDED.name,
+                                    phone = EXCLUDED.phone,
+                                    email = COALESCE(EXCLUDED.email, riders.email),
+                                    biodata = COALESCE(riders.biodata, '{{}}'::jsonb) || EXCLUDED.biodata
+                                RETURNING (xmax = 0) AS inserted
+                            )
+                            SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM merged"""
+                    )
+                    inserted, updated = cursor.fetchone()
+                    result["inserted"] = inserted
+                    result["updated"] = updated
+                    result["duplicates_in_file"] = staged - inserted - updated
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return result
+    finally:
+        # Leave the upload's file open for FastAPI to close
+        text.detach()
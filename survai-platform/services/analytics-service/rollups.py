@@ -0,0 +1,172 @@
+"""
+Precomputed rollups behind /analytics/summary.
+
+The summary reads small materialized views (migration 012) instead of
+scanning call_transcripts, surveys and survey_response_items per request.
+A background thread refreshes them with REFRESH MATERIALIZED VIEW
+CONCURRENTLY every ANALYTICS_ROLLUP_REFRESH_SECONDS, so readers never block,
+and records each refresh in analytics_rollup_state for staleness reporting.
+With several analytics-service replicas, a transaction-scoped advisory lock
+lets only one of them refresh a given view at a time.
+"""
+
+import logging
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+from db import get_engine, sql_execute
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_ROLLUP_REFRESH_SECONDS = float(os.getenv("ANALYTICS_ROLLUP_REFRESH_SECONDS", "60"))
+
+ROLLUPS = [
+    "analytics_summary_totals",
+    "analytics_channel_counts",
+    "analytics_dropout_points",
+    "analytics_response_types",
+]
+
+
+def _lock_key(name: str) -> int:
+    # Stable across processes (hash() is salted per interpreter)
+    return zlib.crc32(f"rollup:{name}".encode())
+
+
+def refresh_rollup(name: str) -> Optional[int]:
+    """
+    Refresh one rollup. Returns the refresh time in ms, or None when another
+    replica is already refreshing it.
+    """
+    if name not in ROLLUPS:
+        raise ValueError(f"Unknown rollup: {name}")
+    started = time.monotonic()
+    try:
+        with get_engine().begin() as conn:
+            locked = conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _lock_key(name)}).scalar()
+            if not locked:
+                return None
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {name}"))
+            duration_ms = int((time.monotonic() - started) * 1000)
+            conn.execute(
+                text(
+                    """INSERT INTO analytics_rollup_state (name, refreshed_at, duration_ms, error)
+                       VALUES (:name, NOW(), :duration_ms, NULL)
+                       ON CONFLICT (name) DO UPDATE SET
+                         refreshed_at = EXCLUDED.refreshed_at,
+                         duration_ms = EXCLUDED.duration_ms,
+                         error = NULL"""
+                ),
+                {"name": name, "duration_ms": duration_ms},
+            )
+        return duration_ms
+    except Exception as e:
+        # Keep the last good refreshed_at so staleness keeps growing while refreshes fail
+        sql_execute(
+            """INSERT INTO analytics_rollup_state (name, error) VALUES (:name, :error)
+               ON CONFLICT (name) DO UPDATE SET error = EXCLUDED.error""",
+            {"name": name, "error": str(e)[:1000]},
+        )
+        raise
+
+
+def refresh_all() -> Dict[str, Optional[int]]:
+    results = {}
+    for name in ROLLUPS:
+        try:
+            results[name] = refresh_rollup(name)
+        except Exception as e:
+            logger.error(f"Rollup refresh error ({name}): {e}")
+            results[name] = None
+    return results
+
+
+def rollup_state() -> Dict[str, dict]:
+    """Last refresh per rollup, with its age in seconds (None if never refreshed)."""
+    rows = sql_execute("SELECT name, refreshed_at, duration_ms, error FROM analytics_rollup_state", {})
+    now = datetime.now(timezone.utc)
+    state = {}
+    for name in ROLLUPS:
+        row = next((r for r in rows if r["name"] == name), {})
+        refreshed_at = row.get("refreshed_at")
+        state[name] = {
+            "refreshed_at": refreshed_at.isoformat() if refreshed_at else None,
+            "stale_seconds": round((now - refreshed_at).total_seconds(), 1) if refreshed_at else None,
+            "duration_ms": row.get("duration_ms"),
+            "error": row.get("error"),
+        }
+    return state
+
+
+def read_summary() -> dict:
+    """The /analytics/summary payload, from the rollups."""
+    totals = sql_execute("SELECT total_surveys, completed, avg_duration FROM analytics_summary_totals", {})
+    row = totals[0] if totals else {}
+    total = row.get("total_surveys") or 0
+    completed = row.get("completed") or 0
+    avg_duration = float(row.get("avg_duration") or 0)
+
+    channel_rows = sql_execute("SELECT channel, cnt FROM analytics_channel_counts", {})
+    dropout_rows = sql_execute(
+        """SELECT ord, question_text, dropout_count FROM analytics_dropout_points
+           ORDER BY dropout_count DESC LIMIT 5""",
+        {},
+    )
+    response_type_rows = sql_execute("SELECT criteria, cnt FROM analytics_response_types", {})
+
+    return {
+        "total_surveys": total,
+        "completed": completed,
+        "completion_rate": round(completed / total * 100, 2) if total > 0 else 0,
+        "avg_duration_seconds": round(avg_duration, 2),
+        "channel_counts": {r["channel"]: r["cnt"] for r in channel_rows},
+        "dropout_points": [
+            {"question_order": r["ord"], "question": r["question_text"], "count": r["dropout_count"]}
+            for r in dropout_rows
+        ],
+        "response_types": {r["criteria"]: r["cnt"] for r in response_type_rows},
+    }
+
+
+class RollupRefresher:
+    def __init__(self, interval: float = ANALYTICS_ROLLUP_REFRESH_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._loop, name="rollup-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            refresh_all()
+
+
+_refresher: Optional[RollupRefresher] = None
+
+
+def get_refresher() -> RollupRefresher:
+    global _refresher
+    if _refresher is None:
+        _refresher = RollupRefresher()
+    return _refresher
+
+
+def stale_rollups(state: Dict[str, dict], max_age_seconds: float) -> List[str]:
+    return [
+        name for name, s in state.items()
+        if s["stale_seconds"] is None or s["stale_seconds"] > max_age_seconds
+    ]
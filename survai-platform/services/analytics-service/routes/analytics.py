@@ -2,15 +2,21 @@
 Analytics routes: summary metrics, campaign metrics, AI analysis.
 """
 
+import asyncio
 import json
 import logging
 import os
+from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Optional
 
 import httpx
 from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
 
+from campaign_cache import get_campaign_cache
 from db import sql_execute
+from rollups import read_summary, refresh_all, refresh_rollup, rollup_state, stale_rollups
+from timeseries import TimeseriesError, parse_group_by, query_timeseries
 
 BRAIN_SERVICE_URL = os.getenv("BRAIN_SERVICE_URL", "http://brain-service:8016")
 
@@ -19,86 +25,123 @@ router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
 @router.get("/summary")
-async def get_analytics_summary():
+async def get_analytics_summary(max_age_seconds: Optional[float] = None):
     """
     MVP metrics: total_surveys, completed, completion_rate, avg_duration from call_transcripts,
-    channel_counts from surveys.
+    channel_counts from surveys, dropout points and response types.
+    Read from precomputed rollups; stale_seconds is the age of the oldest one. Pass max_age_seconds
+    to refresh any rollup older than that before reading.
     """
     try:
-        # From call_transcripts: total, completed, avg_duration
-        transcript_stats = sql_execute(
-            """SELECT
-                COUNT(*) AS total_surveys,
-                SUM(CASE WHEN call_status = 'completed' THEN 1 ELSE 0 END) AS completed,
-                AVG(call_duration_seconds) FILTER (WHERE call_duration_seconds > 0) AS avg_duration
-            FROM call_transcripts""",
-            {},
-        )
-        row = transcript_stats[0] if transcript_stats else {}
-        total = row.get("total_surveys") or 0
-        completed = row.get("completed") or 0
-        avg_duration = float(row.get("avg_duration") or 0)
-        completion_rate = (completed / total * 100) if total > 0 else 0
-
-        # Channel counts from surveys
-        channel_rows = sql_execute(
-            """SELECT channel, COUNT(*) AS cnt FROM surveys GROUP BY channel""",
-            {},
-        )
-        channel_counts = {r.get("channel") or "phone": r.get("cnt", 0) for r in channel_rows}
+        # Off the event loop: a refresh can take seconds and would stall every other request
+        state = await asyncio.to_thread(rollup_state)
+        if max_age_seconds is not None:
+            stale = stale_rollups(state, max_age_seconds)
+            for name in stale:
+                await asyncio.to_thread(refresh_rollup, name)
+            if stale:
+                state = await asyncio.to_thread(rollup_state)
+
+        summary = await asyncio.to_thread(read_summary)
+        ages = [s["stale_seconds"] for s in state.values()]
+        summary["stale_seconds"] = None if None in ages else max(ages)
+        summary["rollups"] = state
+        return summary
+    except Exception as e:
+        logger.error(f"Analytics summary error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Dropout tracking: find last answered question for incomplete surveys
-        dropout_rows = sql_execute(
-            """SELECT sri.ord, q.text AS question_text, COUNT(*) AS dropout_count
-               FROM surveys s
-               JOIN survey_response_items sri ON sri.survey_id = s.id
-               JOIN questions q ON q.id = sri.question_id
-               WHERE s.status = 'In-Progress'
-                 AND sri.raw_answer IS NOT NULL AND sri.raw_answer != ''
-                 AND sri.ord = (
-                     SELECT MAX(sri2.ord)
-                     FROM survey_response_items sri2
-                     WHERE sri2.survey_id = s.id
-                       AND sri2.raw_answer IS NOT NULL AND sri2.raw_answer != ''
-                 )
-               GROUP BY sri.ord, q.text
-               ORDER BY dropout_count DESC
-               LIMIT 5""",
-            {},
-        )
-        dropout_points = [
-            {"question_order": r.get("ord"), "question": r.get("question_text", ""), "count": r.get("dropout_count", 0)}
-            for r in dropout_rows
-        ]
-
-        # Response type breakdown
-        response_type_rows = sql_execute(
-            """SELECT q.criteria, COUNT(*) AS cnt
-               FROM survey_response_items sri
-               JOIN questions q ON q.id = sri.question_id
-               WHERE sri.raw_answer IS NOT NULL AND sri.raw_answer != ''
-               GROUP BY q.criteria""",
-            {},
-        )
-        response_types = {r.get("criteria", "unknown"): r.get("cnt", 0) for r in response_type_rows}
 
+@router.post("/summary/refresh")
+async def refresh_analytics_summary():
+    """Refresh the summary rollups now (null duration: another replica was already refreshing it)."""
+    try:
+        refreshed = await asyncio.to_thread(refresh_all)
+        return {"refreshed": refreshed, "rollups": await asyncio.to_thread(rollup_state)}
+    except Exception as e:
+        logger.error(f"Analytics summary refresh error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _campaign_metrics(campaign_id: str) -> dict:
+    """
+    One grouped pass over the campaign's surveys (each with its latest call) for the totals,
+    per channel, per launch day and per completion day.
+    """
+    rows = sql_execute(
+        """WITH cs AS (
+               SELECT s.status,
+                      COALESCE(s.channel, 'phone') AS channel,
+                      DATE(s.launch_date) AS launch_day,
+                      DATE(s.completion_date) AS completion_day,
+                      NULLIF(ct.call_duration_seconds, 0) AS duration
+               FROM surveys s
+               LEFT JOIN LATERAL (
+                   SELECT call_duration_seconds FROM call_transcripts
+                   WHERE survey_id = s.id
+                   ORDER BY call_started_at DESC NULLS LAST
+                   LIMIT 1
+               ) ct ON TRUE
+               WHERE s.campaign_id = :campaign_id
+           )
+           SELECT GROUPING(channel) AS g_channel,
+                  GROUPING(launch_day) AS g_launch_day,
+                  GROUPING(completion_day) AS g_completion_day,
+                  channel, launch_day, completion_day,
+                  COUNT(*) AS total,
+                  COUNT(*) FILTER (WHERE status = 'Completed') AS completed,
+                  AVG(duration) AS avg_duration,
+                  percentile_cont(0.5) WITHIN GROUP (ORDER BY duration) AS p50_duration,
+                  percentile_cont(0.9) WITHIN GROUP (ORDER BY duration) AS p90_duration,
+                  percentile_cont(0.95) WITHIN GROUP (ORDER BY duration) AS p95_duration
+           FROM cs
+           GROUP BY GROUPING SETS ((), (channel), (launch_day), (completion_day))""",
+        {"campaign_id": campaign_id},
+    )
+
+    def _stats(r: dict) -> dict:
+        total = r.get("total") or 0
+        completed = r.get("completed") or 0
         return {
             "total_surveys": total,
             "completed": completed,
-            "completion_rate": round(completion_rate, 2),
-            "avg_duration_seconds": round(avg_duration, 2),
-            "channel_counts": channel_counts,
-            "dropout_points": dropout_points,
-            "response_types": response_types,
+            "completion_rate": round(completed / total * 100, 2) if total > 0 else 0,
+            "avg_duration_seconds": round(float(r.get("avg_duration") or 0), 2),
+            "duration_percentiles": {
+                p: round(float(r[f"{p}_duration"]), 2) if r.get(f"{p}_duration") is not None else None
+                for p in ("p50", "p90", "p95")
+            },
         }
-    except Exception as e:
-        logger.error(f"Analytics summary error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+
+    overall = next((r for r in rows if r["g_channel"] and r["g_launch_day"] and r["g_completion_day"]), {})
+    by_channel = [r for r in rows if not r["g_channel"]]
+    launched = [r for r in rows if not r["g_launch_day"]]
+    completions = [r for r in rows if not r["g_completion_day"] and r["completion_day"] is not None]
+
+    return {
+        **_stats(overall),
+        "channel_counts": {r["channel"]: r["total"] for r in by_channel},
+        "channels": {r["channel"]: _stats(r) for r in by_channel},
+        "daily": {
+            "launched": [
+                {"date": r["launch_day"].isoformat(), **_stats(r)}
+                for r in sorted(launched, key=lambda r: r["launch_day"]) if r["launch_day"] is not None
+            ],
+            "completed": [
+                {"date": r["completion_day"].isoformat(), "completed": r["completed"],
+                 "avg_duration_seconds": _stats(r)["avg_duration_seconds"]}
+                for r in sorted(completions, key=lambda r: r["completion_day"])
+            ],
+        },
+    }
 
 
 @router.get("/campaign/{campaign_id}")
 async def get_campaign_analytics(campaign_id: str):
-    """Campaign-specific metrics."""
+    """
+    Campaign-specific metrics: totals, duration percentiles, per-channel and per-day breakdowns.
+    Cached per campaign; a survey change in the campaign evicts it (see campaign_cache).
+    """
     try:
         campaign = sql_execute(
             "SELECT * FROM campaigns WHERE id = :id",
@@ -107,31 +150,8 @@ async def get_campaign_analytics(campaign_id: str):
         if not campaign:
             raise HTTPException(status_code=404, detail=f"Campaign {campaign_id} not found")
 
-        surveys = sql_execute(
-            """SELECT s.id, s.status, s.completion_date, ct.call_duration_seconds, s.channel
-               FROM surveys s
-               LEFT JOIN call_transcripts ct ON ct.survey_id = s.id
-               WHERE s.campaign_id = :campaign_id""",
-            {"campaign_id": campaign_id},
-        )
-        total = len(surveys)
-        completed = sum(1 for s in surveys if s.get("status") == "Completed")
-        durations = [s.get("call_duration_seconds") for s in surveys if s.get("call_duration_seconds")]
-        avg_duration = sum(durations) / len(durations) if durations else 0
-        channel_counts = {}
-        for s in surveys:
-            ch = s.get("channel") or "phone"
-            channel_counts[ch] = channel_counts.get(ch, 0) + 1
-
-        return {
-            "campaign_id": campaign_id,
-            "campaign": campaign[0],
-            "total_surveys": total,
-            "completed": completed,
-            "completion_rate": round(completed / total * 100, 2) if total > 0 else 0,
-            "avg_duration_seconds": round(avg_duration, 2),
-            "channel_counts": channel_counts,
-        }
+        metrics = get_campaign_cache().get_or_compute(campaign_id, lambda: _campaign_metrics(campaign_id))
+        return {"campaign_id": campaign_id, "campaign": campaign[0], **metrics}
     except HTTPException:
         raise
     except Exception as e:
@@ -139,6 +159,55 @@ async def get_campaign_analytics(campaign_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/campaign-cache/stats")
+async def get_campaign_cache_stats():
+    """Campaign analytics cache hit/miss/invalidation counters."""
+    return get_campaign_cache().stats()
+
+
+@router.get("/timeseries")
+async def get_analytics_timeseries(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: str = "day",
+    tenant_id: Optional[str] = None,
+    template_name: Optional[str] = None,
+    campaign_id: Optional[str] = None,
+    channel: Optional[str] = None,
+    group_by: Optional[str] = None,
+):
+    """
+    Survey, call and response counts over time from the hourly/daily counters: launches,
+    completions and completion rate, calls, answer rate, average and p50/p90/p95 call duration
+    (approximate) and responses per bucket. granularity is hour, day, week, month, quarter or year;
+    the range defaults to the last 30 days, in UTC (naive times are taken as UTC).
+    group_by is a comma-separated subset of tenant_id, template_name, campaign_id, channel.
+    """
+    end = _to_utc(end) if end else datetime.now(timezone.utc).replace(tzinfo=None)
+    start = _to_utc(start) if start else end - timedelta(days=30)
+    filters = {"tenant_id": tenant_id, "template_name": template_name, "campaign_id": campaign_id, "channel": channel}
+    try:
+        series = query_timeseries(start, end, granularity, filters, parse_group_by(group_by))
+    except TimeseriesError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Analytics timeseries error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "filters": {k: v for k, v in filters.items() if v is not None},
+        "series": series,
+    }
+
+
+def _to_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
 @router.post("/analyze/{survey_id}")
 async def analyze_survey(survey_id: str):
     """
@@ -215,6 +284,149 @@ async def analyze_survey(survey_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ─── Call Latency Telemetry ──────────────────────────────────────────────────
+
+LATENCY_METRICS = [
+    "eou_delay", "stt_transcription_delay", "llm_ttft", "tts_ttfb", "tool_duration", "greeting_first_audio",
+]
+
+LATENCY_GROUP_BY = {
+    "llm_model": "config->>'llm_model'",
+    "tts_model": "config->>'tts_model'",
+    "stt_model": "config->>'stt_model'",
+    "vad_min_silence_duration": "config->>'vad_min_silence_duration'",
+    "preemptive_generation": "config->>'preemptive_generation'",
+    "greeting_cached": "config->>'greeting_cached'",
+}
+
+
+class CallMetricsP(BaseModel):
+    call_id: str
+    survey_id: Optional[str] = None
+    turns: int = 0
+    tool_calls: int = 0
+    completed: Optional[bool] = None
+    questions_answered: int = 0
+    questions_skipped: int = 0
+    latency: Dict[str, Dict[str, float]] = {}
+    usage: Dict[str, float] = {}
+    config: Dict[str, Any] = {}
+
+
+@router.post("/call-metrics")
+async def record_call_metrics(metrics: CallMetricsP):
+    """Store the per-call latency summary posted by the LiveKit agent at call end."""
+    try:
+        sql_execute(
+            """INSERT INTO call_latency_metrics
+               (call_id, survey_id, turns, tool_calls, completed, questions_answered, questions_skipped,
+                latency, usage, config)
+               VALUES (:call_id, :survey_id, :turns, :tool_calls, :completed, :questions_answered, :questions_skipped,
+                       CAST(:latency AS jsonb), CAST(:usage AS jsonb), CAST(:config AS jsonb))
+               ON CONFLICT (call_id) DO UPDATE SET
+                 survey_id = EXCLUDED.survey_id,
+                 turns = EXCLUDED.turns,
+                 tool_calls = EXCLUDED.tool_calls,
+                 completed = EXCLUDED.completed,
+                 questions_answered = EXCLUDED.questions_answered,
+                 questions_skipped = EXCLUDED.questions_skipped,
+                 latency = EXCLUDED.latency,
+                 usage = EXCLUDED.usage,
+                 config = EXCLUDED.config,
+                 recorded_at = NOW()""",
+            {
+                "call_id": metrics.call_id,
+                "survey_id": metrics.survey_id,
+                "turns": metrics.turns,
+                "tool_calls": metrics.tool_calls,
+                "completed": metrics.completed,
+                "questions_answered": metrics.questions_answered,
+                "questions_skipped": metrics.questions_skipped,
+                "latency": json.dumps(metrics.latency),
+                "usage": json.dumps(metrics.usage),
+                "config": json.dumps(metrics.config),
+            },
+        )
+        return {"status": "recorded", "call_id": metrics.call_id}
+    except Exception as e:
+        logger.error(f"Record call metrics error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/latency")
+async def get_latency_summary(days: int = 7, group_by: Optional[str] = None, completed_only: bool = False):
+    """
+    Latency across calls in the last `days` days, in seconds.
+    p50 is the median of per-call p50s; p95 is the 95th percentile of per-call p95s.
+    Optionally grouped by a session setting (model, VAD silence, preemptive generation).
+    completed_only restricts to completed surveys, so turns/tool calls/tokens read as cost per completed survey.
+    """
+    if group_by and group_by not in LATENCY_GROUP_BY:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by must be one of: {', '.join(LATENCY_GROUP_BY)}",
+        )
+    try:
+        group_expr = LATENCY_GROUP_BY[group_by] if group_by else "'all'"
+        metric_cols = ",\n".join(
+            f"""percentile_cont(0.5) WITHIN GROUP (ORDER BY (latency->'{m}'->>'p50')::float) AS {m}_p50,
+                percentile_cont(0.95) WITHIN GROUP (ORDER BY (latency->'{m}'->>'p95')::float) AS {m}_p95"""
+            for m in LATENCY_METRICS
+        )
+        rows = sql_execute(
+            f"""SELECT {group_expr} AS grp,
+                       COUNT(*) AS calls,
+                       COUNT(*) FILTER (WHERE completed) AS completed_calls,
+                       AVG(turns) AS avg_turns,
+                       AVG(tool_calls) AS avg_tool_calls,
+                       AVG((usage->>'llm_prompt_tokens')::float) AS avg_prompt_tokens,
+                       AVG((usage->>'llm_completion_tokens')::float) AS avg_completion_tokens,
+                       AVG(questions_skipped) AS avg_questions_skipped,
+                       {metric_cols}
+                FROM call_latency_metrics
+                WHERE recorded_at >= NOW() - make_interval(days => :days)
+                  AND (completed IS TRUE OR NOT :completed_only)
+                GROUP BY 1
+                ORDER BY calls DESC""",
+            {"days": days, "completed_only": completed_only},
+        )
+        groups = []
+        for r in rows:
+            groups.append({
+                "group": r.get("grp"),
+                "calls": r.get("calls", 0),
+                "completed_calls": r.get("completed_calls", 0),
+                "avg_turns": round(float(r.get("avg_turns") or 0), 2),
+                "avg_tool_calls": round(float(r.get("avg_tool_calls") or 0), 2),
+                "avg_prompt_tokens": round(float(r.get("avg_prompt_tokens") or 0), 1),
+                "avg_completion_tokens": round(float(r.get("avg_completion_tokens") or 0), 1),
+                "avg_questions_skipped": round(float(r.get("avg_questions_skipped") or 0), 2),
+                "latency": {
+                    m: {
+                        "p50": round(float(r[f"{m}_p50"]), 4) if r.get(f"{m}_p50") is not None else None,
+                        "p95": round(float(r[f"{m}_p95"]), 4) if r.get(f"{m}_p95") is not None else None,
+                    }
+                    for m in LATENCY_METRICS
+                },
+            })
+        return {"period_days": days, "group_by": group_by, "completed_only": completed_only, "groups": groups}
+    except Exception as e:
+        logger.error(f"Latency summary error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/latency/{call_id}")
+async def get_call_latency(call_id: str):
+    """Latency summary recorded for a single call."""
+    rows = sql_execute(
+        "SELECT * FROM call_latency_metrics WHERE call_id = :call_id",
+        {"call_id": call_id},
+    )
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"No latency metrics for call {call_id}")
+    return rows[0]
+
+
 # ─── Demand Fulfillment Tracking ─────────────────────────────────────────────
 
 @router.get("/demand-fulfillment/{tenant_id}")
@@ -1,93 +1,158 @@
 """
-Export routes: CSV export for surveys, transcripts, campaigns.
+Export routes: CSV export for surveys, transcripts, campaigns, streamed through server-side cursors.
+Survey and campaign responses can also be exported as Parquet or an Arrow IPC stream.
 """
 
+import asyncio
 import csv
 import io
+import itertools
 import logging
-from typing import Optional
+import os
+import zlib
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
 
-from db import sql_execute
+from columnar import FORMATS, SURVEY_RESPONSE_SCHEMA, iter_arrow_stream, iter_parquet
+from db import sql_execute, stream_rows
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/export", tags=["export"])
 
 
-def _stream_csv(rows: list, columns: list, filename: str):
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "2000"))
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_FORMATS = "^(csv|parquet|arrow)$"
+
+
+def iter_csv(batches: Iterable[Tuple[List[str], List[tuple]]], columns: list, gzip: bool = False) -> Iterator[bytes]:
+    """
+    Encode (result columns, rows) batches as CSV, yielding ~EXPORT_CHUNK_BYTES chunks
+    (gzip-compressed when asked). Memory stays at one batch plus one chunk.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
     output = io.StringIO()
     writer = csv.writer(output)
     writer.writerow(columns)
-    for row in rows:
-        writer.writerow([row.get(c, "") for c in columns])
-    output.seek(0)
+    positions = None
+
+    def _take() -> bytes:
+        data = output.getvalue().encode("utf-8")
+        output.seek(0)
+        output.truncate()
+        return compressor.compress(data) if compressor else data
+
+    for result_columns, rows in batches:
+        if positions is None:
+            positions = [result_columns.index(c) for c in columns]
+        for row in rows:
+            writer.writerow([row[i] for i in positions])
+        if output.tell() >= EXPORT_CHUNK_BYTES:
+            chunk = _take()
+            if chunk:
+                yield chunk
+    tail = _take()
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
+
+
+async def _stream_csv(request: Request, query: str, params: dict, columns: list, filename: str, gzip: Optional[bool] = None):
+    """
+    Stream a query as a CSV download through a server-side cursor. gzip=None follows the
+    client's Accept-Encoding. The query is started (and its errors raised) before the
+    response begins, in a worker thread: a sorted export can take a while to return its
+    first row. A failure after that truncates the download.
+    """
+    if gzip is None:
+        gzip = "gzip" in request.headers.get("accept-encoding", "")
+    batches = stream_rows(query, params, batch_size=EXPORT_BATCH_ROWS)
+    first = await asyncio.to_thread(next, batches, None)
+    chunks = iter_csv(itertools.chain([first] if first else [], batches), columns, gzip=gzip)
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type="text/csv", headers=headers)
+
+
+async def _stream_columnar(query: str, params: dict, schema, filename_base: str, format: str):
+    """Stream a query as a Parquet file or Arrow IPC stream, written one row group at a time."""
+    media_type, extension = FORMATS[format]
+    encode = iter_parquet if format == "parquet" else iter_arrow_stream
+    batches = stream_rows(query, params, batch_size=EXPORT_BATCH_ROWS)
+    first = await asyncio.to_thread(next, batches, None)
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
+        encode(itertools.chain([first] if first else [], batches), schema),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename_base}.{extension}"},
     )
 
 
 @router.get("/surveys")
-async def export_surveys():
-    """Export survey responses as CSV."""
+async def export_surveys(request: Request, gzip: Optional[bool] = None, format: str = Query("csv", pattern=EXPORT_FORMATS)):
+    """Export survey responses as CSV, Parquet or an Arrow IPC stream."""
     try:
-        rows = sql_execute(
-            """SELECT s.id, s.template_name, s.status, s.rider_name, s.phone, s.email,
+        columns = ["id", "template_name", "status", "rider_name", "phone", "email", "launch_date", "completion_date", "channel", "question_id", "question_text", "raw_answer", "answer"]
+        query = """SELECT s.id, s.template_name, s.status, s.rider_name, s.phone, s.email,
                       s.launch_date, s.completion_date, s.channel,
                       sri.question_id, q.text AS question_text, sri.raw_answer, sri.answer
                FROM surveys s
                LEFT JOIN survey_response_items sri ON sri.survey_id = s.id
                LEFT JOIN questions q ON q.id = sri.question_id
-               ORDER BY s.id, sri.ord""",
-            {},
-        )
-        columns = ["id", "template_name", "status", "rider_name", "phone", "email", "launch_date", "completion_date", "channel", "question_id", "question_text", "raw_answer", "answer"]
-        return _stream_csv(rows, columns, "survey_responses.csv")
+               ORDER BY s.id, sri.ord"""
+        if format != "csv":
+            return await _stream_columnar(query, {}, SURVEY_RESPONSE_SCHEMA, "survey_responses", format)
+        return await _stream_csv(request, query, {}, columns, "survey_responses.csv", gzip)
     except Exception as e:
         logger.error(f"Export surveys error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/transcripts")
-async def export_transcripts():
+async def export_transcripts(request: Request, gzip: Optional[bool] = None):
     """Export call transcripts as CSV."""
     try:
-        rows = sql_execute(
+        columns = ["id", "survey_id", "full_transcript", "call_duration_seconds", "call_started_at", "call_ended_at", "call_status", "call_attempts", "channel"]
+        return await _stream_csv(
+            request,
             """SELECT id, survey_id, full_transcript, call_duration_seconds,
                       call_started_at, call_ended_at, call_status, call_attempts, channel
                FROM call_transcripts
                ORDER BY call_started_at DESC""",
             {},
+            columns,
+            "call_transcripts.csv",
+            gzip,
         )
-        columns = ["id", "survey_id", "full_transcript", "call_duration_seconds", "call_started_at", "call_ended_at", "call_status", "call_attempts", "channel"]
-        return _stream_csv(rows, columns, "call_transcripts.csv")
     except Exception as e:
         logger.error(f"Export transcripts error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/campaign/{campaign_id}")
-async def export_campaign(campaign_id: str):
-    """Export campaign data as CSV."""
+async def export_campaign(
+    campaign_id: str, request: Request, gzip: Optional[bool] = None, format: str = Query("csv", pattern=EXPORT_FORMATS)
+):
+    """Export campaign data as CSV, Parquet or an Arrow IPC stream."""
     try:
-        rows = sql_execute(
-            """SELECT s.id, s.template_name, s.status, s.rider_name, s.phone, s.email,
+        if not sql_execute("SELECT 1 FROM surveys WHERE campaign_id = :campaign_id LIMIT 1", {"campaign_id": campaign_id}):
+            raise HTTPException(status_code=404, detail=f"No data for campaign {campaign_id}")
+        columns = ["id", "template_name", "status", "rider_name", "phone", "email", "launch_date", "completion_date", "channel", "question_id", "question_text", "raw_answer", "answer"]
+        query = """SELECT s.id, s.template_name, s.status, s.rider_name, s.phone, s.email,
                       s.launch_date, s.completion_date, s.channel,
                       sri.question_id, q.text AS question_text, sri.raw_answer, sri.answer
                FROM surveys s
                LEFT JOIN survey_response_items sri ON sri.survey_id = s.id
                LEFT JOIN questions q ON q.id = sri.question_id
                WHERE s.campaign_id = :campaign_id
-               ORDER BY s.id, sri.ord""",
-            {"campaign_id": campaign_id},
-        )
-        if not rows:
-            raise HTTPException(status_code=404, detail=f"No data for campaign {campaign_id}")
-        columns = ["id", "template_name", "status", "rider_name", "phone", "email", "launch_date", "completion_date", "channel", "question_id", "question_text", "raw_answer", "answer"]
-        return _stream_csv(rows, columns, f"campaign_{campaign_id}.csv")
+               ORDER BY s.id, sri.ord"""
+        params = {"campaign_id": campaign_id}
+        if format != "csv":
+            return await _stream_columnar(query, params, SURVEY_RESPONSE_SCHEMA, f"campaign_{campaign_id}", format)
+        return await _stream_csv(request, query, params, columns, f"campaign_{campaign_id}.csv", gzip)
     except HTTPException:
         raise
     except Exception as e:
@@ -96,23 +161,26 @@ async def export_campaign(campaign_id: str):
 
 
 @router.get("/survey/{survey_id}/responses")
-async def export_survey_responses(survey_id: str):
+async def export_survey_responses(survey_id: str, request: Request, gzip: Optional[bool] = None):
     """Export single survey responses as CSV."""
     try:
         survey = sql_execute("SELECT * FROM surveys WHERE id = :id", {"id": survey_id})
         if not survey:
             raise HTTPException(status_code=404, detail=f"Survey {survey_id} not found")
 
-        rows = sql_execute(
+        columns = ["question_id", "question_text", "raw_answer", "answer", "ord"]
+        return await _stream_csv(
+            request,
             """SELECT sri.question_id, q.text AS question_text, sri.raw_answer, sri.answer, sri.ord
                FROM survey_response_items sri
                JOIN questions q ON q.id = sri.question_id
                WHERE sri.survey_id = :survey_id
                ORDER BY sri.ord""",
             {"survey_id": survey_id},
+            columns,
+            f"survey_{survey_id}_responses.csv",
+            gzip,
         )
-        columns = ["question_id", "question_text", "raw_answer", "answer", "ord"]
-        return _stream_csv(rows, columns, f"survey_{survey_id}_responses.csv")
     except HTTPException:
         raise
     except Exception as e:
@@ -2,123 +2,81 @@
 Import routes: CSV upload for riders, bulk survey generation.
 """
 
-import csv
-import io
+import asyncio
 import logging
 import os
-from typing import List
-from uuid import uuid4
+import shutil
+import tempfile
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, BackgroundTasks, File, HTTPException, UploadFile
 
-from db import sql_execute
+from bulk_survey_import import create_job, get_job, has_data_rows, read_header, run_bulk_survey_import
+from rider_import import RiderImportError, import_riders_csv
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/import", tags=["import"])
 
 
-def _parse_csv(content: bytes) -> List[dict]:
-    text = content.decode("utf-8-sig")
-    reader = csv.DictReader(io.StringIO(text))
-    return list(reader)
+def _spool_upload(file: UploadFile) -> str:
+    """Copy an upload to a temporary file that outlives the request (for background jobs)."""
+    with tempfile.NamedTemporaryFile(prefix="import-", suffix=".csv", delete=False) as tmp:
+        shutil.copyfileobj(file.file, tmp, 1024 * 1024)
+        return tmp.name
 
 
 @router.post("/riders")
 async def import_riders(file: UploadFile = File(...)):
     """
-    CSV upload for riders. Parse CSV and insert into riders table.
+    CSV upload for riders, streamed from the spooled upload and merged into riders on the
+    normalized phone (existing riders are updated, not duplicated).
     Expected columns: name, phone, email (optional: biodata as JSON string).
+    Returns inserted/updated/rejected counts and the first rejected lines with reasons.
     """
     try:
-        content = await file.read()
-        rows = _parse_csv(content)
-        if not rows:
-            raise HTTPException(status_code=400, detail="CSV is empty or has no data rows")
-
-        inserted = 0
-        for row in rows:
-            name = (row.get("name") or row.get("rider_name") or "").strip()
-            if not name:
-                continue
-            phone = (row.get("phone") or "").strip()
-            email = (row.get("email") or "").strip()
-            rider_id = str(uuid4())
-            sql_execute(
-                """INSERT INTO riders (id, name, phone, email)
-                   VALUES (:id, :name, :phone, :email)""",
-                {"id": rider_id, "name": name, "phone": phone or None, "email": email or None},
-            )
-            inserted += 1
-
-        return {"status": "imported", "count": inserted}
-    except HTTPException:
-        raise
+        result = await asyncio.to_thread(import_riders_csv, file.file)
+        return {"status": "imported", "count": result["inserted"] + result["updated"], **result}
+    except RiderImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Import riders error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/bulk-surveys")
-async def import_bulk_surveys(file: UploadFile = File(...)):
+@router.post("/bulk-surveys", status_code=202)
+async def import_bulk_surveys(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """
-    Generate surveys in bulk from CSV.
+    Generate surveys in bulk from CSV, as a background import job.
     Columns: rider_name, phone, email, template_name
+    Returns the job id; GET /import/jobs/{job_id} reports progress and the result.
     """
     try:
-        content = await file.read()
-        rows = _parse_csv(content)
-        if not rows:
+        path = await asyncio.to_thread(_spool_upload, file)
+        header = await asyncio.to_thread(read_header, path)
+        if not header or not await asyncio.to_thread(has_data_rows, path):
+            os.unlink(path)
             raise HTTPException(status_code=400, detail="CSV is empty or has no data rows")
-
-        template_names = sql_execute("SELECT name FROM templates WHERE status = 'Published'", {})
-        valid_templates = {t["name"] for t in template_names}
-
-        created = []
-        for row in rows:
-            rider_name = (row.get("rider_name") or row.get("name") or "").strip()
-            phone = (row.get("phone") or "").strip()
-            email = (row.get("email") or "").strip()
-            template_name = (row.get("template_name") or "").strip()
-            if not template_name or template_name not in valid_templates:
-                continue
-            if not rider_name and not phone:
-                continue
-
-            survey_id = str(uuid4())
-            from datetime import datetime, timezone
-            launch_date = datetime.now(timezone.utc).isoformat()[:19].replace("T", " ")
-
-            sql_execute(
-                """INSERT INTO surveys (id, template_name, status, name, rider_name, phone, email, launch_date)
-                   VALUES (:id, :template_name, 'In-Progress', :name, :rider_name, :phone, :email, :launch_date)""",
-                {
-                    "id": survey_id,
-                    "template_name": template_name,
-                    "name": template_name,
-                    "rider_name": rider_name or None,
-                    "phone": phone or None,
-                    "email": email or None,
-                    "launch_date": launch_date,
-                },
-            )
-
-            # Create survey_response_items from template_questions
-            tq = sql_execute(
-                "SELECT question_id, ord FROM template_questions WHERE template_name = :tn ORDER BY ord",
-                {"tn": template_name},
-            )
-            for t in tq:
-                sql_execute(
-                    """INSERT INTO survey_response_items (survey_id, question_id, ord)
-                       VALUES (:survey_id, :question_id, :ord)""",
-                    {"survey_id": survey_id, "question_id": t["question_id"], "ord": t["ord"]},
-                )
-
-            created.append({"survey_id": survey_id, "rider_name": rider_name, "phone": phone, "template_name": template_name})
-
-        return {"status": "created", "count": len(created), "surveys": created}
+        if "template_name" not in header:
+            os.unlink(path)
+            raise HTTPException(status_code=400, detail="CSV needs a template_name column")
+
+        job_id = create_job("bulk_surveys", file.filename)
+        background_tasks.add_task(run_bulk_survey_import, job_id, path)
+        return {
+            "status": "queued",
+            "job_id": job_id,
+            "message": f"Bulk survey import {job_id} started",
+        }
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Bulk surveys import error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{job_id}")
+async def get_import_job(job_id: str):
+    """Progress of an import job: status, total/processed rows, created/skipped counts, result when done."""
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Import job {job_id} not found")
+    return job
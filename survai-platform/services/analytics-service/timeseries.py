@@ -0,0 +1,141 @@
+"""
+Time series for /analytics/timeseries from the bucket tables of migration 016.
+
+analytics_hourly and analytics_daily hold counters per tenant, template,
+campaign and channel, updated by triggers as surveys launch and complete,
+calls end and answers are recorded, so a query reads one row per bucket and
+dimension combination instead of the raw tables. Hourly series come from
+analytics_hourly; coarser ones are rolled up from analytics_daily with
+date_trunc. Call duration percentiles are estimated from the summed duration
+histograms by interpolating within a bin, so they are approximate (exact at
+bin bounds) but roll up over any range.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from db import sql_execute
+
+MAX_TIMESERIES_POINTS = int(os.getenv("MAX_TIMESERIES_POINTS", "10000"))
+
+# Upper bounds (seconds) of analytics_duration_hist's bins; the last bin is everything above
+DURATION_BOUNDS = [10, 20, 30, 45, 60, 90, 120, 180, 240, 300, 420, 600, 900, 1200, 1800, 3600]
+
+# granularity -> (table, shortest bucket, for the point limit)
+GRANULARITIES = {
+    "hour": ("analytics_hourly", timedelta(hours=1)),
+    "day": ("analytics_daily", timedelta(days=1)),
+    "week": ("analytics_daily", timedelta(weeks=1)),
+    "month": ("analytics_daily", timedelta(days=28)),
+    "quarter": ("analytics_daily", timedelta(days=90)),
+    "year": ("analytics_daily", timedelta(days=365)),
+}
+
+DIMENSIONS = ["tenant_id", "template_name", "campaign_id", "channel"]
+
+
+class TimeseriesError(ValueError):
+    """Invalid granularity, grouping or range."""
+
+
+def hist_percentile(hist: List[int], q: float) -> Optional[float]:
+    """Estimate the q-quantile (0..1) of call durations from a duration histogram."""
+    total = sum(hist or [])
+    if total <= 0:
+        return None
+    target = q * total
+    cumulative = 0
+    for i, count in enumerate(hist):
+        if count and cumulative + count >= target:
+            if i >= len(DURATION_BOUNDS):
+                return float(DURATION_BOUNDS[-1])
+            low = DURATION_BOUNDS[i - 1] if i else 0
+            return round(low + (target - cumulative) / count * (DURATION_BOUNDS[i] - low), 1)
+        cumulative += count
+    return float(DURATION_BOUNDS[-1])
+
+
+def parse_group_by(group_by: Optional[str]) -> List[str]:
+    columns = [c.strip() for c in (group_by or "").split(",") if c.strip()]
+    unknown = [c for c in columns if c not in DIMENSIONS]
+    if unknown:
+        raise TimeseriesError(f"group_by must be a comma-separated subset of: {', '.join(DIMENSIONS)}")
+    return list(dict.fromkeys(columns))
+
+
+def _point(row: dict) -> dict:
+    launched = row["surveys_launched"] or 0
+    completed = row["surveys_completed"] or 0
+    calls = row["calls"] or 0
+    answered = row["calls_answered"] or 0
+    hist = row["duration_hist"] or []
+    timed_calls = sum(hist)
+    return {
+        "bucket": row["bucket"].isoformat(),
+        "surveys_launched": launched,
+        "surveys_completed": completed,
+        "completion_rate": round(completed / launched * 100, 2) if launched > 0 else None,
+        "calls": calls,
+        "calls_answered": answered,
+        "answer_rate": round(answered / calls * 100, 2) if calls > 0 else None,
+        "avg_call_seconds": round(float(row["call_seconds"] or 0) / timed_calls, 2) if timed_calls > 0 else None,
+        "duration_p50": hist_percentile(hist, 0.5),
+        "duration_p90": hist_percentile(hist, 0.9),
+        "duration_p95": hist_percentile(hist, 0.95),
+        "responses": row["responses"] or 0,
+    }
+
+
+def query_timeseries(start: datetime, end: datetime, granularity: str = "day",
+                     filters: Optional[Dict[str, Optional[str]]] = None,
+                     group_by: Optional[List[str]] = None) -> List[dict]:
+    """
+    Series of points for buckets in [start, end) (naive UTC; start is truncated to the
+    granularity), one series per combination of the group_by dimensions. Buckets with no
+    activity are omitted. Rates are per bucket: completions in a bucket over launches in it.
+    """
+    if granularity not in GRANULARITIES:
+        raise TimeseriesError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    if end <= start:
+        raise TimeseriesError("end must be after start")
+    table, step = GRANULARITIES[granularity]
+    if (end - start) / step > MAX_TIMESERIES_POINTS:
+        raise TimeseriesError(
+            f"Range has more than {MAX_TIMESERIES_POINTS} {granularity} buckets; use a coarser granularity"
+        )
+    group_by = group_by or []
+
+    conditions = ["bucket >= date_trunc(:granularity, CAST(:start AS timestamp))", "bucket < :end"]
+    params = {"granularity": granularity, "start": start, "end": end}
+    for column, value in (filters or {}).items():
+        if column not in DIMENSIONS:
+            raise TimeseriesError(f"Unknown filter: {column}")
+        if value is not None:
+            conditions.append(f"{column} = :{column}")
+            params[column] = value
+
+    group_columns = "".join(f", {c}" for c in group_by)
+    rows = sql_execute(
+        f"""SELECT date_trunc(:granularity, bucket) AS bucket{group_columns},
+                   SUM(surveys_launched) AS surveys_launched,
+                   SUM(surveys_completed) AS surveys_completed,
+                   SUM(calls) AS calls,
+                   SUM(calls_answered) AS calls_answered,
+                   SUM(call_seconds) AS call_seconds,
+                   analytics_hist_sum(duration_hist) AS duration_hist,
+                   SUM(responses) AS responses
+            FROM {table}
+            WHERE {' AND '.join(conditions)}
+            GROUP BY 1{group_columns}
+            ORDER BY {''.join(f'{c}, ' for c in group_by)}1""",
+        params,
+    )
+
+    series: Dict[tuple, dict] = {}
+    for row in rows:
+        key = tuple(row[c] for c in group_by)
+        if key not in series:
+            series[key] = {"group": dict(zip(group_by, key)), "points": []}
+        series[key]["points"].append(_point(row))
+    return list(series.values())
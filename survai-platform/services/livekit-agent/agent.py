@@ -5,17 +5,21 @@ The agent receives its system prompt from brain-service via dispatch metadata.
 No local prompt templates — brain-service is the single source of truth.
 """
 
+import asyncio
 import os
 import json
+import time
 from datetime import datetime
 
 from livekit import api
 from livekit.agents import (
     JobContext,
+    JobProcess,
     WorkerOptions,
     cli,
     AutoSubscribe,
 )
+from livekit.agents import MetricsCollectedEvent
 from livekit.agents.voice import AgentSession
 from livekit.plugins import deepgram, openai, silero, elevenlabs
 
@@ -38,10 +42,20 @@ from config.settings import (
     VAD_MIN_SILENCE_DURATION,
     VAD_MIN_SPEECH_DURATION,
     VAD_ACTIVATION_THRESHOLD,
+    CALL_METRICS_URL,
+    LOAD_THRESHOLD,
+    TTS_CACHE_ENABLED,
+    TTS_CACHE_ORGS,
 )
+from data.riders import lookup_rider
+from prompts.phrases import cacheable_phrases
 from tools.survey_tools import create_survey_tools
 from utils.logging import get_logger, setup_survey_logging, cleanup_survey_logging
 from utils.storage import create_empty_response_dict
+from utils.submitter import get_answer_submitter
+from utils.telemetry import CallTelemetry
+from utils.tts_cache import get_phrase_cache, tts_identity
+from utils.worker_load import WorkerLoadMonitor
 from survey_agent import SurveyAgent
 
 logger = get_logger()
@@ -54,10 +68,52 @@ MINIMAL_FALLBACK_PROMPT = (
 )
 
 
+def create_tts():
+    if os.getenv("ELEVEN_API_KEY"):
+        return elevenlabs.TTS(
+            voice_id=TTS_VOICE_ID,
+            model=TTS_MODEL,
+            apply_text_normalization="on",
+        )
+    return openai.TTS(voice="nova")
+
+
+def load_session_plugins() -> dict:
+    """Load VAD and construct the STT/LLM/TTS plugin clients for an AgentSession."""
+    return {
+        "vad": silero.VAD.load(
+            min_silence_duration=VAD_MIN_SILENCE_DURATION,
+            min_speech_duration=VAD_MIN_SPEECH_DURATION,
+            activation_threshold=VAD_ACTIVATION_THRESHOLD,
+        ),
+        "stt": deepgram.STT(model=STT_MODEL, language=STT_LANGUAGE),
+        "llm": openai.LLM(model=LLM_MODEL, temperature=LLM_TEMPERATURE),
+        "tts": create_tts(),
+    }
+
+
+def prewarm(proc: JobProcess):
+    """Runs once per worker process, before it accepts jobs; jobs reuse these from proc.userdata."""
+    started = time.perf_counter()
+    proc.userdata["plugins"] = load_session_plugins()
+    logger.info(f"Prewarmed VAD and plugin clients in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    if TTS_CACHE_ENABLED:
+        # Only disk reads here; phrases not on disk yet are synthesized by the first job
+        phrases = cacheable_phrases(TTS_CACHE_ORGS)
+        loaded = get_phrase_cache().load(*tts_identity(proc.userdata["plugins"]["tts"]), phrases)
+        logger.info(f"Loaded {loaded}/{len(phrases)} cached phrases")
+
+
 async def entrypoint(ctx: JobContext):
     metadata = json.loads(ctx.job.metadata or "{}")
     phone_number = metadata.get("phone_number")
 
+    # Dispatches without a recipient name: look the rider up while the call rings
+    rider_lookup = None
+    if phone_number and not metadata.get("recipient_name"):
+        rider_lookup = asyncio.create_task(lookup_rider(phone_number))
+
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
 
     if phone_number:
@@ -75,6 +131,8 @@ async def entrypoint(ctx: JobContext):
             logger.info(f"Answered: {phone_number}")
         except Exception as e:
             logger.error(f"Call to {phone_number} failed: {e}")
+            if rider_lookup:
+                rider_lookup.cancel()
             return
         participant = await ctx.wait_for_participant()
         caller_number = phone_number
@@ -85,18 +143,27 @@ async def entrypoint(ctx: JobContext):
 
     log_filename, log_handler = setup_survey_logging(ctx.room.name, caller_number)
     call_start_time = datetime.now()
+    setup_start = time.perf_counter()
+
+    plugins = ctx.proc.userdata.get("plugins")
+    prewarmed = plugins is not None
+    if not prewarmed:
+        plugins = load_session_plugins()
 
     platform_prompt = metadata.get("system_prompt")
     platform_recipient = metadata.get("recipient_name", "")
     platform_org = metadata.get("organization_name", "")
+    if rider_lookup:
+        rider = await rider_lookup
+        if rider:
+            platform_recipient = f"{rider['first_name']} {rider['last_name']}".strip()
 
     rider_first_name = platform_recipient.split()[0] if platform_recipient else ""
     org_name = platform_org or ORGANIZATION_NAME
 
     questions_list = metadata.get("questions", [])
-    question_ids = [q.get("id", f"q{i+1}") for i, q in enumerate(questions_list) if isinstance(q, dict)]
 
-    logger.info(f"Recipient: '{rider_first_name}' | Org: '{org_name}' | Phone: {caller_number} | Questions: {len(question_ids)}")
+    logger.info(f"Recipient: '{rider_first_name}' | Org: '{org_name}' | Phone: {caller_number} | Questions: {len(questions_list)}")
     if platform_prompt:
         logger.info(f"Brain-service prompt loaded ({len(platform_prompt)} chars)")
     else:
@@ -105,6 +172,31 @@ async def entrypoint(ctx: JobContext):
     survey_prompt = platform_prompt or MINIMAL_FALLBACK_PROMPT
     survey_responses = create_empty_response_dict(rider_first_name, caller_number)
 
+    survey_id = metadata.get("survey_id")
+    callback_url = metadata.get("callback_url")
+    submitter = get_answer_submitter()
+    telemetry = CallTelemetry(call_id=ctx.room.name, survey_id=survey_id)
+    metrics_url = metadata.get("metrics_url") or CALL_METRICS_URL
+
+    async def publish_call_metrics():
+        await telemetry.publish(metrics_url)
+
+    ctx.add_shutdown_callback(publish_call_metrics)
+
+    async def submit_partial_answers():
+        """Dropped call: end_survey never ran, so post whatever was answered."""
+        if survey_id and callback_url and survey_responses["end_reason"] is None and survey_responses["answers"]:
+            logger.warning(f"Call ended without end_survey — submitting {len(survey_responses['answers'])} partial answers")
+            await submitter.submit(
+                ctx.room.name, survey_id, callback_url,
+                survey_responses["answers"], completed=False,
+            )
+        await submitter.drain()
+
+    ctx.add_shutdown_callback(submit_partial_answers)
+    if survey_id and callback_url:
+        submitter.start()
+
     async def hangup_call():
         logger.info("Hanging up — deleting room")
         try:
@@ -122,49 +214,60 @@ async def entrypoint(ctx: JobContext):
         log_handler=log_handler,
         cleanup_logging_fn=cleanup_survey_logging,
         disconnect_fn=hangup_call,
-        question_ids=question_ids,
+        questions=questions_list,
+        call_id=ctx.room.name,
+        survey_id=survey_id,
+        callback_url=callback_url,
+        telemetry=telemetry,
     )
 
+    phrase_cache = get_phrase_cache() if TTS_CACHE_ENABLED else None
+
     survey_agent = SurveyAgent(
         instructions=survey_prompt,
         rider_first_name=rider_first_name,
         organization_name=org_name,
+        phrase_cache=phrase_cache,
+        telemetry=telemetry,
         tools=survey_tools,
     )
 
     session = AgentSession(
-        stt=deepgram.STT(model=STT_MODEL, language=STT_LANGUAGE),
-        llm=openai.LLM(model=LLM_MODEL, temperature=LLM_TEMPERATURE),
-        tts=(
-            elevenlabs.TTS(
-                voice_id=TTS_VOICE_ID,
-                model=TTS_MODEL,
-                apply_text_normalization="on",
-            )
-            if os.getenv("ELEVEN_API_KEY")
-            else openai.TTS(voice="nova")
-        ),
-        vad=silero.VAD.load(
-            min_silence_duration=VAD_MIN_SILENCE_DURATION,
-            min_speech_duration=VAD_MIN_SPEECH_DURATION,
-            activation_threshold=VAD_ACTIVATION_THRESHOLD,
-        ),
+        stt=plugins["stt"],
+        llm=plugins["llm"],
+        tts=plugins["tts"],
+        vad=plugins["vad"],
         preemptive_generation=PREEMPTIVE_GENERATION,
         resume_false_interruption=RESUME_FALSE_INTERRUPTION,
         false_interruption_timeout=FALSE_INTERRUPTION_TIMEOUT,
         max_tool_steps=MAX_TOOL_STEPS,
     )
 
+    @session.on("metrics_collected")
+    def _on_metrics_collected(ev: MetricsCollectedEvent):
+        telemetry.on_metrics(ev.metrics)
+
     await session.start(room=ctx.room, agent=survey_agent)
+    if phrase_cache:
+        # Separate TTS client so warm-up synthesis isn't counted in this call's TTS metrics
+        orgs = list(dict.fromkeys([org_name, *TTS_CACHE_ORGS]))
+        phrase_cache.warm_later(create_tts(), cacheable_phrases(orgs))
+    logger.info(
+        f"Job setup {(time.perf_counter() - setup_start) * 1000:.0f}ms "
+        f"({'warm' if prewarmed else 'cold'} plugins)"
+    )
 
 
 if __name__ == "__main__":
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
             agent_name="survey-agent",
             initialize_process_timeout=WORKER_INITIALIZE_TIMEOUT,
             job_memory_warn_mb=JOB_MEMORY_WARN_MB,
             job_memory_limit_mb=JOB_MEMORY_LIMIT_MB,
+            load_fnc=WorkerLoadMonitor(),
+            load_threshold=LOAD_THRESHOLD,
         ),
     )
@@ -8,13 +8,20 @@ Usage:
     uvicorn api_server:app --host 0.0.0.0 --port 8000 --reload
 
 Endpoints:
-    POST /call   — dispatch the survey agent and place an outbound call
-    GET  /health — liveness check
+    POST /call               — dispatch the survey agent and place an outbound call
+    GET  /riders/stats       — rider cache hit/miss counters
+    GET  /riders/{phone}     — rider for a phone number (cached riders-table lookup)
+    POST /riders/warm        — preload riders for a campaign's upcoming calls, or a list of phones
+    GET  /health             — liveness check
+
+This process is long-lived (jobs run in short-lived subprocesses), so the
+rider cache lives here and agent jobs look riders up through it.
 """
 
 import json
 import os
 import random
+from typing import List, Optional
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
@@ -23,6 +30,8 @@ from pydantic import BaseModel
 
 load_dotenv()
 
+from data import get_rider_directory, normalize_phone  # noqa: E402
+
 app = FastAPI(title="Survey Bot Call API")
 
 
@@ -30,6 +39,11 @@ class CallRequest(BaseModel):
     phone_number: str  # E.164 format, e.g. "+15555550123"
 
 
+class WarmRequest(BaseModel):
+    campaign_id: Optional[str] = None
+    phone_numbers: Optional[List[str]] = None
+
+
 @app.post("/call")
 async def trigger_call(req: CallRequest):
     """Dispatch the survey agent and place an outbound call to the given phone number."""
@@ -38,13 +52,17 @@ async def trigger_call(req: CallRequest):
         raise HTTPException(status_code=500, detail="SIP_OUTBOUND_TRUNK_ID is not configured")
 
     room_name = f"outbound-{''.join(str(random.randint(0, 9)) for _ in range(10))}"
+    metadata = {"phone_number": req.phone_number}
+    rider = await get_rider_directory().get(req.phone_number)
+    if rider:
+        metadata["recipient_name"] = f"{rider['first_name']} {rider['last_name']}".strip()
     lkapi = lkapi_module.LiveKitAPI()
     try:
         await lkapi.agent_dispatch.create_dispatch(
             lkapi_module.CreateAgentDispatchRequest(
                 agent_name="survey-agent",
                 room=room_name,
-                metadata=json.dumps({"phone_number": req.phone_number}),
+                metadata=json.dumps(metadata),
             )
         )
     except Exception as e:
@@ -59,6 +77,38 @@ async def trigger_call(req: CallRequest):
     }
 
 
+@app.get("/riders/stats")
+def rider_cache_stats():
+    """Rider cache counters (hits, negative hits, misses, evictions, size, hit rate)."""
+    return get_rider_directory().stats()
+
+
+@app.get("/riders/{phone_number}")
+async def get_rider(phone_number: str):
+    """Rider for a phone number in any format; 404 if there is none."""
+    if not normalize_phone(phone_number):
+        raise HTTPException(status_code=400, detail="Invalid phone number")
+    rider = await get_rider_directory().get(phone_number)
+    if rider is None:
+        raise HTTPException(status_code=404, detail="Rider not found")
+    return rider
+
+
+@app.post("/riders/warm")
+async def warm_riders(req: WarmRequest):
+    """Preload riders before a campaign starts dialing."""
+    directory = get_rider_directory()
+    try:
+        if req.campaign_id:
+            return await directory.warm_campaign(req.campaign_id)
+        if req.phone_numbers:
+            found = await directory.warm(req.phone_numbers)
+            return {"phones": len(req.phone_numbers), "riders_found": found}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    raise HTTPException(status_code=400, detail="campaign_id or phone_numbers is required")
+
+
 @app.get("/health")
 def health():
     """Liveness check."""
@@ -0,0 +1,349 @@
+"""
+Agent worker capacity: how many concurrent calls a node can carry.
+
+Each simulated call runs in its own process (as LiveKit runs one process
+per job) with the same session composition as the entrypoint: SurveyAgent,
+the real survey tools, silero VAD with the VAD_* settings and the
+AgentSession options from config. STT, TTS and LLM are local stubs with
+fixed latencies (simulator.stub_plugins / simulator.stub_llm), the room is
+replaced by a real-time synthetic microphone and speaker, and a
+RandomRider answers by "speaking" synthetic audio. No network is used.
+
+For every call the benchmark records CPU (cores busy), peak RSS and
+event-loop lag (a 100ms sleep probe), runs the requested concurrency
+levels, and derives:
+  - safe calls per core: LOAD_THRESHOLD / CPU per call, capped by the
+    highest level whose loop-lag p95 stayed within --lag-budget-ms
+  - calls per node size (CPU bound vs memory bound)
+  - JOB_MEMORY_WARN_MB / JOB_MEMORY_LIMIT_MB from the observed peak RSS
+
+Usage:
+    python -m benchmarks.capacity                            # levels 1,2,4,8
+    python -m benchmarks.capacity --levels 1,4,16 --node-sizes 2x4,4x8,8x16
+    python -m benchmarks.capacity --json capacity.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil  # noqa: E402
+
+from config.settings import (  # noqa: E402
+    FALSE_INTERRUPTION_TIMEOUT,
+    JOB_MEMORY_LIMIT_MB,
+    JOB_MEMORY_WARN_MB,
+    LOAD_THRESHOLD,
+    MAX_TOOL_STEPS,
+    PREEMPTIVE_GENERATION,
+    RESUME_FALSE_INTERRUPTION,
+    VAD_ACTIVATION_THRESHOLD,
+    VAD_MIN_SILENCE_DURATION,
+    VAD_MIN_SPEECH_DURATION,
+)
+from simulator.run import SAMPLE_QUESTIONS, _default_prompt  # noqa: E402
+
+LAG_PROBE_INTERVAL = 0.1
+RSS_SAMPLE_INTERVAL = 0.5
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct * (len(ordered) - 1))))]
+
+
+# ─── One call (runs in a child process) ──────────────────────────────────────
+
+async def _call(index: int, seed: int, max_call_seconds: float) -> dict:
+    from livekit.agents import MetricsCollectedEvent
+    from livekit.agents.voice import AgentSession
+    from livekit.plugins import silero
+
+    from simulator.rider import RandomRider
+    from simulator.stub_llm import StubSurveyLLM
+    from simulator.stub_plugins import PacedAudioOutput, StubSTT, StubTTS, SyntheticAudioInput
+    from survey_agent import SurveyAgent
+    from tools.survey_tools import create_survey_tools
+    from utils.storage import create_empty_response_dict
+    from utils.telemetry import CallTelemetry
+
+    import numpy as np
+
+    proc = psutil.Process()
+    vad = silero.VAD.load(
+        min_silence_duration=VAD_MIN_SILENCE_DURATION,
+        min_speech_duration=VAD_MIN_SPEECH_DURATION,
+        activation_threshold=VAD_ACTIVATION_THRESHOLD,
+    )
+
+    call_id = f"capacity-{index}"
+    rng = random.Random(seed)
+    survey_responses = create_empty_response_dict("Jordan", call_id)
+    telemetry = CallTelemetry(call_id=call_id)
+    ended = asyncio.Event()
+
+    async def hangup():
+        ended.set()
+
+    tools = create_survey_tools(
+        survey_responses=survey_responses,
+        caller_number=call_id,
+        call_start_time=datetime.now(),
+        log_handler=None,
+        cleanup_logging_fn=lambda handle: None,
+        disconnect_fn=hangup,
+        questions=SAMPLE_QUESTIONS,
+        telemetry=telemetry,
+        hangup_delay=0.5,
+    )
+    agent = SurveyAgent(
+        instructions=_default_prompt(SAMPLE_QUESTIONS),
+        rider_first_name="Jordan",
+        telemetry=telemetry,
+        tools=tools,
+    )
+
+    stt = StubSTT()
+    audio_in = SyntheticAudioInput(rng=np.random.default_rng(seed))
+    rider = RandomRider(SAMPLE_QUESTIONS, rng, decline_rate=0.0, unclear_rate=0.05)
+    heard = []
+    turns = 0
+
+    lags = []
+    peak_rss = proc.memory_info().rss
+
+    async def _probe():
+        nonlocal peak_rss
+        last_rss = time.perf_counter()
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            lags.append((time.perf_counter() - started - LAG_PROBE_INTERVAL) * 1000)
+            if time.perf_counter() - last_rss >= RSS_SAMPLE_INTERVAL:
+                last_rss = time.perf_counter()
+                peak_rss = max(peak_rss, proc.memory_info().rss)
+
+    def _reply():
+        nonlocal turns
+        turns += 1
+        text = rider.reply(" ".join(heard))
+        heard.clear()
+        seconds = audio_in.say(text)
+        stt.push(text, after=seconds)
+
+    cpu_start = proc.cpu_times()
+    wall_start = time.perf_counter()
+    probe = asyncio.create_task(_probe())
+    try:
+        async with AgentSession(
+            stt=stt,
+            llm=StubSurveyLLM(SAMPLE_QUESTIONS),
+            tts=StubTTS(),
+            vad=vad,
+            preemptive_generation=PREEMPTIVE_GENERATION,
+            resume_false_interruption=RESUME_FALSE_INTERRUPTION,
+            false_interruption_timeout=FALSE_INTERRUPTION_TIMEOUT,
+            max_tool_steps=MAX_TOOL_STEPS,
+        ) as session:
+            session.input.audio = audio_in
+            session.output.audio = PacedAudioOutput()
+
+            @session.on("metrics_collected")
+            def _on_metrics(ev: MetricsCollectedEvent):
+                telemetry.on_metrics(ev.metrics)
+
+            @session.on("conversation_item_added")
+            def _on_item(ev):
+                if ev.item.role == "assistant":
+                    heard.append(ev.item.text_content or "")
+
+            @session.on("agent_state_changed")
+            def _on_state(ev):
+                # Answer once the agent has finished speaking, after a short pause
+                if ev.old_state == "speaking" and ev.new_state == "listening" and not ended.is_set():
+                    asyncio.get_running_loop().call_later(rng.uniform(0.3, 0.8), _reply)
+
+            await session.start(agent)
+            try:
+                await asyncio.wait_for(ended.wait(), timeout=max_call_seconds)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        probe.cancel()
+
+    wall = time.perf_counter() - wall_start
+    cpu_end = proc.cpu_times()
+    cpu_seconds = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    return {
+        "call_id": call_id,
+        "completed": survey_responses["completed"],
+        "turns": turns,
+        "wall_s": round(wall, 2),
+        "cpu_s": round(cpu_seconds, 2),
+        "cpu_cores": round(cpu_seconds / wall, 4) if wall else 0.0,
+        "peak_rss_mb": round(peak_rss / 1024 / 1024, 1),
+        "loop_lag_ms": {
+            "p50": round(_percentile(lags, 0.5), 2),
+            "p95": round(_percentile(lags, 0.95), 2),
+            "max": round(max(lags, default=0.0), 2),
+        },
+    }
+
+
+def _call_process(index: int, seed: int, max_call_seconds: float, start_at: float, results) -> None:
+    logging.getLogger("survey-agent").setLevel(logging.WARNING)
+    logging.getLogger("livekit.agents").setLevel(logging.WARNING)
+    # Everything is imported and loaded before the shared start time so calls overlap fully
+    import simulator.stub_plugins  # noqa: F401
+    import survey_agent  # noqa: F401
+    time.sleep(max(0.0, start_at - time.time()))
+    try:
+        results.put(asyncio.run(_call(index, seed, max_call_seconds)))
+    except Exception as e:
+        results.put({"call_id": f"capacity-{index}", "error": repr(e)})
+
+
+# ─── Levels and report ───────────────────────────────────────────────────────
+
+def run_level(level: int, seed: int, max_call_seconds: float, startup_grace: float) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    start_at = time.time() + startup_grace
+    procs = [
+        ctx.Process(target=_call_process, args=(i, seed * 1000 + i, max_call_seconds, start_at, results))
+        for i in range(level)
+    ]
+    for p in procs:
+        p.start()
+    psutil.cpu_percent(interval=None)
+    calls = [results.get() for _ in procs]
+    host_cpu = psutil.cpu_percent(interval=None)
+    for p in procs:
+        p.join()
+
+    ok = [c for c in calls if "error" not in c]
+    return {
+        "level": level,
+        "calls": calls,
+        "errors": len(calls) - len(ok),
+        "completed": sum(1 for c in ok if c["completed"]),
+        "cpu_cores_per_call": round(statistics.mean(c["cpu_cores"] for c in ok), 4) if ok else None,
+        "peak_rss_mb": max((c["peak_rss_mb"] for c in ok), default=None),
+        "loop_lag_p95_ms": max((c["loop_lag_ms"]["p95"] for c in ok), default=None),
+        "loop_lag_max_ms": max((c["loop_lag_ms"]["max"] for c in ok), default=None),
+        "host_cpu_percent": host_cpu,
+    }
+
+
+def _parse_node_sizes(spec: str) -> list:
+    sizes = []
+    for part in spec.split(","):
+        vcpu, gb = part.lower().split("x")
+        sizes.append((int(vcpu), float(gb)))
+    return sizes
+
+
+def recommend(levels: list, node_sizes: list, lag_budget_ms: float, reserve_mb: float) -> dict:
+    healthy = [lv for lv in levels if not lv["errors"] and lv["loop_lag_p95_ms"] is not None
+               and lv["loop_lag_p95_ms"] <= lag_budget_ms]
+    measured = [lv for lv in levels if lv["cpu_cores_per_call"]]
+    if not measured:
+        return {}
+
+    basis = max(healthy, key=lambda lv: lv["level"]) if healthy else min(measured, key=lambda lv: lv["level"])
+    cpu_per_call = basis["cpu_cores_per_call"]
+    peak_rss = max(lv["peak_rss_mb"] for lv in measured)
+
+    calls_per_core = LOAD_THRESHOLD / cpu_per_call
+    failing = [lv for lv in levels if lv not in healthy]
+    if failing:
+        # Lag broke down before CPU ran out: don't promise more than the last healthy level
+        first_bad = min(lv["level"] for lv in failing)
+        healthy_below = [lv["level"] for lv in healthy if lv["level"] < first_bad]
+        observed = (max(healthy_below) if healthy_below else 1) / psutil.cpu_count()
+        calls_per_core = min(calls_per_core, observed)
+
+    nodes = []
+    for vcpu, gb in node_sizes:
+        cpu_bound = math.floor(vcpu * calls_per_core)
+        memory_bound = math.floor((gb * 1024 - reserve_mb) / peak_rss)
+        nodes.append({
+            "node": f"{vcpu} vCPU / {gb:g} GB",
+            "cpu_bound": cpu_bound,
+            "memory_bound": memory_bound,
+            "max_concurrent_calls": max(0, min(cpu_bound, memory_bound)),
+        })
+
+    return {
+        "basis_level": basis["level"],
+        "cpu_cores_per_call": cpu_per_call,
+        "peak_rss_mb": peak_rss,
+        "safe_calls_per_core": round(calls_per_core, 2),
+        "job_memory_warn_mb": int(math.ceil(peak_rss * 1.5 / 50) * 50),
+        "job_memory_limit_mb": int(math.ceil(peak_rss * 2 / 50) * 50),
+        "nodes": nodes,
+    }
+
+
+def _print(levels: list, rec: dict, lag_budget_ms: float) -> None:
+    print(f"host: {psutil.cpu_count()} cores, LOAD_THRESHOLD={LOAD_THRESHOLD}, lag budget p95 <= {lag_budget_ms:g}ms")
+    for lv in levels:
+        print(
+            f"  level={lv['level']:<3} completed={lv['completed']}/{len(lv['calls'])} errors={lv['errors']} "
+            f"cpu/call={lv['cpu_cores_per_call']} cores  peak_rss={lv['peak_rss_mb']}MB  "
+            f"lag p95={lv['loop_lag_p95_ms']}ms max={lv['loop_lag_max_ms']}ms  host_cpu={lv['host_cpu_percent']}%"
+        )
+    if not rec:
+        print("no successful calls; nothing to recommend")
+        return
+    print(
+        f"safe calls per core: {rec['safe_calls_per_core']} "
+        f"(from level {rec['basis_level']}: {rec['cpu_cores_per_call']} cores/call)"
+    )
+    for node in rec["nodes"]:
+        print(
+            f"  {node['node']:<18} MAX_CONCURRENT_CALLS={node['max_concurrent_calls']:<4} "
+            f"(cpu bound {node['cpu_bound']}, memory bound {node['memory_bound']})"
+        )
+    print(
+        f"JOB_MEMORY_WARN_MB={rec['job_memory_warn_mb']} JOB_MEMORY_LIMIT_MB={rec['job_memory_limit_mb']} "
+        f"(current {JOB_MEMORY_WARN_MB}/{JOB_MEMORY_LIMIT_MB}, peak RSS {rec['peak_rss_mb']}MB)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="1,2,4,8", help="comma-separated concurrent call counts")
+    parser.add_argument("--node-sizes", default="2x4,4x8,8x16", help="comma-separated <vCPU>x<GB> node sizes")
+    parser.add_argument("--lag-budget-ms", type=float, default=50.0, help="max acceptable event-loop lag p95")
+    parser.add_argument("--reserve-mb", type=float, default=512.0, help="memory kept for the worker process and OS")
+    parser.add_argument("--max-call-seconds", type=float, default=180.0)
+    parser.add_argument("--startup-grace", type=float, default=15.0,
+                        help="seconds allowed for the call processes to import before they start together")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write levels, per-call results and the recommendation here")
+    args = parser.parse_args()
+
+    levels = []
+    for level in (int(v) for v in args.levels.split(",")):
+        levels.append(run_level(level, args.seed, args.max_call_seconds, args.startup_grace))
+        print(f"level {level} done", file=sys.stderr)
+
+    rec = recommend(levels, _parse_node_sizes(args.node_sizes), args.lag_budget_ms, args.reserve_mb)
+    _print(levels, rec, args.lag_budget_ms)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"levels": levels, "recommendation": rec}, f, indent=2)
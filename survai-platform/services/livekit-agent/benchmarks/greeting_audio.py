@@ -0,0 +1,92 @@
+"""
+Greeting time-to-first-audio: live TTS vs the phrase cache.
+
+Live synthesizes the greeting through the configured TTS (ElevenLabs when
+ELEVEN_API_KEY is set, otherwise OpenAI) and times the first frame, which is
+what on_enter used to wait for. Cached times the first frame from memory
+and from a fresh process's disk load (what prewarm does). Live runs call
+the TTS provider, so an API key is required.
+
+Usage:
+    python -m benchmarks.greeting_audio              # 5 live runs
+    python -m benchmarks.greeting_audio --runs 10 --org "IT Curves"
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from livekit.agents.utils import http_context  # noqa: E402
+
+from agent import create_tts  # noqa: E402
+from config.settings import ORGANIZATION_NAME  # noqa: E402
+from prompts.phrases import greeting_segments  # noqa: E402
+from utils.tts_cache import PhraseAudioCache, tts_identity  # noqa: E402
+
+
+def _summary(label: str, samples_ms: list) -> str:
+    samples = sorted(samples_ms)
+    return (
+        f"{label:<12} n={len(samples):<3} mean={statistics.mean(samples):8.1f}ms "
+        f"p50={statistics.median(samples):8.1f}ms max={samples[-1]:8.1f}ms"
+    )
+
+
+async def _first_frame_ms(frames) -> float:
+    started = time.perf_counter()
+    async for _ in frames:
+        elapsed = (time.perf_counter() - started) * 1000
+        break
+    async for _ in frames:
+        pass
+    return elapsed
+
+
+async def _live_frames(tts, text: str):
+    async with tts.synthesize(text) as synth:
+        async for ev in synth:
+            yield ev.frame
+
+
+async def run(runs: int, org: str) -> None:
+    http_context._new_session_ctx()
+    tts = create_tts()
+    text, _ = greeting_segments(org)
+    print(f"TTS {tts.provider} {tts_identity(tts)} — \"{text}\"")
+
+    live = [await _first_frame_ms(_live_frames(tts, text)) for _ in range(runs)]
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PhraseAudioCache(cache_dir)
+        audio = await cache.synthesize(tts, text)
+        memory = [await _first_frame_ms(cache.stream(tts, text)) for _ in range(runs)]
+
+        disk = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            fresh = PhraseAudioCache(cache_dir)
+            fresh.load(*tts_identity(tts), [text])
+            async for _ in fresh.stream(tts, text):
+                break
+            disk.append((time.perf_counter() - started) * 1000)
+
+    print(f"greeting audio: {audio.duration:.2f}s")
+    print(_summary("live", live))
+    print(_summary("cached", memory))
+    print(_summary("disk+cached", disk))
+    print(f"saved per greeting (mean): {statistics.mean(live) - statistics.mean(memory):.1f}ms")
+    await http_context._close_http_ctx()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per mode")
+    parser.add_argument("--org", default=ORGANIZATION_NAME, help="organization name in the greeting")
+    args = parser.parse_args()
+    asyncio.run(run(args.runs, args.org))
@@ -0,0 +1,169 @@
+"""
+Cold vs warm job-start benchmark.
+
+Times the per-job setup the entrypoint does with its plugins, in two modes:
+
+  - cold: plugins loaded inside every job (load_session_plugins(), what the
+    entrypoint falls back to without prewarm)
+  - warm: agent.prewarm(proc) run once per worker process, then every job
+    takes the plugins from proc.userdata
+
+A job's setup is building the AgentSession with the entrypoint's options and
+the VAD's first inference (a stream fed 20ms frames of synthetic speech until
+the first INFERENCE_DONE), so the figures include the silero model load and
+its first run, not just object construction. Each mode runs in a freshly
+spawned process, so neither benefits from the other's loaded libraries.
+No network calls are made — plugin clients connect lazily.
+
+Usage:
+    python -m benchmarks.job_start              # 20 jobs per mode
+    python -m benchmarks.job_start --jobs 50
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Plugin constructors validate that keys exist; the benchmark never calls out.
+for key in ("DEEPGRAM_API_KEY", "OPENAI_API_KEY"):
+    os.environ.setdefault(key, "benchmark")
+
+FIRST_INFERENCE_AUDIO_SECONDS = 0.5
+PHASES = ["load", "session", "first_inference", "total"]
+
+
+class _FakeProc:
+    def __init__(self):
+        self.userdata = {}
+
+
+async def _first_inference(vad) -> None:
+    from livekit import rtc
+    from livekit.agents.vad import VADEventType
+
+    from simulator.stub_plugins import FRAME_MS, INPUT_SAMPLE_RATE, synthetic_speech
+
+    audio = synthetic_speech(FIRST_INFERENCE_AUDIO_SECONDS, INPUT_SAMPLE_RATE)
+    per_frame = INPUT_SAMPLE_RATE * FRAME_MS // 1000
+    stream = vad.stream()
+    for i in range(0, len(audio) - per_frame + 1, per_frame):
+        stream.push_frame(rtc.AudioFrame(
+            data=audio[i:i + per_frame].tobytes(),
+            sample_rate=INPUT_SAMPLE_RATE,
+            num_channels=1,
+            samples_per_channel=per_frame,
+        ))
+    stream.end_input()
+    async for ev in stream:
+        if ev.type == VADEventType.INFERENCE_DONE:
+            break
+    await stream.aclose()
+
+
+async def _job(plugins_fn) -> dict:
+    """One job's setup; plugins_fn returns the plugins the way the mode gets them."""
+    from livekit.agents.voice import AgentSession
+
+    from config.settings import (
+        FALSE_INTERRUPTION_TIMEOUT,
+        MAX_TOOL_STEPS,
+        PREEMPTIVE_GENERATION,
+        RESUME_FALSE_INTERRUPTION,
+    )
+
+    started = time.perf_counter()
+    plugins = plugins_fn()
+    loaded = time.perf_counter()
+    session = AgentSession(
+        stt=plugins["stt"],
+        llm=plugins["llm"],
+        tts=plugins["tts"],
+        vad=plugins["vad"],
+        preemptive_generation=PREEMPTIVE_GENERATION,
+        resume_false_interruption=RESUME_FALSE_INTERRUPTION,
+        false_interruption_timeout=FALSE_INTERRUPTION_TIMEOUT,
+        max_tool_steps=MAX_TOOL_STEPS,
+    )
+    built = time.perf_counter()
+    await _first_inference(plugins["vad"])
+    done = time.perf_counter()
+    await session.aclose()
+    return {
+        "load": (loaded - started) * 1000,
+        "session": (built - loaded) * 1000,
+        "first_inference": (done - built) * 1000,
+        "total": (done - started) * 1000,
+    }
+
+
+async def _run_mode(mode: str, jobs: int) -> dict:
+    from agent import load_session_plugins, prewarm
+
+    prewarm_ms = None
+    if mode == "warm":
+        proc = _FakeProc()
+        started = time.perf_counter()
+        prewarm(proc)
+        prewarm_ms = (time.perf_counter() - started) * 1000
+        plugins_fn = lambda: proc.userdata["plugins"]  # noqa: E731
+    else:
+        plugins_fn = load_session_plugins
+    return {"prewarm_ms": prewarm_ms, "jobs": [await _job(plugins_fn) for _ in range(jobs)]}
+
+
+def _mode_process(mode: str, jobs: int, results) -> None:
+    logging.getLogger("survey-agent").setLevel(logging.WARNING)
+    logging.getLogger("livekit.agents").setLevel(logging.WARNING)
+    try:
+        results.put(asyncio.run(_run_mode(mode, jobs)))
+    except Exception as e:
+        results.put({"error": repr(e)})
+
+
+def _in_fresh_process(mode: str, jobs: int) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_mode_process, args=(mode, jobs, results))
+    proc.start()
+    result = results.get()
+    proc.join()
+    if "error" in result:
+        raise RuntimeError(f"{mode} run failed: {result['error']}")
+    return result
+
+
+def _summary(label: str, samples_ms: list) -> str:
+    samples = sorted(samples_ms)
+    p95 = samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+    return (
+        f"  {label:<16} mean={statistics.mean(samples):8.1f}ms p50={statistics.median(samples):8.1f}ms "
+        f"p95={p95:8.1f}ms max={samples[-1]:8.1f}ms"
+    )
+
+
+def run(jobs: int) -> None:
+    results = {mode: _in_fresh_process(mode, jobs) for mode in ("cold", "warm")}
+
+    print(f"prewarm (once per worker process, via agent.prewarm): {results['warm']['prewarm_ms']:.1f}ms")
+    for mode, result in results.items():
+        first = result["jobs"][0]["total"]
+        print(f"{mode} (n={jobs}, first job {first:.1f}ms)")
+        for phase in PHASES:
+            print(_summary(phase, [job[phase] for job in result["jobs"]]))
+
+    cold_total = statistics.mean(job["total"] for job in results["cold"]["jobs"])
+    warm_total = statistics.mean(job["total"] for job in results["warm"]["jobs"])
+    print(f"saved per job (mean setup): {cold_total - warm_total:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=20, help="jobs to simulate per mode")
+    run(parser.parse_args().jobs)
@@ -0,0 +1,334 @@
+"""
+VAD / endpointing replay: tune the VAD_* settings against labeled audio.
+
+Replays WAV fixtures of rider speech through the local silero VAD (the same
+plugin the worker loads) for every combination of the settings grid, and
+scores each combination against the labeled rider turns:
+  - turn delay: labeled end of turn -> VAD end of speech, plus the session's
+    endpointing delay (what the rider waits before the agent starts thinking)
+  - false cut: a pause inside a turn long enough that the session would have
+    committed the turn (VAD end of speech, and no new speech within the
+    endpointing delay) while the rider was still talking
+  - missed: a turn the VAD never detected
+  - noise starts: VAD starts outside any turn, per minute; while the agent
+    is speaking each one is a (false) interruption
+The recommendation per language is the fastest combination (p95 turn delay)
+whose false-cut and missed rates stay within the limits.
+
+Fixtures are a directory with the WAV files (16-bit PCM, any rate; stereo
+is mixed down) and a labels.json:
+    [{"file": "rider_001.wav", "language": "en", "turns": [[0.80, 2.35], [5.10, 7.90]]}, ...]
+Turn boundaries are the start and end of the rider's whole answer,
+including any hesitation pauses inside it.
+
+Usage:
+    python -m benchmarks.vad_replay --fixtures tests/audio         # labeled recordings
+    python -m benchmarks.vad_replay --synthetic 20                 # generated 8 kHz calls, no fixtures needed
+    python -m benchmarks.vad_replay --fixtures DIR --min-silence 0.25,0.35,0.5 --json vad.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+from livekit import rtc  # noqa: E402
+from livekit.agents.vad import VADEventType  # noqa: E402
+from livekit.plugins import silero  # noqa: E402
+
+from config.settings import (  # noqa: E402
+    VAD_ACTIVATION_THRESHOLD,
+    VAD_MIN_SILENCE_DURATION,
+    VAD_MIN_SPEECH_DURATION,
+)
+from simulator.stub_plugins import synthetic_speech  # noqa: E402
+
+FRAME_MS = 20
+# AgentSession's default min_endpointing_delay (the entrypoint doesn't override it)
+DEFAULT_ENDPOINTING_DELAY = 0.5
+# How long after a labeled turn end the closing end-of-speech may arrive
+END_WINDOW = 3.0
+# Slack around labeled turns before a VAD start counts as noise
+TURN_SLACK = 0.3
+
+
+def _floats(spec: str) -> list:
+    return [float(v) for v in spec.split(",")]
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct * (len(ordered) - 1))))]
+
+
+# ─── Fixtures ────────────────────────────────────────────────────────────────
+
+def read_wav(path: str) -> tuple:
+    """(int16 mono samples, sample rate)"""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, sample_rate
+
+
+def load_fixtures(directory: str) -> list:
+    with open(os.path.join(directory, "labels.json"), encoding="utf-8") as f:
+        labels = json.load(f)
+    fixtures = []
+    for entry in labels:
+        samples, sample_rate = read_wav(os.path.join(directory, entry["file"]))
+        fixtures.append({
+            "name": entry["file"],
+            "language": entry.get("language", "unknown"),
+            "turns": [tuple(t) for t in entry["turns"]],
+            "samples": samples,
+            "sample_rate": sample_rate,
+        })
+    return fixtures
+
+
+def synthetic_fixtures(count: int, seed: int, sample_rate: int = 8000) -> list:
+    """
+    Phone-band calls: rider turns of one to three phrases with hesitation
+    pauses inside them, line noise between turns.
+    """
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    fixtures = []
+    for i in range(count):
+        pieces, turns, cursor = [], [], 0.0
+
+        def _silence(seconds):
+            pieces.append((np_rng.standard_normal(int(seconds * sample_rate)) * 80).astype(np.int16))
+
+        for _ in range(rng.randint(3, 6)):
+            gap = rng.uniform(1.0, 2.5)
+            _silence(gap)
+            cursor += gap
+            start = cursor
+            for p in range(rng.randint(1, 3)):
+                if p:
+                    pause = rng.uniform(0.15, 0.9)
+                    _silence(pause)
+                    cursor += pause
+                seconds = rng.uniform(0.5, 1.8)
+                pieces.append(synthetic_speech(seconds, sample_rate=sample_rate,
+                                               f0=rng.uniform(100, 200), rng=np_rng))
+                cursor += seconds
+            turns.append((round(start, 3), round(cursor, 3)))
+        _silence(2.0)
+        fixtures.append({
+            "name": f"synthetic_{i:03d}",
+            "language": "synthetic",
+            "turns": turns,
+            "samples": np.concatenate(pieces),
+            "sample_rate": sample_rate,
+        })
+    return fixtures
+
+
+# ─── Replay and scoring ──────────────────────────────────────────────────────
+
+async def vad_events(vad: silero.VAD, samples: np.ndarray, sample_rate: int) -> list:
+    """[(type, audio timestamp)] for START/END_OF_SPEECH, trailing silence appended to flush the last END."""
+    stream = vad.stream()
+    per_frame = sample_rate * FRAME_MS // 1000
+    tail = np.zeros(int(END_WINDOW * sample_rate), dtype=np.int16)
+    audio = np.concatenate([samples, tail])
+
+    async def _push():
+        for i in range(0, len(audio) - per_frame + 1, per_frame):
+            stream.push_frame(rtc.AudioFrame(
+                data=audio[i:i + per_frame].tobytes(),
+                sample_rate=sample_rate,
+                num_channels=1,
+                samples_per_channel=per_frame,
+            ))
+            if i % (per_frame * 50) == 0:
+                await asyncio.sleep(0)
+        stream.end_input()
+
+    pusher = asyncio.create_task(_push())
+    events = []
+    async for ev in stream:
+        if ev.type in (VADEventType.START_OF_SPEECH, VADEventType.END_OF_SPEECH):
+            events.append((ev.type, ev.timestamp))
+    await pusher
+    await stream.aclose()
+    return events
+
+
+def score(fixture: dict, events: list, endpointing_delay: float) -> dict:
+    starts = [t for kind, t in events if kind == VADEventType.START_OF_SPEECH]
+    ends = [t for kind, t in events if kind == VADEventType.END_OF_SPEECH]
+    delays, cuts, missed = [], 0, 0
+
+    for start, end in fixture["turns"]:
+        if not any(start - TURN_SLACK <= t <= end + TURN_SLACK for t in starts):
+            missed += 1
+            continue
+        for t_end in (t for t in ends if start < t < end):
+            resumed = next((t for t in starts if t > t_end), None)
+            if resumed is None or resumed - t_end > endpointing_delay:
+                cuts += 1
+                break
+        closing = next((t for t in ends if end <= t <= end + END_WINDOW), None)
+        if closing is not None:
+            delays.append(closing - end + endpointing_delay)
+
+    turns = fixture["turns"]
+    noise = [
+        t for t in starts
+        if not any(s - TURN_SLACK <= t <= e + TURN_SLACK for s, e in turns)
+    ]
+    duration = len(fixture["samples"]) / fixture["sample_rate"]
+    non_speech = max(duration - sum(e - s for s, e in turns), 1e-6)
+    return {
+        "turns": len(turns),
+        "cuts": cuts,
+        "missed": missed,
+        "delays": delays,
+        "noise_starts": len(noise),
+        "non_speech_s": non_speech,
+    }
+
+
+def aggregate(scores: list) -> dict:
+    turns = sum(s["turns"] for s in scores)
+    delays = [d for s in scores for d in s["delays"]]
+    non_speech = sum(s["non_speech_s"] for s in scores)
+    return {
+        "turns": turns,
+        "false_cut_rate": round(sum(s["cuts"] for s in scores) / turns, 4) if turns else 0.0,
+        "missed_rate": round(sum(s["missed"] for s in scores) / turns, 4) if turns else 0.0,
+        "turn_delay_ms": {
+            "mean": round(statistics.mean(delays) * 1000, 1),
+            "p50": round(statistics.median(delays) * 1000, 1),
+            "p95": round(_percentile(delays, 0.95) * 1000, 1),
+        } if delays else None,
+        "noise_starts_per_min": round(sum(s["noise_starts"] for s in scores) / non_speech * 60, 2),
+    }
+
+
+def recommend(results: list, max_false_cut: float, max_missed: float) -> dict:
+    """Per language: fastest p95 turn delay within the limits, else the fewest cuts."""
+    by_language = {}
+    for r in results:
+        for language, metrics in r["languages"].items():
+            by_language.setdefault(language, []).append((r["settings"], metrics))
+
+    picks = {}
+    for language, rows in by_language.items():
+        rows = [(s, m) for s, m in rows if m["turn_delay_ms"]]
+        within = [
+            (s, m) for s, m in rows
+            if m["false_cut_rate"] <= max_false_cut and m["missed_rate"] <= max_missed
+        ]
+        if within:
+            settings, metrics = min(within, key=lambda sm: (sm[1]["turn_delay_ms"]["p95"], sm[1]["noise_starts_per_min"]))
+        elif rows:
+            settings, metrics = min(rows, key=lambda sm: (sm[1]["false_cut_rate"] + sm[1]["missed_rate"],
+                                                          sm[1]["turn_delay_ms"]["p95"]))
+        else:
+            continue
+        picks[language] = {"settings": settings, "metrics": metrics, "within_limits": bool(within)}
+    return picks
+
+
+async def run(fixtures: list, grid: list, endpointing_delay: float) -> list:
+    vad = silero.VAD.load(
+        min_silence_duration=VAD_MIN_SILENCE_DURATION,
+        min_speech_duration=VAD_MIN_SPEECH_DURATION,
+        activation_threshold=VAD_ACTIVATION_THRESHOLD,
+    )
+    results = []
+    for min_silence, min_speech, activation in grid:
+        vad.update_options(
+            min_silence_duration=min_silence,
+            min_speech_duration=min_speech,
+            activation_threshold=activation,
+            deactivation_threshold=max(activation - 0.15, 0.01),
+        )
+        per_language = {}
+        for fixture in fixtures:
+            events = await vad_events(vad, fixture["samples"], fixture["sample_rate"])
+            per_language.setdefault(fixture["language"], []).append(score(fixture, events, endpointing_delay))
+        results.append({
+            "settings": {
+                "VAD_MIN_SILENCE_DURATION": min_silence,
+                "VAD_MIN_SPEECH_DURATION": min_speech,
+                "VAD_ACTIVATION_THRESHOLD": activation,
+            },
+            "languages": {language: aggregate(scores) for language, scores in per_language.items()},
+        })
+    return results
+
+
+def _print(results: list, picks: dict) -> None:
+    current = (VAD_MIN_SILENCE_DURATION, VAD_MIN_SPEECH_DURATION, VAD_ACTIVATION_THRESHOLD)
+    for language in sorted({lang for r in results for lang in r["languages"]}):
+        print(f"[{language}]")
+        print(f"  {'silence':>7} {'speech':>6} {'thresh':>6} {'cut%':>6} {'miss%':>6} {'p50ms':>7} {'p95ms':>7} {'noise/min':>9}")
+        for r in results:
+            m = r["languages"].get(language)
+            if not m:
+                continue
+            s = r["settings"]
+            key = (s["VAD_MIN_SILENCE_DURATION"], s["VAD_MIN_SPEECH_DURATION"], s["VAD_ACTIVATION_THRESHOLD"])
+            delay = m["turn_delay_ms"] or {"p50": float("nan"), "p95": float("nan")}
+            print(
+                f"  {key[0]:>7} {key[1]:>6} {key[2]:>6} {m['false_cut_rate'] * 100:>6.1f} {m['missed_rate'] * 100:>6.1f} "
+                f"{delay['p50']:>7} {delay['p95']:>7} {m['noise_starts_per_min']:>9}"
+                f"{'  <- current' if key == current else ''}"
+            )
+        pick = picks.get(language)
+        if pick:
+            note = "" if pick["within_limits"] else "  (no setting met the limits; fewest cuts shown)"
+            print("  recommended: " + " ".join(f"{k}={v}" for k, v in pick["settings"].items()) + note)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--fixtures", help="directory with WAV files and labels.json")
+    source.add_argument("--synthetic", type=int, metavar="N", help="generate N synthetic 8 kHz calls instead")
+    parser.add_argument("--min-silence", default="0.2,0.3,0.35,0.45,0.55,0.7")
+    parser.add_argument("--min-speech", default="0.05,0.08,0.15")
+    parser.add_argument("--activation", default="0.35,0.45,0.55,0.65")
+    parser.add_argument("--endpointing-delay", type=float, default=DEFAULT_ENDPOINTING_DELAY,
+                        help="session min_endpointing_delay added after VAD end of speech")
+    parser.add_argument("--max-false-cut", type=float, default=0.02, help="false-cut rate limit for a recommendation")
+    parser.add_argument("--max-missed", type=float, default=0.0, help="missed-turn rate limit for a recommendation")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write every grid point and the recommendations here")
+    args = parser.parse_args()
+
+    logging.getLogger("livekit.plugins.silero").setLevel(logging.ERROR)
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures(args.synthetic, args.seed)
+    grid = list(itertools.product(_floats(args.min_silence), _floats(args.min_speech), _floats(args.activation)))
+    audio_s = sum(len(f["samples"]) / f["sample_rate"] for f in fixtures)
+    print(f"{len(fixtures)} fixtures, {audio_s:.0f}s of audio, {len(grid)} settings", file=sys.stderr)
+
+    started = time.perf_counter()
+    results = asyncio.run(run(fixtures, grid, args.endpointing_delay))
+    picks = recommend(results, args.max_false_cut, args.max_missed)
+    _print(results, picks)
+    print(f"replayed {audio_s * len(grid):.0f}s of audio in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "recommended": picks}, f, indent=2)
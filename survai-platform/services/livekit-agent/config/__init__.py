@@ -11,6 +11,10 @@ from .settings import (
     TTS_VOICE_ID,
     LOG_DIR,
     RESPONSES_DIR,
+    SPOOL_DIR,
+    TTS_CACHE_DIR,
+    TTS_CACHE_ENABLED,
+    TTS_CACHE_ORGS,
     PREEMPTIVE_GENERATION,
     RESUME_FALSE_INTERRUPTION,
     FALSE_INTERRUPTION_TIMEOUT,
@@ -18,6 +22,13 @@ from .settings import (
     WORKER_INITIALIZE_TIMEOUT,
     JOB_MEMORY_WARN_MB,
     JOB_MEMORY_LIMIT_MB,
+    MAX_CONCURRENT_CALLS,
+    LOAD_THRESHOLD,
+    WORKER_MEMORY_BUDGET_MB,
+    WORKER_METRICS_PORT,
+    RIDER_CACHE_SIZE,
+    RIDER_CACHE_TTL_SECONDS,
+    RIDER_CACHE_NEGATIVE_TTL_SECONDS,
 )
 
 __all__ = [
@@ -31,6 +42,10 @@ __all__ = [
     "TTS_VOICE_ID",
     "LOG_DIR",
     "RESPONSES_DIR",
+    "SPOOL_DIR",
+    "TTS_CACHE_DIR",
+    "TTS_CACHE_ENABLED",
+    "TTS_CACHE_ORGS",
     "PREEMPTIVE_GENERATION",
     "RESUME_FALSE_INTERRUPTION",
     "FALSE_INTERRUPTION_TIMEOUT",
@@ -38,5 +53,12 @@ __all__ = [
     "WORKER_INITIALIZE_TIMEOUT",
     "JOB_MEMORY_WARN_MB",
     "JOB_MEMORY_LIMIT_MB",
+    "MAX_CONCURRENT_CALLS",
+    "LOAD_THRESHOLD",
+    "WORKER_MEMORY_BUDGET_MB",
+    "WORKER_METRICS_PORT",
+    "RIDER_CACHE_SIZE",
+    "RIDER_CACHE_TTL_SECONDS",
+    "RIDER_CACHE_NEGATIVE_TTL_SECONDS",
 ]
 
@@ -52,11 +52,49 @@ VAD_MIN_SILENCE_DURATION = float(os.getenv("VAD_MIN_SILENCE_DURATION", "0.35"))
 VAD_MIN_SPEECH_DURATION = float(os.getenv("VAD_MIN_SPEECH_DURATION", "0.08"))
 VAD_ACTIVATION_THRESHOLD = float(os.getenv("VAD_ACTIVATION_THRESHOLD", "0.45"))
 
+# Pre-synthesized audio for the greeting and stock phrases, keyed by (voice, model, text)
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+# Organizations whose greetings are synthesized ahead of their first call
+TTS_CACHE_ORGS = [
+    org.strip()
+    for org in os.getenv("TTS_CACHE_ORGS", ORGANIZATION_NAME).split(",")
+    if org.strip()
+]
+
 # ===========================================
 # FILE/DIRECTORY PATHS
 # ===========================================
 LOG_DIR = os.getenv("LOG_DIR", "survey_logs")
 RESPONSES_DIR = os.getenv("RESPONSES_DIR", "survey_responses")
+SPOOL_DIR = os.getenv("SPOOL_DIR", os.path.join(RESPONSES_DIR, "spool"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+
+# ===========================================
+# ANSWER SUBMISSION (callback_url from dispatch metadata)
+# ===========================================
+SUBMIT_TIMEOUT_SECONDS = float(os.getenv("SUBMIT_TIMEOUT_SECONDS", "10"))
+SUBMIT_RETRY_INTERVAL_SECONDS = float(os.getenv("SUBMIT_RETRY_INTERVAL_SECONDS", "30"))
+SUBMIT_MAX_ATTEMPTS = int(os.getenv("SUBMIT_MAX_ATTEMPTS", "20"))
+# Per-call latency summaries (overridden by metrics_url in dispatch metadata)
+CALL_METRICS_URL = os.getenv("CALL_METRICS_URL", "")
+# Checkpoints untouched this long belong to a job that died mid-call
+SPOOL_ORPHAN_AGE_SECONDS = float(os.getenv("SPOOL_ORPHAN_AGE_SECONDS", "900"))
+
+# ===========================================
+# RIDER LOOKUP (riders table)
+# ===========================================
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = os.getenv("DB_PORT", "5432")
+DB_USER = os.getenv("DB_USER", "pguser")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "root")
+DB_NAME = os.getenv("DB_NAME", "db")
+RIDER_CACHE_SIZE = int(os.getenv("RIDER_CACHE_SIZE", "10000"))
+RIDER_CACHE_TTL_SECONDS = float(os.getenv("RIDER_CACHE_TTL_SECONDS", "900"))
+# Phones with no rider are remembered for less time, so a newly imported rider shows up soon
+RIDER_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("RIDER_CACHE_NEGATIVE_TTL_SECONDS", "120"))
+# Jobs ask the call API process (api_server.py), which holds the cache
+RIDER_LOOKUP_URL = os.getenv("RIDER_LOOKUP_URL", "http://localhost:8000")
+RIDER_LOOKUP_TIMEOUT_SECONDS = float(os.getenv("RIDER_LOOKUP_TIMEOUT_SECONDS", "2"))
 
 # ===========================================
 # TELEPHONY SETTINGS
@@ -70,3 +108,11 @@ WORKER_INITIALIZE_TIMEOUT = 120.0
 JOB_MEMORY_WARN_MB = 1000
 JOB_MEMORY_LIMIT_MB = 1500
 
+# Load-based admission: the worker stops taking jobs once load >= LOAD_THRESHOLD
+MAX_CONCURRENT_CALLS = int(os.getenv("MAX_CONCURRENT_CALLS", "4"))
+LOAD_THRESHOLD = float(os.getenv("LOAD_THRESHOLD", "0.75"))
+WORKER_MEMORY_BUDGET_MB = float(
+    os.getenv("WORKER_MEMORY_BUDGET_MB", str(JOB_MEMORY_LIMIT_MB * MAX_CONCURRENT_CALLS))
+)
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "8083"))
+
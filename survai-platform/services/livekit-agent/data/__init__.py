@@ -1,6 +1,5 @@
 """Data module for rider information management."""
 
-from .riders import RIDER_DATA, get_rider_info
-
-__all__ = ["RIDER_DATA", "get_rider_info"]
+from .riders import RiderDirectory, get_rider_directory, get_rider_info, lookup_rider, normalize_phone
 
+__all__ = ["RiderDirectory", "get_rider_directory", "get_rider_info", "lookup_rider", "normalize_phone"]
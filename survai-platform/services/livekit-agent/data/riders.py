@@ -1,93 +1,283 @@
 """
 Rider data management.
-Contains dummy data for testing and functions to retrieve rider information.
-In production, this would connect to a database.
+Looks riders up in the riders table by phone number, through a bounded
+in-memory LRU cache.
+
+Entries are keyed on the normalized phone (last 10 digits) and expire after
+RIDER_CACHE_TTL_SECONDS. Numbers with no rider are cached as misses for
+RIDER_CACHE_NEGATIVE_TTL_SECONDS, so redials to unknown numbers don't each
+cost a query. warm_campaign() loads every rider a campaign is about to call
+in one query before dialing starts.
+
+The cache lives in the long-lived call API process (api_server.py); agent
+jobs run in short-lived processes and use lookup_rider() to ask it.
 """
 
-from config.settings import DEFAULT_RIDER
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+import aiohttp
+from sqlalchemy import create_engine, text
+
+from config.settings import (
+    DB_HOST,
+    DB_NAME,
+    DB_PASSWORD,
+    DB_PORT,
+    DB_USER,
+    DEFAULT_RIDER,
+    RIDER_CACHE_NEGATIVE_TTL_SECONDS,
+    RIDER_CACHE_SIZE,
+    RIDER_CACHE_TTL_SECONDS,
+    RIDER_LOOKUP_TIMEOUT_SECONDS,
+    RIDER_LOOKUP_URL,
+)
+from utils.logging import get_logger
+
+logger = get_logger()
+
+# Same normalization as normalize_phone(), in SQL; matches idx_riders_phone_key
+PHONE_KEY_SQL = "RIGHT(regexp_replace(phone, '[^0-9]', '', 'g'), 10)"
+WARM_BATCH_SIZE = 1000
+
+_NON_DIGITS = re.compile(r"\D")
+_engine = None
+
+
+def normalize_phone(phone_number: str) -> str:
+    """Last 10 digits of a phone number in any format ("+1 (321) 654-0987" -> "3216540987")."""
+    return _NON_DIGITS.sub("", phone_number or "")[-10:]
 
 
 # ===========================================
-# RIDER DUMMY DATA
+# DATABASE
 # ===========================================
-# Fictional riders for testing purposes
-# These riders and phone numbers are completely fictional
-# User data is subject to change when/if we get real data from a pilot user
-
-RIDER_DATA = {
-    "1234567890": {
-        "first_name": "Jason",
-        "last_name": "Smith",
-        "phone": "123-456-7890",
-        "mobility_needs": "None",
-        "user_since": "2024"
-    },
-    "3216540987": {
-        "first_name": "Erika",
-        "last_name": "Sampson",
-        "phone": "321-654-0987",
-        "mobility_needs": "Wheelchair user",
-        "user_since": "2021"
-    },
-    "7894561230": {
-        "first_name": "Samantha",
-        "last_name": "Ferguson",
-        "phone": "789-456-1230",
-        "mobility_needs": "Blind",
-        "user_since": "2025"
+
+def _get_engine():
+    global _engine
+    if _engine is None:
+        url = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+        _engine = create_engine(url, pool_size=2, max_overflow=3, pool_pre_ping=True, pool_recycle=300)
+    return _engine
+
+
+def _row_to_rider(row: dict) -> dict:
+    """riders row -> the rider dict the agent uses."""
+    name_parts = (row.get("name") or "").split(None, 1)
+    biodata = row.get("biodata") or {}
+    created_at = row.get("created_at")
+    last_ride = row.get("last_ride_date")
+    return {
+        "id": row.get("id"),
+        "first_name": name_parts[0] if name_parts else "",
+        "last_name": name_parts[1] if len(name_parts) > 1 else "",
+        "phone": row.get("phone"),
+        "email": row.get("email"),
+        "mobility_needs": biodata.get("mobility_needs", DEFAULT_RIDER["mobility_needs"]),
+        "user_since": str(created_at.year) if created_at else DEFAULT_RIDER["user_since"],
+        "ride_count": row.get("ride_count") or 0,
+        "last_ride_date": last_ride.isoformat() if last_ride else None,
     }
-}
 
 
-def get_rider_info(phone_number: str) -> dict:
+def fetch_riders(phone_keys: List[str]) -> Dict[str, dict]:
     """
-    Get rider information from the data store.
-    
+    Riders for the given normalized phones, one per phone (the most recent
+    rider when a number is shared). Blocking; run off the event loop.
+    """
+    query = text(f"""
+        SELECT DISTINCT ON ({PHONE_KEY_SQL})
+               {PHONE_KEY_SQL} AS phone_key,
+               id, name, phone, email, biodata, last_ride_date, ride_count, created_at
+        FROM riders
+        WHERE {PHONE_KEY_SQL} = ANY(:keys)
+        ORDER BY {PHONE_KEY_SQL}, last_ride_date DESC NULLS LAST, created_at DESC
+    """)
+    with _get_engine().connect() as conn:
+        rows = conn.execute(query, {"keys": phone_keys}).mappings().all()
+    return {row["phone_key"]: _row_to_rider(dict(row)) for row in rows}
+
+
+def fetch_campaign_phones(campaign_id: str) -> List[str]:
+    """Phones of a campaign's surveys that are still waiting for a call. Blocking."""
+    query = text("""
+        SELECT DISTINCT phone FROM surveys
+        WHERE campaign_id = :cid AND status = 'In-Progress' AND phone IS NOT NULL
+    """)
+    with _get_engine().connect() as conn:
+        return [row[0] for row in conn.execute(query, {"cid": campaign_id})]
+
+
+# ===========================================
+# CACHE
+# ===========================================
+
+class RiderDirectory:
+    """Phone -> rider lookups with an LRU + TTL cache in front of the riders table."""
+
+    def __init__(
+        self,
+        max_size: int = RIDER_CACHE_SIZE,
+        ttl: float = RIDER_CACHE_TTL_SECONDS,
+        negative_ttl: float = RIDER_CACHE_NEGATIVE_TTL_SECONDS,
+        fetch: Callable[[List[str]], Dict[str, dict]] = fetch_riders,
+    ):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._fetch = fetch
+        # phone key -> (expires_at, rider or None for a known miss)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Concurrent lookups of the same uncached phone share one query
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "queries": 0,
+            "errors": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "warmed": 0,
+        }
+
+    def _cached(self, key: str) -> tuple:
+        """(found_in_cache, rider or None)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, rider = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._stats["expirations"] += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, rider
+
+    def _store(self, key: str, rider: Optional[dict]) -> None:
+        ttl = self.ttl if rider is not None else self.negative_ttl
+        self._entries[key] = (time.monotonic() + ttl, rider)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    async def _load(self, keys: List[str]) -> Dict[str, dict]:
+        self._stats["queries"] += 1
+        found = await asyncio.to_thread(self._fetch, keys)
+        for key in keys:
+            self._store(key, found.get(key))
+        return found
+
+    async def get(self, phone_number: str) -> Optional[dict]:
+        """The rider for this phone, or None if there is none (or the lookup failed)."""
+        key = normalize_phone(phone_number)
+        if not key:
+            return None
+        cached, rider = self._cached(key)
+        if cached:
+            self._stats["hits" if rider is not None else "negative_hits"] += 1
+            return rider
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+        self._stats["misses"] += 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        rider = None
+        try:
+            rider = (await self._load([key])).get(key)
+        except Exception as e:
+            # Not cached: the next call retries the database
+            self._stats["errors"] += 1
+            logger.error(f"Rider lookup failed for ...{key[-4:]}: {e}")
+        finally:
+            del self._inflight[key]
+            future.set_result(rider)
+        return rider
+
+    async def warm(self, phone_numbers: Iterable[str]) -> int:
+        """Load riders for these phones in bulk; returns how many were found."""
+        keys = list(dict.fromkeys(k for k in map(normalize_phone, phone_numbers) if k))
+        keys = [k for k in keys if not self._cached(k)[0]]
+        found = 0
+        for i in range(0, len(keys), WARM_BATCH_SIZE):
+            found += len(await self._load(keys[i:i + WARM_BATCH_SIZE]))
+        self._stats["warmed"] += len(keys)
+        return found
+
+    async def warm_campaign(self, campaign_id: str) -> dict:
+        """Warm the riders of a campaign's upcoming calls."""
+        phones = await asyncio.to_thread(fetch_campaign_phones, campaign_id)
+        found = await self.warm(phones)
+        logger.info(f"Warmed rider cache for campaign {campaign_id}: {found}/{len(phones)} phones have riders")
+        return {"campaign_id": campaign_id, "phones": len(phones), "riders_found": found}
+
+    def invalidate(self, phone_number: str) -> None:
+        self._entries.pop(normalize_phone(phone_number), None)
+
+    def stats(self) -> dict:
+        hits = self._stats["hits"] + self._stats["negative_hits"]
+        lookups = hits + self._stats["misses"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_directory: Optional[RiderDirectory] = None
+
+
+def get_rider_directory() -> RiderDirectory:
+    global _directory
+    if _directory is None:
+        _directory = RiderDirectory()
+    return _directory
+
+
+async def get_rider_info(phone_number: str) -> dict:
+    """
+    Get rider information for a phone number.
+
     Args:
         phone_number: The phone number to look up (any format)
-        
+
     Returns:
-        dict: Rider information dictionary
+        dict: Rider information dictionary (DEFAULT_RIDER if not found)
     """
-    # Clean phone number - remove formatting characters and get last 10 digits
-    clean_phone = phone_number.replace("+", "").replace("-", "").replace(" ", "")[-10:]
-    
-    if clean_phone in RIDER_DATA:
-        return RIDER_DATA[clean_phone]
-    
-    # Return default rider if not found
+    rider = await get_rider_directory().get(phone_number)
+    if rider is not None:
+        return rider
     return {
         **DEFAULT_RIDER,
         "phone": phone_number,
     }
 
 
-def add_rider(phone_number: str, rider_info: dict) -> None:
-    """
-    Add a new rider to the data store.
-    
-    Args:
-        phone_number: The phone number (cleaned, 10 digits)
-        rider_info: Dictionary containing rider information
-    """
-    RIDER_DATA[phone_number] = rider_info
-
-
-def update_rider(phone_number: str, updates: dict) -> bool:
+async def lookup_rider(phone_number: str) -> Optional[dict]:
     """
-    Update an existing rider's information.
-    
-    Args:
-        phone_number: The phone number to update
-        updates: Dictionary of fields to update
-        
-    Returns:
-        bool: True if rider was found and updated, False otherwise
+    Rider for a phone number, from a job process via the call API's cache.
+    Returns None if there is no rider or the lookup fails or times out.
     """
-    clean_phone = phone_number.replace("+", "").replace("-", "").replace(" ", "")[-10:]
-    
-    if clean_phone in RIDER_DATA:
-        RIDER_DATA[clean_phone].update(updates)
-        return True
-    return False
-
+    url = f"{RIDER_LOOKUP_URL}/riders/{quote(phone_number, safe='')}"
+    try:
+        timeout = aiohttp.ClientTimeout(total=RIDER_LOOKUP_TIMEOUT_SECONDS)
+        async with aiohttp.ClientSession(timeout=timeout) as http:
+            async with http.get(url) as resp:
+                if resp.status == 200:
+                    return await resp.json()
+                if resp.status != 404:
+                    logger.warning(f"Rider lookup returned {resp.status}")
+    except Exception as e:
+        logger.warning(f"Rider lookup failed: {e}")
+    return None
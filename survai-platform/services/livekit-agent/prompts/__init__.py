@@ -2,10 +2,14 @@
 
 from .intelligence import DEFAULT_GLOBAL_PROMPT_EN, SYMPATHIZE_PROMPT
 from .survey_template import build_survey_prompt
+from .phrases import STOCK_PHRASES, greeting_segments, cacheable_phrases
 
 __all__ = [
     "DEFAULT_GLOBAL_PROMPT_EN",
     "SYMPATHIZE_PROMPT", 
     "build_survey_prompt",
+    "STOCK_PHRASES",
+    "greeting_segments",
+    "cacheable_phrases",
 ]
 
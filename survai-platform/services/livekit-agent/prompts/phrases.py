@@ -0,0 +1,53 @@
+"""
+Fixed phrases the agent speaks.
+The greeting is built here (not by the LLM), and the stock phrases mirror
+the wording the brain-service prompt tells the LLM to use, so both can be
+served from the pre-synthesized TTS cache.
+"""
+
+from typing import List, Optional, Tuple
+
+GREETING_INTRO = "Hello! This is Cameron, calling on behalf of {org}."
+GREETING_NAME_CHECK = "Am I speaking with {name}?"
+GREETING_NO_NAME = (
+    GREETING_INTRO + " I'm reaching out to get your quick feedback. Is now a good time?"
+)
+
+# Acknowledgements, re-prompts and goodbyes from the brain-service system prompt
+OPENER = "Great, thanks! Just a few quick questions."
+ACKNOWLEDGEMENTS = ["Got it, thanks.", "Appreciate that.", "Good to know."]
+STILL_THERE = "Hello, are you still there?"
+WRONG_PERSON_GOODBYE = "Sorry about that! Have a great day."
+DECLINED_GOODBYE = "No worries at all! Have a great day."
+COMPLETED_GOODBYE = "That's everything! Thanks so much for your time. Have a wonderful day!"
+
+STOCK_PHRASES = [
+    OPENER,
+    *ACKNOWLEDGEMENTS,
+    STILL_THERE,
+    WRONG_PERSON_GOODBYE,
+    DECLINED_GOODBYE,
+    COMPLETED_GOODBYE,
+]
+
+
+def greeting_segments(org: str, name: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """
+    Split the greeting into a part that only depends on the organization
+    (cacheable) and a part that depends on the recipient (spoken live).
+
+    Returns:
+        tuple: (cacheable_text, live_text or None)
+    """
+    if name:
+        return GREETING_INTRO.format(org=org), GREETING_NAME_CHECK.format(name=name)
+    return GREETING_NO_NAME.format(org=org), None
+
+
+def cacheable_phrases(orgs: List[str]) -> List[str]:
+    """Every greeting variant for the given organizations, plus the stock phrases."""
+    phrases = []
+    for org in orgs:
+        phrases.append(GREETING_INTRO.format(org=org))
+        phrases.append(GREETING_NO_NAME.format(org=org))
+    return phrases + STOCK_PHRASES
@@ -0,0 +1 @@
+"""Offline text-mode simulator for the survey agent (see simulator.run)."""
@@ -0,0 +1,69 @@
+"""
+Simulated riders: the person on the other end of a text-mode call.
+"""
+
+import random
+from typing import List, Optional
+
+from tools.question_graph import QuestionGraph
+
+OPEN_ANSWERS = [
+    "The driver was friendly and on time.",
+    "It was fine, nothing special.",
+    "The van was a bit late but the ride was smooth.",
+    "Booking over the phone took too long.",
+    "I don't know, honestly.",
+]
+
+
+class RandomRider:
+    """Answers whatever question the agent asked; sometimes declines, mumbles or asks for a repeat."""
+
+    def __init__(
+        self,
+        questions: List[dict],
+        rng: random.Random,
+        decline_rate: float = 0.05,
+        unclear_rate: float = 0.1,
+    ):
+        self.graph = QuestionGraph(questions)
+        self.rng = rng
+        self.decline_rate = decline_rate
+        self.unclear_rate = unclear_rate
+        self._greeted = False
+
+    def _asked(self, agent_text: str) -> Optional[str]:
+        for qid, node in self.graph.nodes.items():
+            if node.text and node.text in agent_text:
+                return qid
+        return None
+
+    def reply(self, agent_text: str) -> str:
+        if not self._greeted:
+            self._greeted = True
+            if self.rng.random() < self.decline_rate:
+                return self.rng.choice(["Sorry, I'm busy right now.", "Not interested, thanks."])
+            return self.rng.choice(["Yes, speaking.", "Yeah, that's me.", "Sure, go ahead."])
+
+        if self.rng.random() < self.unclear_rate:
+            return self.rng.choice(["Sorry, what?", "Huh?", "Can you repeat that?"])
+
+        qid = self._asked(agent_text)
+        if qid is None:
+            return "Okay."
+        node = self.graph.nodes[qid]
+        if node.criteria == "scale":
+            return self.rng.choice(["{}", "I'd give it a {}", "Probably {}"]).format(self.rng.randint(1, node.scale_max))
+        if node.criteria == "categorical" and node.categories:
+            return self.rng.choice(["{}", "I'd say {}", "Hmm, {}"]).format(self.rng.choice(node.categories).lower())
+        return self.rng.choice(OPEN_ANSWERS)
+
+
+class ScriptedRider:
+    """Replays fixed turns in order, then says goodbye."""
+
+    def __init__(self, turns: List[str]):
+        self.turns = list(turns)
+
+    def reply(self, agent_text: str) -> str:
+        return self.turns.pop(0) if self.turns else "Goodbye."
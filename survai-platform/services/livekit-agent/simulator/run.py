@@ -0,0 +1,233 @@
+"""
+Offline text-mode survey simulator.
+
+Runs SurveyAgent with the real create_survey_tools in text-only
+AgentSessions (no room, STT, TTS or VAD) against StubSurveyLLM, with
+simulated riders. Reports turns, tool calls, tokens and wall time per
+completed survey. Use it to compare prompt and tool changes in CI.
+
+Usage:
+    python -m simulator.run                                  # 100 sessions, built-in questions
+    python -m simulator.run --sessions 500 --concurrency 100 --seed 7
+    python -m simulator.run --questions questions.json --prompt-file prompt.txt --json result.json
+    python -m simulator.run --script turns.json --sessions 1 # scripted rider turns
+    python -m simulator.run --min-completion-rate 0.8        # exit 1 below this (CI gate)
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the response files and logs the tools write out of the working tree
+_scratch = tempfile.mkdtemp(prefix="survey-sim-")
+os.environ.setdefault("RESPONSES_DIR", os.path.join(_scratch, "responses"))
+os.environ.setdefault("LOG_DIR", os.path.join(_scratch, "logs"))
+
+from livekit.agents import MetricsCollectedEvent  # noqa: E402
+from livekit.agents.voice import AgentSession  # noqa: E402
+
+from agent import MINIMAL_FALLBACK_PROMPT  # noqa: E402
+from simulator.rider import RandomRider, ScriptedRider  # noqa: E402
+from simulator.stub_llm import StubSurveyLLM  # noqa: E402
+from survey_agent import SurveyAgent  # noqa: E402
+from tools.survey_tools import create_survey_tools  # noqa: E402
+from utils.storage import create_empty_response_dict  # noqa: E402
+from utils.telemetry import CallTelemetry  # noqa: E402
+
+SAMPLE_QUESTIONS = [
+    {"id": "q1", "order": 1, "criteria": "scale", "scales": 5,
+     "text": "On a scale of 1 to 5, how would you rate your most recent ride?"},
+    {"id": "q2", "order": 2, "criteria": "categorical",
+     "categories": ["Very satisfied", "Satisfied", "Not satisfied"],
+     "text": "How satisfied were you with the driver?"},
+    {"id": "q2a", "order": 3, "criteria": "open", "parent_id": "q2",
+     "parent_category_texts": ["Not satisfied"],
+     "text": "What could the driver have done better?"},
+    {"id": "q3", "order": 4, "criteria": "categorical",
+     "categories": ["Yes", "No"],
+     "text": "Was the vehicle on time?"},
+    {"id": "q3a", "order": 5, "criteria": "scale", "scales": 5, "parent_id": "q3",
+     "parent_category_texts": ["No"],
+     "text": "How much did the delay affect your plans, from 1 to 5?"},
+    {"id": "q4", "order": 6, "criteria": "open",
+     "text": "Is there anything else you'd like to tell us about the service?"},
+]
+
+
+def _default_prompt(questions: list) -> str:
+    lines = [f'[{q["id"]}] {q["text"]}' for q in questions]
+    return f"{MINIMAL_FALLBACK_PROMPT}\n\nQUESTIONS:\n" + "\n".join(lines)
+
+
+async def simulate_session(index: int, questions: list, prompt: str, rider, max_turns: int) -> dict:
+    call_id = f"sim-{index}"
+    survey_responses = create_empty_response_dict("Jordan", call_id)
+    telemetry = CallTelemetry(call_id=call_id)
+    ended = asyncio.Event()
+
+    async def hangup():
+        ended.set()
+
+    tools = create_survey_tools(
+        survey_responses=survey_responses,
+        caller_number=call_id,
+        call_start_time=datetime.now(),
+        log_handler=None,
+        cleanup_logging_fn=lambda handle: None,
+        disconnect_fn=hangup,
+        questions=questions,
+        telemetry=telemetry,
+        hangup_delay=0,
+    )
+    agent = SurveyAgent(
+        instructions=prompt,
+        rider_first_name="Jordan",
+        greeting_delay=0,
+        tools=tools,
+    )
+
+    started = time.perf_counter()
+    turns = 0
+    async with AgentSession(llm=StubSurveyLLM(questions), max_tool_steps=5) as session:
+        @session.on("metrics_collected")
+        def _on_metrics(ev: MetricsCollectedEvent):
+            telemetry.on_metrics(ev.metrics)
+
+        greeting = await session.start(agent, capture_run=True)
+        agent_text = _agent_text(greeting)
+        while not ended.is_set() and turns < max_turns:
+            turns += 1
+            result = await session.run(user_input=rider.reply(agent_text))
+            agent_text = _agent_text(result)
+
+    return {
+        "call_id": call_id,
+        "completed": survey_responses["completed"],
+        "end_reason": survey_responses["end_reason"],
+        "turns": turns,
+        "tool_calls": telemetry.tool_calls,
+        "prompt_tokens": telemetry.usage["llm_prompt_tokens"],
+        "completion_tokens": telemetry.usage["llm_completion_tokens"],
+        "answered": len(survey_responses["answers"]),
+        "wall_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def _agent_text(result) -> str:
+    return " ".join(
+        ev.item.text_content or ""
+        for ev in result.events
+        if ev.type == "message" and ev.item.role == "assistant"
+    )
+
+
+def _stats(values: list) -> dict:
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    return {
+        "mean": round(statistics.mean(ordered), 2),
+        "p50": round(statistics.median(ordered), 2),
+        "p95": round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+def summarize(sessions: list, wall_seconds: float) -> dict:
+    completed = [s for s in sessions if s["completed"]]
+    end_reasons = {}
+    for s in sessions:
+        end_reasons[s["end_reason"] or "unfinished"] = end_reasons.get(s["end_reason"] or "unfinished", 0) + 1
+    return {
+        "sessions": len(sessions),
+        "completed": len(completed),
+        "completion_rate": round(len(completed) / len(sessions), 4) if sessions else 0.0,
+        "end_reasons": end_reasons,
+        "wall_seconds": round(wall_seconds, 2),
+        "per_completed_survey": {
+            key: _stats([s[key] for s in completed])
+            for key in ("turns", "tool_calls", "prompt_tokens", "completion_tokens", "wall_ms")
+        },
+    }
+
+
+async def run(args) -> dict:
+    questions = SAMPLE_QUESTIONS
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = json.load(f)
+    prompt = _default_prompt(questions)
+    if args.prompt_file:
+        with open(args.prompt_file, encoding="utf-8") as f:
+            prompt = f.read()
+    script = None
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = json.load(f)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def _one(i: int) -> dict:
+        rider = (
+            ScriptedRider(script) if script is not None
+            else RandomRider(questions, random.Random(args.seed * 100003 + i),
+                             decline_rate=args.decline_rate, unclear_rate=args.unclear_rate)
+        )
+        async with semaphore:
+            return await simulate_session(i, questions, prompt, rider, args.max_turns)
+
+    started = time.perf_counter()
+    sessions = await asyncio.gather(*(_one(i) for i in range(args.sessions)))
+    summary = summarize(list(sessions), time.perf_counter() - started)
+    summary["prompt_chars"] = len(prompt)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "sessions": sessions}, f, indent=2)
+    return summary
+
+
+def _print(summary: dict) -> None:
+    print(
+        f"sessions={summary['sessions']} completed={summary['completed']} "
+        f"({summary['completion_rate']:.0%}) in {summary['wall_seconds']}s  "
+        f"prompt={summary['prompt_chars']} chars  end_reasons={summary['end_reasons']}"
+    )
+    for key, stats in summary["per_completed_survey"].items():
+        if stats:
+            print(f"  {key:<18} mean={stats['mean']:>9} p50={stats['p50']:>9} p95={stats['p95']:>9} max={stats['max']:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50, help="sessions running at once")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-turns", type=int, default=30, help="rider turns before a session is abandoned")
+    parser.add_argument("--decline-rate", type=float, default=0.05)
+    parser.add_argument("--unclear-rate", type=float, default=0.1)
+    parser.add_argument("--questions", help="JSON list of questions, as in dispatch metadata")
+    parser.add_argument("--prompt-file", help="system prompt to run with (default: fallback prompt + questions)")
+    parser.add_argument("--script", help="JSON list of rider turns (replaces the random rider)")
+    parser.add_argument("--json", help="write the summary and per-session results here")
+    parser.add_argument("--min-completion-rate", type=float, default=None)
+    parser.add_argument("--verbose", action="store_true", help="keep agent and framework logs")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger("survey-agent").setLevel(logging.WARNING)
+        logging.getLogger("livekit.agents").setLevel(logging.WARNING)
+
+    result = asyncio.run(run(args))
+    _print(result)
+    if args.min_completion_rate is not None and result["completion_rate"] < args.min_completion_rate:
+        sys.exit(1)
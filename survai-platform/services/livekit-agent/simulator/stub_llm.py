@@ -0,0 +1,174 @@
+"""
+Rule-based stand-in for the survey LLM.
+
+Follows the same contract the real model is prompted with: greet-reply
+handling, one question at a time, record_answer after every answer, and
+whatever question record_answer names next. The next question is parsed
+from the tool output, so a change to the tool's wording that a model could
+no longer follow also breaks the simulation. Token usage is estimated from
+the chat context (~4 characters per token), so prompt growth shows up in
+the numbers.
+"""
+
+import json
+import re
+from typing import List, Optional
+
+from livekit.agents import llm
+from livekit.agents.llm import ChatChunk, ChoiceDelta, CompletionUsage, FunctionToolCall, is_function_tool
+from livekit.agents.llm.utils import build_legacy_openai_schema
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+from livekit.agents.utils import shortuuid
+
+from prompts.phrases import (
+    ACKNOWLEDGEMENTS,
+    COMPLETED_GOODBYE,
+    DECLINED_GOODBYE,
+    OPENER,
+    STILL_THERE,
+    WRONG_PERSON_GOODBYE,
+)
+from tools.question_graph import QuestionGraph, match_category
+
+_NEXT_QUESTION = re.compile(r"NEXT question: \[([^\]]+)\]")
+_DECLINE = re.compile(r"\b(busy|not a good time|no thanks|not interested|stop calling|call (me )?later)\b", re.I)
+_WRONG_PERSON = re.compile(r"\b(wrong (number|person)|no one by that name|doesn't live here)\b", re.I)
+_UNCLEAR = re.compile(r"^\s*(sorry\W*|what\W*|huh\W*|pardon\W*|can you repeat that\W*)+\s*$", re.I)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _tool_schema(tool) -> dict:
+    """What a real provider would be sent for this tool (counted as prompt tokens)."""
+    if is_function_tool(tool):
+        return build_legacy_openai_schema(tool)
+    return {"tool": str(tool)}
+
+
+def _item_text(item) -> str:
+    if item.type == "message":
+        return item.text_content or ""
+    if item.type == "function_call":
+        return f"{item.name}({item.arguments})"
+    if item.type == "function_call_output":
+        return item.output
+    return ""
+
+
+class StubSurveyLLM(llm.LLM):
+    def __init__(self, questions: List[dict]):
+        super().__init__()
+        self.graph = QuestionGraph(questions)
+
+    @property
+    def model(self) -> str:
+        return "stub-survey-llm"
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[list] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        **kwargs,
+    ) -> "StubLLMStream":
+        return StubLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+    # ─── Policy ──────────────────────────────────────────────────────────────
+
+    def _asked_question(self, items) -> Optional[str]:
+        """Question the agent asked most recently, found by its text in assistant messages."""
+        for item in reversed(items):
+            if item.type == "message" and item.role == "assistant":
+                text = item.text_content or ""
+                for qid, node in self.graph.nodes.items():
+                    if node.text and node.text in text:
+                        return qid
+        return None
+
+    def respond(self, chat_ctx: llm.ChatContext) -> tuple:
+        """(reply text, [(tool name, arguments)]) for the current context."""
+        items = [i for i in chat_ctx.items if i.type in ("message", "function_call", "function_call_output")]
+        last = items[-1] if items else None
+        answered = sum(1 for i in items if i.type == "function_call" and i.name == "record_answer")
+
+        if last is not None and last.type == "function_call_output":
+            if last.name != "record_answer":
+                return "", []
+            match = _NEXT_QUESTION.search(last.output)
+            if match and match.group(1) in self.graph.nodes:
+                ack = ACKNOWLEDGEMENTS[answered % len(ACKNOWLEDGEMENTS)]
+                return f"{ack} {self.graph.nodes[match.group(1)].text}", []
+            return COMPLETED_GOODBYE, [("end_survey", {"reason": "completed"})]
+
+        if last is None or last.type != "message" or last.role != "user":
+            return "", []
+
+        user_text = last.text_content or ""
+        asked = self._asked_question(items)
+        if asked is None:
+            # Reply to the greeting
+            if _WRONG_PERSON.search(user_text):
+                return WRONG_PERSON_GOODBYE, [("end_survey", {"reason": "wrong_person"})]
+            if _DECLINE.search(user_text):
+                return DECLINED_GOODBYE, [("end_survey", {"reason": "declined"})]
+            first = self.graph.next_question({})
+            if first is None:
+                return COMPLETED_GOODBYE, [("end_survey", {"reason": "completed"})]
+            return f"{OPENER} {first.text}", []
+
+        if not user_text.strip() or _UNCLEAR.match(user_text):
+            return f"{STILL_THERE} {self.graph.nodes[asked].text}", []
+
+        node = self.graph.nodes[asked]
+        answer = user_text
+        if node.criteria == "categorical" and node.categories:
+            answer = match_category(user_text, node.categories) or user_text
+        return "", [("record_answer", {"question_id": asked, "answer": answer})]
+
+
+class StubLLMStream(llm.LLMStream):
+    async def _run(self) -> None:
+        stub: StubSurveyLLM = self._llm
+        text, calls = stub.respond(self._chat_ctx)
+        request_id = shortuuid("stub_")
+
+        # Stream the reply a few words at a time, like a real model
+        words = text.split(" ") if text else []
+        for i in range(0, len(words), 4):
+            chunk = " ".join(words[i:i + 4]) + (" " if i + 4 < len(words) else "")
+            self._event_ch.send_nowait(
+                ChatChunk(id=request_id, delta=ChoiceDelta(role="assistant", content=chunk))
+            )
+
+        if calls:
+            self._event_ch.send_nowait(
+                ChatChunk(
+                    id=request_id,
+                    delta=ChoiceDelta(
+                        role="assistant",
+                        tool_calls=[
+                            FunctionToolCall(name=name, arguments=json.dumps(args), call_id=shortuuid("call_"))
+                            for name, args in calls
+                        ],
+                    ),
+                )
+            )
+
+        prompt = "\n".join(_item_text(i) for i in self._chat_ctx.items)
+        prompt += "".join(json.dumps(_tool_schema(t)) for t in self._tools)
+        prompt_tokens = estimate_tokens(prompt)
+        completion = text + "".join(json.dumps(args) for _, args in calls)
+        completion_tokens = estimate_tokens(completion) if completion else 0
+        self._event_ch.send_nowait(
+            ChatChunk(
+                id=request_id,
+                usage=CompletionUsage(
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    total_tokens=prompt_tokens + completion_tokens,
+                ),
+            )
+        )
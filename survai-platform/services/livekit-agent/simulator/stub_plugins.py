@@ -0,0 +1,244 @@
+"""
+Local stand-ins for the audio side of a call: STT, TTS, and the room's
+audio input/output, driven by synthetic speech.
+
+Silero VAD still runs for real on the synthetic input (the harmonic signal
+below is detected as speech), so per-call CPU includes VAD inference,
+resampling and the AgentSession pipeline. Only provider round-trips are
+replaced, by fixed latencies.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional
+
+import numpy as np
+from livekit import rtc
+from livekit.agents import stt, tts
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+from livekit.agents.utils import shortuuid
+from livekit.agents.voice import io
+
+INPUT_SAMPLE_RATE = 16000
+OUTPUT_SAMPLE_RATE = 24000
+FRAME_MS = 20
+# Rough speaking rates for sizing synthetic audio
+SPEECH_CHARS_PER_SECOND = 14.0
+
+
+# (F1, F2, F3) for a, e, i, o, u
+VOWEL_FORMANTS = [(730, 1090, 2440), (530, 1840, 2480), (270, 2290, 3010), (570, 840, 2410), (300, 870, 2240)]
+
+
+def synthetic_speech(seconds: float, sample_rate: int = INPUT_SAMPLE_RATE, f0: float = 120.0,
+                     rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """
+    Voiced, syllable-modulated signal with a different vowel per syllable;
+    silero classifies it as speech. (A single steady vowel stops being
+    detected after a few seconds.)
+    """
+    rng = rng or np.random.default_rng()
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    syllable_rate = rng.uniform(3.5, 5.0)
+    pitch = f0 * (1 + 0.05 * np.sin(2 * np.pi * 3 * t))
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    syllable = (t * syllable_rate).astype(int)
+    vowels = rng.integers(0, len(VOWEL_FORMANTS), syllable.max(initial=0) + 1)
+    signal = np.zeros_like(t)
+    for harmonic in range(1, 40):
+        freq = harmonic * f0
+        if freq >= sample_rate / 2 * 0.9:
+            break
+        gains = np.array([
+            sum(np.exp(-((freq - center) / 200.0) ** 2) / (n + 1) for n, center in enumerate(VOWEL_FORMANTS[v]))
+            for v in vowels
+        ])
+        signal += (gains[syllable] + 0.02) / harmonic ** 0.5 * np.sin(harmonic * phase)
+    signal *= (0.5 + 0.5 * np.sin(2 * np.pi * syllable_rate * t - np.pi / 2)) ** 1.5
+    signal += 0.01 * rng.standard_normal(len(t))
+    peak = np.abs(signal).max() or 1.0
+    return (signal / peak * 0.5 * 32767).astype(np.int16)
+
+
+def speech_seconds(text: str) -> float:
+    return max(0.4, len(text) / SPEECH_CHARS_PER_SECOND)
+
+
+# ─── STT ─────────────────────────────────────────────────────────────────────
+
+class StubSTT(stt.STT):
+    """Streaming STT that emits the rider's scripted text shortly after each utterance ends."""
+
+    def __init__(self, latency: float = 0.25):
+        super().__init__(capabilities=stt.STTCapabilities(streaming=True, interim_results=False))
+        self.latency = latency
+        self.transcripts: "asyncio.Queue[str]" = asyncio.Queue()
+
+    def push(self, text: str, after: float) -> None:
+        """Make `text` the transcript of an utterance that ends `after` seconds from now."""
+        asyncio.get_running_loop().call_later(after, self.transcripts.put_nowait, text)
+
+    async def _recognize_impl(self, buffer, *, language=None, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS):
+        raise NotImplementedError("StubSTT is streaming-only")
+
+    def stream(self, *, language=None, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "StubRecognizeStream":
+        return StubRecognizeStream(stt=self, conn_options=conn_options)
+
+
+class StubRecognizeStream(stt.RecognizeStream):
+    async def _run(self) -> None:
+        stub: StubSTT = self._stt
+
+        async def _drain_input():
+            async for _ in self._input_ch:
+                pass
+
+        drain = asyncio.create_task(_drain_input())
+        try:
+            while not drain.done():
+                get = asyncio.create_task(stub.transcripts.get())
+                await asyncio.wait({get, drain}, return_when=asyncio.FIRST_COMPLETED)
+                if not get.done():
+                    get.cancel()
+                    break
+                await asyncio.sleep(stub.latency)
+                self._event_ch.send_nowait(
+                    stt.SpeechEvent(
+                        type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+                        request_id=shortuuid("stt_"),
+                        alternatives=[stt.SpeechData(language="en", text=get.result(), confidence=0.95)],
+                    )
+                )
+        finally:
+            drain.cancel()
+
+
+# ─── TTS ─────────────────────────────────────────────────────────────────────
+
+class StubTTS(tts.TTS):
+    """Returns synthetic audio sized to the text after a fixed time-to-first-byte."""
+
+    def __init__(self, ttfb: float = 0.2):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=OUTPUT_SAMPLE_RATE,
+            num_channels=1,
+        )
+        self.ttfb = ttfb
+        self._tone = (0.1 * 32767 * np.sin(2 * np.pi * 220 * np.arange(OUTPUT_SAMPLE_RATE) / OUTPUT_SAMPLE_RATE)).astype(np.int16)
+
+    @property
+    def model(self) -> str:
+        return "stub-tts"
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "StubChunkedStream":
+        return StubChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class StubChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        stub: StubTTS = self._tts
+        output_emitter.initialize(
+            request_id=shortuuid("tts_"),
+            sample_rate=OUTPUT_SAMPLE_RATE,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        await asyncio.sleep(stub.ttfb)
+        samples = int(speech_seconds(self.input_text) * OUTPUT_SAMPLE_RATE)
+        tone = np.resize(stub._tone, samples)
+        output_emitter.push(tone.tobytes())
+        output_emitter.flush()
+
+
+# ─── Room audio I/O ──────────────────────────────────────────────────────────
+
+class SyntheticAudioInput(io.AudioInput):
+    """
+    Real-time paced microphone: silence, except when say() has queued an
+    utterance, which is rendered as synthetic speech of matching length.
+    """
+
+    def __init__(self, rng: Optional[np.random.Generator] = None):
+        super().__init__(label="synthetic")
+        self.rng = rng or np.random.default_rng()
+        self._samples_per_frame = INPUT_SAMPLE_RATE * FRAME_MS // 1000
+        self._pending: Deque[np.ndarray] = deque()
+        self._next_at: Optional[float] = None
+        self._silence = np.zeros(self._samples_per_frame, dtype=np.int16)
+
+    def say(self, text: str) -> float:
+        """Queue an utterance; returns its duration in seconds."""
+        seconds = speech_seconds(text)
+        audio = synthetic_speech(seconds, rng=self.rng)
+        for i in range(0, len(audio), self._samples_per_frame):
+            chunk = audio[i:i + self._samples_per_frame]
+            if len(chunk) < self._samples_per_frame:
+                chunk = np.pad(chunk, (0, self._samples_per_frame - len(chunk)))
+            self._pending.append(chunk)
+        return seconds
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        now = time.perf_counter()
+        if self._next_at is None:
+            self._next_at = now
+        self._next_at += FRAME_MS / 1000
+        if self._next_at > now:
+            await asyncio.sleep(self._next_at - now)
+        chunk = self._pending.popleft() if self._pending else self._silence
+        return rtc.AudioFrame(
+            data=chunk.tobytes(),
+            sample_rate=INPUT_SAMPLE_RATE,
+            num_channels=1,
+            samples_per_channel=self._samples_per_frame,
+        )
+
+
+class PacedAudioOutput(io.AudioOutput):
+    """Speaker that 'plays' captured audio in real time and reports playout like the room output."""
+
+    def __init__(self):
+        super().__init__(label="paced", capabilities=io.AudioOutputCapabilities(pause=False))
+        self._segment_seconds = 0.0
+        self._capturing = False
+        self._unfinished = 0
+        self._playout: Optional[asyncio.Task] = None
+
+    def _finished(self, position: float, interrupted: bool) -> None:
+        if self._unfinished:
+            self._unfinished -= 1
+            self.on_playback_finished(playback_position=position, interrupted=interrupted)
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if not self._capturing:
+            self._capturing = True
+            self._unfinished += 1
+            self.on_playback_started(created_at=time.time())
+        self._segment_seconds += frame.duration
+
+    def flush(self) -> None:
+        super().flush()
+        if not self._capturing:
+            return
+        seconds, self._segment_seconds = self._segment_seconds, 0.0
+        self._capturing = False
+        previous = self._playout
+
+        async def _play():
+            if previous is not None:
+                await previous
+            await asyncio.sleep(seconds)
+            self._finished(seconds, interrupted=False)
+
+        self._playout = asyncio.create_task(_play())
+
+    def clear_buffer(self) -> None:
+        if self._playout is not None:
+            self._playout.cancel()
+            self._playout = None
+        while self._unfinished:
+            self._finished(0.0, interrupted=True)
+        self._segment_seconds = 0.0
+        self._capturing = False
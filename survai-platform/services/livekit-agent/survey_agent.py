@@ -5,10 +5,18 @@ Contains the main Agent that conducts customer surveys.
 
 import asyncio
 import re
+import time
+from typing import AsyncIterable, Optional
 
-from livekit.agents.voice import Agent
+from livekit import rtc
+from livekit.agents.voice import Agent, ModelSettings
 
 from config.settings import ORGANIZATION_NAME
+from prompts.phrases import greeting_segments
+from utils.logging import get_logger
+from utils.tts_cache import PhraseAudioCache, tts_identity
+
+logger = get_logger()
 
 PLACEHOLDER_NAMES = {
     "customer", "unknown", "user", "recipient", "test",
@@ -21,10 +29,22 @@ _PLACEHOLDER_PATTERN = re.compile(
 
 
 class SurveyAgent(Agent):
-    def __init__(self, instructions: str, rider_first_name: str, organization_name: str = None, **kwargs):
+    def __init__(
+        self,
+        instructions: str,
+        rider_first_name: str,
+        organization_name: str = None,
+        phrase_cache: Optional[PhraseAudioCache] = None,
+        telemetry=None,
+        greeting_delay: float = 0.8,
+        **kwargs,
+    ):
         super().__init__(instructions=instructions, **kwargs)
         self.rider_first_name = rider_first_name
         self.organization_name = organization_name or ORGANIZATION_NAME
+        self.phrase_cache = phrase_cache
+        self.telemetry = telemetry
+        self.greeting_delay = greeting_delay
 
     def _is_real_name(self, name: str) -> bool:
         if not name or not name.strip():
@@ -39,19 +59,96 @@ class SurveyAgent(Agent):
 
     async def on_enter(self):
         """Speak the greeting, then hand control to the LLM for the survey flow."""
-        await asyncio.sleep(0.8)
-
-        name = self.rider_first_name
-        org = self.organization_name
-        if self._is_real_name(name):
-            greeting = (
-                f"Hello! This is Cameron, calling on behalf of {org}. "
-                f"Am I speaking with {name}?"
-            )
-        else:
-            greeting = (
-                f"Hello! This is Cameron, calling on behalf of {org}. "
-                f"I'm reaching out to get your quick feedback. Is now a good time?"
-            )
-        await self.session.say(greeting)
+        await asyncio.sleep(self.greeting_delay)
+
+        name = self.rider_first_name if self._is_real_name(self.rider_first_name) else None
+        cached_text, live_text = greeting_segments(self.organization_name, name)
+        greeting = f"{cached_text} {live_text}" if live_text else cached_text
+        if self.session.tts is None:
+            # Text-only session (simulator): nothing to synthesize
+            await self.session.say(greeting)
+            return
+        await self.session.say(greeting, audio=self._greeting_audio(cached_text, live_text))
+
+    async def _greeting_audio(self, cached_text: str, live_text: Optional[str]) -> AsyncIterable[rtc.AudioFrame]:
+        """
+        Org-dependent part from the cache (synthesized on a miss); the
+        recipient's name, if any, is synthesized in parallel and appended.
+        """
+        tts = self.session.tts
+        started = time.perf_counter()
+        cached = bool(self.phrase_cache and self.phrase_cache.get(*tts_identity(tts), cached_text))
+
+        suffix: asyncio.Queue = asyncio.Queue()
+
+        async def _prefetch_suffix():
+            try:
+                async with tts.synthesize(live_text) as synth:
+                    async for ev in synth:
+                        suffix.put_nowait(ev.frame)
+            finally:
+                suffix.put_nowait(None)
+
+        suffix_task = asyncio.create_task(_prefetch_suffix()) if live_text else None
+        try:
+            first = True
+            async for frame in self._phrase_frames(tts, cached_text):
+                if first:
+                    first = False
+                    self._record_first_audio(time.perf_counter() - started, cached)
+                yield frame
+            if suffix_task:
+                while (frame := await suffix.get()) is not None:
+                    yield frame
+        finally:
+            if suffix_task and not suffix_task.done():
+                suffix_task.cancel()
+
+    async def _phrase_frames(self, tts, text: str) -> AsyncIterable[rtc.AudioFrame]:
+        if self.phrase_cache:
+            async for frame in self.phrase_cache.stream(tts, text):
+                yield frame
+            return
+        async with tts.synthesize(text) as synth:
+            async for ev in synth:
+                yield ev.frame
+
+    def _record_first_audio(self, seconds: float, cached: bool) -> None:
+        logger.info(f"🔊 Greeting first audio in {seconds * 1000:.0f}ms ({'cached' if cached else 'live'})")
+        if self.telemetry:
+            self.telemetry.record_first_audio(seconds, cached)
+
+    async def tts_node(self, text: AsyncIterable[str], model_settings: ModelSettings) -> AsyncIterable[rtc.AudioFrame]:
+        """
+        Play stock phrases from the cache. LLM text is held back only while
+        it is still a prefix of a cached phrase; anything else goes to TTS.
+        """
+        if not self.phrase_cache:
+            async for frame in Agent.default.tts_node(self, text, model_settings):
+                yield frame
+            return
+
+        chunks = []
+        source = text.__aiter__()
+        diverged = False
+        async for chunk in source:
+            chunks.append(chunk)
+            if not self.phrase_cache.might_match("".join(chunks)):
+                diverged = True
+                break
+
+        if not diverged:
+            audio = self.phrase_cache.get(*tts_identity(self.session.tts), "".join(chunks))
+            if audio is not None:
+                for frame in audio.frames():
+                    yield frame
+                return
+
+        async def _replay():
+            for chunk in chunks:
+                yield chunk
+            async for chunk in source:
+                yield chunk
 
+        async for frame in Agent.default.tts_node(self, _replay(), model_settings):
+            yield frame
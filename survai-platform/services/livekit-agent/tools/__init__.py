@@ -1,6 +1,7 @@
 """Survey function tools module."""
 
 from .survey_tools import create_survey_tools
+from .question_graph import QuestionGraph, match_category
 
-__all__ = ["create_survey_tools"]
+__all__ = ["create_survey_tools", "QuestionGraph", "match_category"]
 
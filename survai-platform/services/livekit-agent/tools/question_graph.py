@@ -0,0 +1,125 @@
+"""
+Compiled survey question graph.
+
+Built once per call from the dispatch metadata questions. A child question
+(parent_id + parent_category_texts) only applies when its parent's recorded
+answer matches one of the trigger categories, so record_answer can name the
+single next question to ask instead of leaving branch logic to the LLM.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORD.findall((text or "").lower()))
+
+
+def match_category(answer: str, categories: List[str]) -> Optional[str]:
+    """
+    Category an answer refers to: an exact match, else the longest category
+    that appears as a whole phrase in the answer ("very satisfied" wins over
+    "satisfied").
+    """
+    norm_answer = _normalize(answer)
+    if not norm_answer:
+        return None
+    best = None
+    for category in categories:
+        norm_cat = _normalize(category)
+        if not norm_cat:
+            continue
+        if norm_cat == norm_answer:
+            return category
+        if f" {norm_cat} " in f" {norm_answer} " and (best is None or len(norm_cat) > len(_normalize(best))):
+            best = category
+    return best
+
+
+@dataclass
+class QuestionNode:
+    id: str
+    text: str
+    criteria: str = "open"
+    categories: List[str] = field(default_factory=list)
+    scale_max: int = 5
+    parent_id: Optional[str] = None
+    triggers: List[str] = field(default_factory=list)
+    children: List[str] = field(default_factory=list)
+
+    def describe(self) -> str:
+        line = f'[{self.id}] "{self.text}"'
+        if self.criteria == "scale":
+            line += f" (rating 1-{self.scale_max})"
+        elif self.criteria == "categorical" and self.categories:
+            line += f" (options: {', '.join(self.categories)})"
+            if self.children:
+                # The answer decides which follow-ups apply, so it must name an option
+                line += " — record the option they chose, verbatim"
+        return line
+
+
+class QuestionGraph:
+    def __init__(self, questions: List[dict]):
+        indexed = [(q, i) for i, q in enumerate(questions) if isinstance(q, dict)]
+        indexed.sort(key=lambda item: (item[0].get("order") or 0, item[1]))
+
+        self.nodes: Dict[str, QuestionNode] = {}
+        for q, i in indexed:
+            qid = q.get("id", f"q{i+1}")
+            self.nodes[qid] = QuestionNode(
+                id=qid,
+                text=q.get("text") or q.get("question_text", ""),
+                criteria=q.get("criteria") or "open",
+                categories=list(q.get("categories") or []),
+                scale_max=int(q.get("scales") or q.get("scale") or 5),
+                parent_id=q.get("parent_id"),
+                triggers=list(q.get("parent_category_texts") or []),
+            )
+        for node in self.nodes.values():
+            # A parent that isn't part of this call (e.g. pruned by brain-service) doesn't gate its child
+            if node.parent_id not in self.nodes:
+                node.parent_id = None
+            else:
+                self.nodes[node.parent_id].children.append(node.id)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self.nodes)
+
+    def applies(self, qid: str, answers: Dict[str, str]) -> Optional[bool]:
+        """True/False once decidable; None while an ancestor is still unanswered."""
+        node = self.nodes[qid]
+        if node.parent_id is None:
+            return True
+        parent_applies = self.applies(node.parent_id, answers)
+        if parent_applies is not True:
+            return parent_applies
+        if node.parent_id not in answers:
+            return None
+        if not node.triggers:
+            return True
+        parent = self.nodes[node.parent_id]
+        chosen = match_category(answers[node.parent_id], parent.categories or node.triggers)
+        if chosen is None:
+            return False
+        return _normalize(chosen) in {_normalize(t) for t in node.triggers}
+
+    def next_question(self, answers: Dict[str, str]) -> Optional[QuestionNode]:
+        for qid, node in self.nodes.items():
+            if qid not in answers and self.applies(qid, answers) is True:
+                return node
+        return None
+
+    def skipped(self, answers: Dict[str, str]) -> List[str]:
+        return [qid for qid in self.nodes if qid not in answers and self.applies(qid, answers) is False]
+
+    def remaining(self, answers: Dict[str, str]) -> List[str]:
+        """Unanswered questions that apply or may still apply."""
+        return [qid for qid in self.nodes if qid not in answers and self.applies(qid, answers) is not False]
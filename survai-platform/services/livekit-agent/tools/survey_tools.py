@@ -4,16 +4,22 @@ Survey function tools — minimal, generic, aligned with brain-service prompt.
 Only two tools:
   - record_answer(question_id, answer) — store any survey answer
   - end_survey(reason)                 — end the call and disconnect
+
+record_answer evaluates the question graph (branch triggers included) and
+tells the LLM exactly which question comes next.
 """
 
 import asyncio
+import time
 from datetime import datetime
 from typing import Callable, List
 
 from livekit.agents import function_tool, RunContext
 
+from tools.question_graph import QuestionGraph
 from utils.logging import get_logger
 from utils.storage import save_survey_responses
+from utils.submitter import get_answer_submitter
 
 logger = get_logger()
 
@@ -27,9 +33,15 @@ def create_survey_tools(
     log_handler,
     cleanup_logging_fn: Callable,
     disconnect_fn: Callable = None,
-    question_ids: List[str] = None,
+    questions: List[dict] = None,
+    call_id: str = None,
+    survey_id: str = None,
+    callback_url: str = None,
+    telemetry=None,
+    hangup_delay: float = HANGUP_DELAY_SECONDS,
 ):
-    total_questions = len(question_ids) if question_ids else 0
+    graph = QuestionGraph(questions or [])
+    submitter = get_answer_submitter() if call_id and survey_id and callback_url else None
 
     @function_tool()
     async def record_answer(context: RunContext, question_id: str, answer: str):
@@ -40,28 +52,38 @@ def create_survey_tools(
             question_id: The question identifier (e.g. "q1", "overall_satisfaction")
             answer: The caller's response in their own words
         """
+        started = time.perf_counter()
         survey_responses["answers"][question_id] = answer
-        done = list(survey_responses["answers"].keys())
-        done_count = len(done)
-        logger.info(f"✅ [{question_id}] ({done_count}/{total_questions}) {answer[:120]}")
-
-        if question_ids:
-            remaining = [q for q in question_ids if q not in done]
-            if remaining:
-                return (
-                    f"Recorded {question_id}. "
-                    f"Progress: {done_count}/{total_questions} done. "
-                    f"ALREADY ASKED (do NOT repeat): {', '.join(done)}. "
-                    f"NEXT question to ask: {remaining[0]}. "
-                    f"Remaining: {', '.join(remaining)}."
-                )
-            else:
-                return (
-                    f"Recorded {question_id}. "
-                    f"ALL {total_questions} questions are done. "
-                    f"Say your full goodbye message to the person, then call end_survey(reason='completed')."
-                )
-        return f"Recorded {question_id}."
+        if submitter:
+            submitter.checkpoint_later(call_id, survey_id, callback_url, survey_responses["answers"])
+        answers = survey_responses["answers"]
+        logger.info(f"✅ [{question_id}] ({len(answers)}/{len(graph)}) {answer[:120]}")
+
+        if not graph.nodes:
+            if telemetry:
+                telemetry.record_tool("record_answer", time.perf_counter() - started)
+            return f"Recorded {question_id}."
+
+        next_question = graph.next_question(answers)
+        skipped = graph.skipped(answers)
+        if skipped:
+            logger.info(f"⏭️ Not applicable: {', '.join(skipped)}")
+        if telemetry:
+            telemetry.record_tool("record_answer", time.perf_counter() - started)
+
+        if next_question:
+            skip_note = f" Skip (not applicable): {', '.join(skipped)}." if skipped else ""
+            return (
+                f"Recorded {question_id}. "
+                f"Done (do NOT repeat): {', '.join(answers)}.{skip_note} "
+                f"NEXT question: {next_question.describe()}. "
+                f"{len(graph.remaining(answers))} left at most."
+            )
+        return (
+            f"Recorded {question_id}. "
+            f"ALL applicable questions are done. "
+            f"Say your full goodbye message to the person, then call end_survey(reason='completed')."
+        )
 
     @function_tool()
     async def end_survey(context: RunContext, reason: str = "completed"):
@@ -73,16 +95,29 @@ def create_survey_tools(
         Args:
             reason: Why the call is ending — completed, wrong_person, declined, not_available
         """
-        logger.info(f"📞 Ending call — reason: {reason} (hanging up in {HANGUP_DELAY_SECONDS}s)")
+        started = time.perf_counter()
+        logger.info(f"📞 Ending call — reason: {reason} (hanging up in {hangup_delay}s)")
         survey_responses["end_reason"] = reason
         survey_responses["completed"] = reason == "completed"
 
         call_duration = (datetime.now() - call_start_time).total_seconds()
-        save_survey_responses(caller_number, survey_responses, call_duration)
+        if submitter and survey_responses["answers"]:
+            submitter.submit_later(
+                call_id, survey_id, callback_url,
+                survey_responses["answers"], completed=survey_responses["completed"],
+            )
+        await asyncio.to_thread(save_survey_responses, caller_number, survey_responses, call_duration)
         cleanup_logging_fn(log_handler)
+        if telemetry:
+            telemetry.record_tool("end_survey", time.perf_counter() - started)
+            telemetry.record_outcome(
+                survey_responses["completed"],
+                answered=len(survey_responses["answers"]),
+                skipped=len(graph.skipped(survey_responses["answers"])),
+            )
 
         # Wait long enough for TTS to finish speaking the goodbye
-        await asyncio.sleep(HANGUP_DELAY_SECONDS)
+        await asyncio.sleep(hangup_delay)
 
         if disconnect_fn:
             await disconnect_fn()
@@ -2,6 +2,9 @@
 
 from .logging import setup_survey_logging, cleanup_survey_logging, get_logger
 from .storage import save_survey_responses, create_empty_response_dict
+from .submitter import AnswerSubmitter, get_answer_submitter
+from .telemetry import CallTelemetry
+from .tts_cache import PhraseAudioCache, get_phrase_cache
 
 __all__ = [
     "setup_survey_logging",
@@ -9,5 +12,10 @@ __all__ = [
     "get_logger",
     "save_survey_responses",
     "create_empty_response_dict",
+    "AnswerSubmitter",
+    "get_answer_submitter",
+    "CallTelemetry",
+    "PhraseAudioCache",
+    "get_phrase_cache",
 ]
 
@@ -1,12 +1,23 @@
 """
 Logging utilities for the survey bot.
 Handles per-call logging and general logging setup.
+
+Per-call files are routed by a contextvar rather than by attaching one
+handler per call to the shared logger: every record is stamped with the
+call_id of the job that emitted it, pushed onto a queue, and written by a
+single QueueListener thread to that call's file only. File I/O never runs
+on the audio/LLM event loop.
 """
 
+import atexit
+import contextvars
 import logging
 import os
+import queue
+import threading
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
 
 from config.settings import LOG_DIR
 
@@ -15,56 +26,170 @@ from config.settings import LOG_DIR
 _logger = logging.getLogger("survey-agent")
 _logger.setLevel(logging.INFO)
 
+# call_id of the job running in the current asyncio task (inherited by child tasks)
+_current_call_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "survey_call_id", default=None
+)
+
+_FORMATTER = logging.Formatter(
+    '%(asctime)s | %(name)-20s | %(levelname)-8s | %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+class _CallContextFilter(logging.Filter):
+    """Stamp each record with the emitting task's call_id before it is queued."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.call_id = _current_call_id.get()
+        return True
+
+
+class _CloseMarker(logging.LogRecord):
+    """Queue sentinel: closes a call's file on the listener thread, after its pending records."""
+
+    def __init__(self, call_id: str):
+        super().__init__("survey-agent", logging.DEBUG, __file__, 0, "", None, None)
+        self.close_call_id = call_id
+
+
+class _CallRoutingHandler(logging.Handler):
+    """Runs on the listener thread; writes each record to its call's file handler."""
+
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self._handlers: Dict[str, RotatingFileHandler] = {}
+        self._routes_lock = threading.Lock()
+
+    def register(self, call_id: str, handler: RotatingFileHandler) -> None:
+        with self._routes_lock:
+            self._handlers[call_id] = handler
+
+    def unregister(self, call_id: str) -> Optional[RotatingFileHandler]:
+        with self._routes_lock:
+            return self._handlers.pop(call_id, None)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if isinstance(record, _CloseMarker):
+            handler = self.unregister(record.close_call_id)
+            if handler is not None:
+                handler.close()
+            return
+        call_id = getattr(record, "call_id", None)
+        if call_id is None:
+            return
+        with self._routes_lock:
+            handler = self._handlers.get(call_id)
+            if handler is not None:
+                handler.handle(record)
+
+
+class SurveyLogHandle:
+    """Returned by setup_survey_logging; pass it back to cleanup_survey_logging."""
+
+    def __init__(self, call_id: str, filename: str, token: contextvars.Token):
+        self.call_id = call_id
+        self.filename = filename
+        self.token = token
+
+
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_routing_handler = _CallRoutingHandler()
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.addFilter(_CallContextFilter())
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def _ensure_listener() -> None:
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        _logger.addHandler(_queue_handler)
+        _listener = QueueListener(_log_queue, _routing_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_log_listener)
+
+
+def stop_log_listener() -> None:
+    """Drain the queue and stop the writer thread."""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _logger.removeHandler(_queue_handler)
+        _listener = None
+
 
 def get_logger() -> logging.Logger:
     """Get the survey agent logger."""
     return _logger
 
 
-def setup_survey_logging(room_name: str, caller_number: str) -> tuple[str, RotatingFileHandler]:
+def current_call_id() -> Optional[str]:
+    """call_id bound to the running job, or None outside of a call."""
+    return _current_call_id.get()
+
+
+def setup_survey_logging(room_name: str, caller_number: str) -> tuple[str, SurveyLogHandle]:
     """
     Set up a separate log file for this survey call.
-    
+
+    Binds the call to the current context, so log lines from this job (and
+    the tasks it spawns) land only in this call's file.
+
     Args:
         room_name: The LiveKit room name
         caller_number: The caller's phone number
-        
+
     Returns:
-        tuple: (log_filename, file_handler)
+        tuple: (log_filename, log_handle)
     """
     os.makedirs(LOG_DIR, exist_ok=True)
-    
+    _ensure_listener()
+
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     caller_clean = caller_number.replace("+", "").replace("-", "").replace(" ", "")
     log_filename = f"{LOG_DIR}/survey_{timestamp}_{caller_clean}_{room_name}.log"
-    
+
     file_handler = RotatingFileHandler(
         log_filename,
         maxBytes=5*1024*1024,  # 5MB
         backupCount=3,
-        encoding='utf-8'
+        encoding='utf-8',
+        delay=True,
     )
     file_handler.setLevel(logging.DEBUG)
-    
-    formatter = logging.Formatter(
-        '%(asctime)s | %(name)-20s | %(levelname)-8s | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    file_handler.setFormatter(formatter)
-    
-    _logger.addHandler(file_handler)
-    
+    file_handler.setFormatter(_FORMATTER)
+
+    call_id = room_name
+    _routing_handler.register(call_id, file_handler)
+    token = _current_call_id.set(call_id)
+
     _logger.info(f"📝 SURVEY LOG FILE CREATED: {log_filename}")
-    return log_filename, file_handler
+    return log_filename, SurveyLogHandle(call_id, log_filename, token)
 
 
-def cleanup_survey_logging(handler: RotatingFileHandler) -> None:
+def cleanup_survey_logging(handle: SurveyLogHandle) -> None:
     """
-    Remove the survey-specific handler after the call ends.
-    
+    Stop routing this call's records and close its file once queued lines are written.
+
     Args:
-        handler: The file handler to remove
+        handle: The handle returned by setup_survey_logging
     """
-    _logger.removeHandler(handler)
-    handler.close()
+    try:
+        _current_call_id.reset(handle.token)
+    except ValueError:
+        # Called from a different context than setup (e.g. a tool task) — just unbind.
+        _current_call_id.set(None)
+
+    # Enqueue the close behind this call's pending records so nothing is lost.
+    if _listener is not None:
+        _log_queue.put(_CloseMarker(handle.call_id))
+    else:
+        handler = _routing_handler.unregister(handle.call_id)
+        if handler is not None:
+            handler.close()
 
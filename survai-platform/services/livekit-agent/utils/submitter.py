@@ -0,0 +1,249 @@
+"""
+Durable answer submission to the platform.
+
+Answers are checkpointed to an on-disk spool after every record_answer and
+posted to the dispatch metadata's callback_url when the call ends. A spool
+file is only deleted once the platform accepts it; failed posts and
+checkpoints left behind by jobs that died mid-call are retried by a
+background loop. All disk and network I/O runs off the event loop
+(asyncio.to_thread / aiohttp).
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+import aiohttp
+
+from config.settings import (
+    SPOOL_DIR,
+    SPOOL_ORPHAN_AGE_SECONDS,
+    SUBMIT_MAX_ATTEMPTS,
+    SUBMIT_RETRY_INTERVAL_SECONDS,
+    SUBMIT_TIMEOUT_SECONDS,
+)
+from utils.logging import get_logger
+
+logger = get_logger()
+
+_CLAIMED_SUFFIX = ".claimed"
+
+
+def _spool_path(call_id: str) -> str:
+    return os.path.join(SPOOL_DIR, f"{call_id}.json")
+
+
+def _write_atomic(path: str, record: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _read(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _claim(path: str) -> Optional[str]:
+    """Rename a spool file so no other worker process delivers it concurrently."""
+    claimed = path + _CLAIMED_SUFFIX
+    try:
+        os.rename(path, claimed)
+        return claimed
+    except OSError:
+        return None
+
+
+def _scan_spool() -> list:
+    """Spool files due for delivery: finalized, orphaned checkpoints, or stale claims."""
+    if not os.path.isdir(SPOOL_DIR):
+        return []
+    now = time.time()
+    due = []
+    for name in os.listdir(SPOOL_DIR):
+        path = os.path.join(SPOOL_DIR, name)
+        try:
+            age = now - os.path.getmtime(path)
+        except OSError:
+            continue
+        if name.endswith(".json" + _CLAIMED_SUFFIX):
+            # Claimed by a process that died before releasing it
+            if age > SPOOL_ORPHAN_AGE_SECONDS:
+                original = path[: -len(_CLAIMED_SUFFIX)]
+                try:
+                    os.rename(path, original)
+                except OSError:
+                    continue
+                due.append(original)
+            continue
+        if not name.endswith(".json"):
+            continue
+        record = _read(path)
+        if record is None:
+            continue
+        if record.get("final") or age > SPOOL_ORPHAN_AGE_SECONDS:
+            due.append(path)
+    return due
+
+
+class AnswerSubmitter:
+    """One per worker process; shared by every job the process runs."""
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._active: Set[str] = set()
+        self._finalized: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._retry_task: Optional[asyncio.Task] = None
+
+    # ─── Public API ──────────────────────────────────────────────────────────
+
+    def checkpoint_later(self, call_id: str, survey_id: str, callback_url: str, answers: dict) -> None:
+        """Fire-and-forget checkpoint; the tool handler returns immediately."""
+        self._active.add(call_id)
+        self._track(self.checkpoint(call_id, survey_id, callback_url, answers))
+
+    async def checkpoint(self, call_id: str, survey_id: str, callback_url: str, answers: dict) -> None:
+        async with self._lock(call_id):
+            if call_id in self._finalized:
+                return
+            # Snapshot under the lock so the newest answers always win
+            record = self._record(call_id, survey_id, callback_url, dict(answers), final=False)
+            try:
+                await asyncio.to_thread(_write_atomic, _spool_path(call_id), record)
+            except OSError as e:
+                logger.error(f"Checkpoint failed for {call_id}: {e}")
+
+    def submit_later(self, call_id: str, survey_id: str, callback_url: str, answers: dict, completed: bool) -> None:
+        self._track(self.submit(call_id, survey_id, callback_url, answers, completed))
+
+    async def submit(self, call_id: str, survey_id: str, callback_url: str, answers: dict, completed: bool) -> bool:
+        """Finalize the spool file and post it; on failure it stays spooled for the retry loop."""
+        async with self._lock(call_id):
+            if call_id in self._finalized:
+                return True
+            self._finalized.add(call_id)
+            self._active.discard(call_id)
+            record = self._record(call_id, survey_id, callback_url, dict(answers), final=True)
+            record["payload"]["Completed"] = completed
+            path = _spool_path(call_id)
+            await asyncio.to_thread(_write_atomic, path, record)
+        self.start()
+        return await self._deliver(path)
+
+    async def drain(self) -> None:
+        """Wait for in-flight checkpoints/submissions of this process."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def start(self) -> None:
+        if self._retry_task is None or self._retry_task.done():
+            self._retry_task = asyncio.create_task(self._retry_loop())
+
+    # ─── Internals ───────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _record(call_id: str, survey_id: str, callback_url: str, answers: dict, final: bool) -> dict:
+        return {
+            "call_id": call_id,
+            "callback_url": callback_url,
+            "payload": {"SurveyId": survey_id, **answers},
+            "final": final,
+            "attempts": 0,
+            "updated_at": datetime.now().isoformat(),
+        }
+
+    def _lock(self, call_id: str) -> asyncio.Lock:
+        lock = self._locks.get(call_id)
+        if lock is None:
+            lock = self._locks[call_id] = asyncio.Lock()
+        return lock
+
+    def _track(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=SUBMIT_TIMEOUT_SECONDS),
+            )
+        return self._session
+
+    async def _post(self, url: str, payload: dict) -> bool:
+        try:
+            async with self._get_session().post(url, json=payload) as resp:
+                if 200 <= resp.status < 300:
+                    return True
+                logger.warning(f"Answer callback returned {resp.status} for survey {payload.get('SurveyId')}")
+                return False
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Answer callback failed for survey {payload.get('SurveyId')}: {e}")
+            return False
+
+    async def _deliver(self, path: str) -> bool:
+        claimed = await asyncio.to_thread(_claim, path)
+        if not claimed:
+            return False
+        record = await asyncio.to_thread(_read, claimed)
+        if record is None:
+            await asyncio.to_thread(os.remove, claimed)
+            return False
+
+        payload = record.get("payload", {})
+        if not record.get("final"):
+            # Orphaned checkpoint from a dropped call: submit as partial
+            payload["Completed"] = False
+        if not record.get("callback_url") or not payload.get("SurveyId"):
+            await asyncio.to_thread(os.remove, claimed)
+            return False
+
+        if await self._post(record["callback_url"], payload):
+            await asyncio.to_thread(os.remove, claimed)
+            answered = len([k for k in payload if k not in ("SurveyId", "Completed")])
+            logger.info(f"✅ Submitted {answered} answers for survey {payload['SurveyId']} ({record['call_id']})")
+            return True
+
+        record["final"] = True
+        record["attempts"] = record.get("attempts", 0) + 1
+        if record["attempts"] >= SUBMIT_MAX_ATTEMPTS:
+            failed_path = os.path.join(SPOOL_DIR, "failed", os.path.basename(path))
+            await asyncio.to_thread(_write_atomic, failed_path, record)
+            await asyncio.to_thread(os.remove, claimed)
+            logger.error(f"Giving up on answers for {record['call_id']} after {record['attempts']} attempts → {failed_path}")
+        else:
+            await asyncio.to_thread(_write_atomic, path, record)
+            await asyncio.to_thread(os.remove, claimed)
+        return False
+
+    async def _retry_loop(self) -> None:
+        while True:
+            try:
+                for path in await asyncio.to_thread(_scan_spool):
+                    call_id = os.path.basename(path)[: -len(".json")]
+                    if call_id in self._active:
+                        continue
+                    await self._deliver(path)
+            except Exception as e:
+                logger.error(f"Spool retry pass failed: {e}")
+            await asyncio.sleep(SUBMIT_RETRY_INTERVAL_SECONDS)
+
+
+_submitter: Optional[AnswerSubmitter] = None
+
+
+def get_answer_submitter() -> AnswerSubmitter:
+    global _submitter
+    if _submitter is None:
+        _submitter = AnswerSubmitter()
+    return _submitter
@@ -0,0 +1,159 @@
+"""
+Turn-level latency telemetry.
+
+Collects AgentSession metrics events for one call (STT end-of-utterance
+delay, LLM time-to-first-token, TTS time-to-first-byte, tool execution time,
+greeting time-to-first-audio, token/character usage), reduces them to p50/p95 summaries and publishes the
+summary with the call_id and the session config it was measured under.
+"""
+
+import asyncio
+import math
+from typing import Dict, List, Optional
+
+import aiohttp
+from livekit.agents.metrics import EOUMetrics, LLMMetrics, STTMetrics, TTSMetrics
+
+from config.settings import (
+    FALSE_INTERRUPTION_TIMEOUT,
+    LLM_MODEL,
+    PREEMPTIVE_GENERATION,
+    STT_MODEL,
+    SUBMIT_TIMEOUT_SECONDS,
+    TTS_CACHE_ENABLED,
+    TTS_MODEL,
+    VAD_ACTIVATION_THRESHOLD,
+    VAD_MIN_SILENCE_DURATION,
+    VAD_MIN_SPEECH_DURATION,
+)
+from utils.logging import get_logger
+
+logger = get_logger()
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile (same definition as Postgres percentile_cont)."""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = pct * (len(sorted_values) - 1)
+    lo, hi = math.floor(rank), math.ceil(rank)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (rank - lo)
+
+
+def session_config() -> dict:
+    """Settings the latency numbers depend on, stored alongside them for comparison."""
+    return {
+        "stt_model": STT_MODEL,
+        "llm_model": LLM_MODEL,
+        "tts_model": TTS_MODEL,
+        "vad_min_silence_duration": VAD_MIN_SILENCE_DURATION,
+        "vad_min_speech_duration": VAD_MIN_SPEECH_DURATION,
+        "vad_activation_threshold": VAD_ACTIVATION_THRESHOLD,
+        "preemptive_generation": PREEMPTIVE_GENERATION,
+        "false_interruption_timeout": FALSE_INTERRUPTION_TIMEOUT,
+        "tts_cache_enabled": TTS_CACHE_ENABLED,
+    }
+
+
+class CallTelemetry:
+    """Per-call accumulator; feed it from session "metrics_collected" events and tool handlers."""
+
+    def __init__(self, call_id: str, survey_id: Optional[str] = None):
+        self.call_id = call_id
+        self.survey_id = survey_id
+        self._samples: Dict[str, List[float]] = {
+            "eou_delay": [],
+            "stt_transcription_delay": [],
+            "llm_ttft": [],
+            "tts_ttfb": [],
+            "tool_duration": [],
+            "greeting_first_audio": [],
+        }
+        self.usage = {
+            "llm_prompt_tokens": 0,
+            "llm_completion_tokens": 0,
+            "tts_characters": 0,
+            "stt_audio_seconds": 0.0,
+        }
+        self.turns = 0
+        self.tool_calls = 0
+        self.greeting_cached: Optional[bool] = None
+        self.completed: Optional[bool] = None
+        self.questions_answered = 0
+        self.questions_skipped = 0
+
+    def on_metrics(self, metrics) -> None:
+        if isinstance(metrics, EOUMetrics):
+            self.turns += 1
+            self._samples["eou_delay"].append(metrics.end_of_utterance_delay)
+            self._samples["stt_transcription_delay"].append(metrics.transcription_delay)
+        elif isinstance(metrics, LLMMetrics):
+            if metrics.ttft >= 0:
+                self._samples["llm_ttft"].append(metrics.ttft)
+            self.usage["llm_prompt_tokens"] += metrics.prompt_tokens
+            self.usage["llm_completion_tokens"] += metrics.completion_tokens
+        elif isinstance(metrics, TTSMetrics):
+            if metrics.ttfb >= 0:
+                self._samples["tts_ttfb"].append(metrics.ttfb)
+            self.usage["tts_characters"] += metrics.characters_count
+        elif isinstance(metrics, STTMetrics):
+            self.usage["stt_audio_seconds"] += metrics.audio_duration
+
+    def record_tool(self, name: str, seconds: float) -> None:
+        self.tool_calls += 1
+        self._samples["tool_duration"].append(seconds)
+        logger.debug(f"Tool {name} ran in {seconds * 1000:.0f}ms")
+
+    def record_first_audio(self, seconds: float, cached: bool) -> None:
+        """Greeting time-to-first-audio, from say() to the first frame handed to the room."""
+        self._samples["greeting_first_audio"].append(seconds)
+        self.greeting_cached = cached
+
+    def record_outcome(self, completed: bool, answered: int, skipped: int) -> None:
+        """How the survey ended, so cost can be compared per completed survey."""
+        self.completed = completed
+        self.questions_answered = answered
+        self.questions_skipped = skipped
+
+    def summary(self) -> dict:
+        latency = {}
+        for name, values in self._samples.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            latency[name] = {
+                "count": len(ordered),
+                "p50": round(_percentile(ordered, 0.50), 4),
+                "p95": round(_percentile(ordered, 0.95), 4),
+                "max": round(ordered[-1], 4),
+            }
+        return {
+            "call_id": self.call_id,
+            "survey_id": self.survey_id,
+            "turns": self.turns,
+            "tool_calls": self.tool_calls,
+            "completed": self.completed,
+            "questions_answered": self.questions_answered,
+            "questions_skipped": self.questions_skipped,
+            "latency": latency,
+            "usage": {k: round(v, 2) for k, v in self.usage.items()},
+            "config": {**session_config(), "greeting_cached": self.greeting_cached},
+        }
+
+    async def publish(self, url: str) -> bool:
+        """Post the summary once the call is over; telemetry is best-effort, never retried."""
+        summary = self.summary()
+        parts = ", ".join(f"{k} p50={v['p50']:.3f}s p95={v['p95']:.3f}s" for k, v in summary["latency"].items())
+        logger.info(f"⏱️ Call latency: turns={self.turns} tools={self.tool_calls} {parts}")
+        if not url:
+            return False
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=SUBMIT_TIMEOUT_SECONDS)) as http:
+                async with http.post(url, json=summary) as resp:
+                    if resp.status >= 300:
+                        logger.warning(f"Call metrics post returned {resp.status}")
+                        return False
+                    return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Call metrics post failed: {e}")
+            return False
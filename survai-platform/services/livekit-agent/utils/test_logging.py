@@ -0,0 +1,88 @@
+"""
+Concurrency check for per-call log routing (utils.logging).
+
+Runs 20 simulated calls as concurrent asyncio tasks, each with its own call
+id, through setup_survey_logging / SurveyLogHandle and the queue listener.
+Every call logs from itself and from a child task and yields between lines
+so the calls interleave. Asserts that each call's file holds exactly that
+call's lines, and that lines logged after a call's handle is cleaned up
+(from the call itself, and from a child task that outlives it) reach no file.
+
+Usage (from services/livekit-agent):
+    python -m pytest utils/test_logging.py
+    python -m utils.test_logging
+"""
+
+import asyncio
+import glob
+import os
+import random
+import tempfile
+
+from utils import logging as survey_logging
+
+CALLS = 20
+LINES_PER_CALL = 50
+
+
+async def _call(index: int, late_tasks: list) -> str:
+    call_id = f"room-{index:02d}"
+    _, handle = survey_logging.setup_survey_logging(call_id, f"+1555000{index:04d}")
+    logger = survey_logging.get_logger()
+
+    async def child():
+        for line in range(LINES_PER_CALL):
+            logger.info(f"[{call_id}] child line {line}")
+            await asyncio.sleep(random.random() / 1000)
+
+    child_task = asyncio.create_task(child())
+    for line in range(LINES_PER_CALL):
+        logger.info(f"[{call_id}] line {line}")
+        await asyncio.sleep(random.random() / 1000)
+    await child_task
+
+    async def straggler():
+        # Inherits the call's context, but only runs once the call has closed its handle
+        await asyncio.sleep(0.01)
+        logger.info(f"[{call_id}] AFTER CLOSE from task")
+
+    late_tasks.append(asyncio.create_task(straggler()))
+    survey_logging.cleanup_survey_logging(handle)
+    logger.info(f"[{call_id}] AFTER CLOSE")
+    return call_id
+
+
+async def _run_calls() -> list:
+    late_tasks: list = []
+    call_ids = await asyncio.gather(*(_call(i, late_tasks) for i in range(CALLS)))
+    await asyncio.gather(*late_tasks)
+    return call_ids
+
+
+def test_concurrent_calls_write_only_their_own_lines():
+    with tempfile.TemporaryDirectory() as log_dir:
+        original_dir = survey_logging.LOG_DIR
+        survey_logging.LOG_DIR = log_dir
+        try:
+            call_ids = asyncio.run(_run_calls())
+        finally:
+            # Drains the queue, so every routed line is on disk
+            survey_logging.stop_log_listener()
+            survey_logging.LOG_DIR = original_dir
+
+        files = sorted(glob.glob(os.path.join(log_dir, "survey_*.log*")))
+        assert len(files) == CALLS, files
+        for call_id in call_ids:
+            (path,) = [f for f in files if f.endswith(f"_{call_id}.log")]
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            tagged = [line for line in lines if "SURVEY LOG FILE CREATED" not in line]
+            assert len(tagged) == 2 * LINES_PER_CALL, (call_id, len(tagged))
+            foreign = [line for line in tagged if f"[{call_id}]" not in line]
+            assert not foreign, (call_id, foreign[:3])
+            assert not [line for line in lines if "AFTER CLOSE" in line], call_id
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_write_only_their_own_lines()
+    print(f"ok: {CALLS} concurrent calls, {2 * LINES_PER_CALL} lines each, no misrouted lines")
@@ -0,0 +1,192 @@
+"""
+Pre-synthesized audio for fixed phrases.
+
+The greeting and the stock acknowledgements/goodbyes are the same text on
+every call, so their audio is synthesized once per (voice, model, text),
+kept in memory, and written to TTS_CACHE_DIR as WAV so new worker processes
+load it at prewarm instead of calling the TTS provider again. Cached audio
+is played directly as frames, skipping the provider's time-to-first-byte.
+"""
+
+import asyncio
+import hashlib
+import os
+import wave
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
+
+from livekit import rtc
+
+from config.settings import TTS_CACHE_DIR
+from utils.logging import get_logger
+
+logger = get_logger()
+
+# Cached audio is replayed in frames of this length so interruptions stay responsive
+_FRAME_MS = 50
+
+
+def normalize_phrase(text: str) -> str:
+    return " ".join(text.split())
+
+
+def tts_identity(tts) -> Tuple[str, str]:
+    """(voice, model) of a TTS plugin instance; part of every cache key."""
+    opts = getattr(tts, "_opts", None)
+    voice = getattr(opts, "voice_id", None) or getattr(opts, "voice", None) or ""
+    return str(voice), str(getattr(tts, "model", "") or "")
+
+
+@dataclass
+class CachedAudio:
+    pcm: bytes
+    sample_rate: int
+    num_channels: int
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / (2 * self.num_channels * self.sample_rate)
+
+    def frames(self) -> Iterator[rtc.AudioFrame]:
+        samples = self.sample_rate * _FRAME_MS // 1000
+        step = samples * self.num_channels * 2
+        for offset in range(0, len(self.pcm), step):
+            chunk = self.pcm[offset:offset + step]
+            yield rtc.AudioFrame(
+                data=chunk,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(chunk) // (2 * self.num_channels),
+            )
+
+
+def _read_wav(path: str) -> Optional[CachedAudio]:
+    try:
+        with wave.open(path, "rb") as wav:
+            return CachedAudio(wav.readframes(wav.getnframes()), wav.getframerate(), wav.getnchannels())
+    except (OSError, EOFError, wave.Error):
+        return None
+
+
+def _write_wav(path: str, audio: CachedAudio) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with wave.open(tmp, "wb") as wav:
+        wav.setnchannels(audio.num_channels)
+        wav.setsampwidth(2)
+        wav.setframerate(audio.sample_rate)
+        wav.writeframes(audio.pcm)
+    os.replace(tmp, path)
+
+
+class PhraseAudioCache:
+    """One per worker process; filled from disk at prewarm and topped up by the first job."""
+
+    def __init__(self, cache_dir: str = TTS_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._audio: Dict[str, CachedAudio] = {}
+        # Normalized texts with audio in memory, for matching LLM output
+        self._texts: Set[str] = set()
+        self._warm_task: Optional[asyncio.Task] = None
+
+    def _key(self, voice: str, model: str, text: str) -> str:
+        raw = f"{voice}\x1f{model}\x1f{normalize_phrase(text)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _put(self, key: str, text: str, audio: CachedAudio) -> None:
+        self._audio[key] = audio
+        self._texts.add(normalize_phrase(text))
+
+    # ─── Lookup ──────────────────────────────────────────────────────────────
+
+    def get(self, voice: str, model: str, text: str) -> Optional[CachedAudio]:
+        return self._audio.get(self._key(voice, model, text))
+
+    def might_match(self, partial_text: str) -> bool:
+        """True while streamed text could still turn out to be a cached phrase."""
+        partial = normalize_phrase(partial_text)
+        return any(text.startswith(partial) for text in self._texts)
+
+    # ─── Filling ─────────────────────────────────────────────────────────────
+
+    def load(self, voice: str, model: str, phrases: List[str]) -> int:
+        """Load whatever audio is already on disk (blocking; meant for prewarm)."""
+        loaded = 0
+        for text in phrases:
+            key = self._key(voice, model, text)
+            if key in self._audio:
+                continue
+            audio = _read_wav(self._path(key))
+            if audio is not None:
+                self._put(key, text, audio)
+                loaded += 1
+        return loaded
+
+    async def stream(self, tts, text: str) -> AsyncIterator[rtc.AudioFrame]:
+        """Yield cached frames, or synthesize live (yielding as it arrives) and cache the result."""
+        voice, model = tts_identity(tts)
+        key = self._key(voice, model, text)
+        audio = self._audio.get(key)
+        if audio is not None:
+            for frame in audio.frames():
+                yield frame
+            return
+
+        frames = []
+        async with tts.synthesize(text) as synth:
+            async for ev in synth:
+                frames.append(ev.frame)
+                yield ev.frame
+        if frames:
+            await self._store(key, text, frames)
+
+    async def synthesize(self, tts, text: str) -> Optional[CachedAudio]:
+        voice, model = tts_identity(tts)
+        key = self._key(voice, model, text)
+        if key not in self._audio:
+            async with tts.synthesize(text) as synth:
+                frames = [ev.frame async for ev in synth]
+            if frames:
+                await self._store(key, text, frames)
+        return self._audio.get(key)
+
+    async def _store(self, key: str, text: str, frames: List[rtc.AudioFrame]) -> None:
+        combined = rtc.combine_audio_frames(frames)
+        audio = CachedAudio(bytes(combined.data), combined.sample_rate, combined.num_channels)
+        self._put(key, text, audio)
+        try:
+            await asyncio.to_thread(_write_wav, self._path(key), audio)
+        except OSError as e:
+            logger.warning(f"TTS cache write failed for '{text[:40]}': {e}")
+
+    def warm_later(self, tts, phrases: List[str]) -> None:
+        """Synthesize missing phrases in the background of the current job (once per process)."""
+        if self._warm_task is not None and not self._warm_task.done():
+            return
+        voice, model = tts_identity(tts)
+        missing = [p for p in phrases if self._key(voice, model, p) not in self._audio]
+        if missing:
+            self._warm_task = asyncio.create_task(self._warm(tts, missing))
+
+    async def _warm(self, tts, phrases: List[str]) -> None:
+        warmed = 0
+        for text in phrases:
+            try:
+                if await self.synthesize(tts, text) is not None:
+                    warmed += 1
+            except Exception as e:
+                logger.warning(f"TTS cache warm failed for '{text[:40]}': {e}")
+        logger.info(f"🔊 TTS cache warmed {warmed}/{len(phrases)} phrases")
+
+
+_cache: Optional[PhraseAudioCache] = None
+
+
+def get_phrase_cache() -> PhraseAudioCache:
+    global _cache
+    if _cache is None:
+        _cache = PhraseAudioCache()
+    return _cache
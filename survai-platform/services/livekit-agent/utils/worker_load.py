@@ -0,0 +1,198 @@
+"""
+Load reporting for survey-agent workers.
+
+The LiveKit server stops dispatching to a worker once its reported load
+reaches load_threshold. Instead of the SDK's default CPU-only figure, the
+load here is the highest of three terms for the worker process tree
+(the worker plus its job subprocesses):
+
+  - active calls / MAX_CONCURRENT_CALLS * load_threshold
+  - CPU use / available cores
+  - RSS / WORKER_MEMORY_BUDGET_MB * load_threshold
+
+The call and memory terms are limits, scaled so that reaching them is
+reaching the threshold: a worker takes exactly MAX_CONCURRENT_CALLS calls.
+CPU is compared with the threshold directly. When headroom_calls is 0 the
+reported load is raised to the threshold, so accepting_calls, the load sent
+to LiveKit and headroom_calls always agree.
+
+The latest snapshot is served on WORKER_METRICS_PORT (/metrics in
+Prometheus text format, /health as JSON) so an orchestrator can scale
+workers on active calls and remaining headroom.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+import psutil
+
+from config.settings import (
+    JOB_MEMORY_WARN_MB,
+    LOAD_THRESHOLD,
+    MAX_CONCURRENT_CALLS,
+    WORKER_MEMORY_BUDGET_MB,
+    WORKER_METRICS_PORT,
+)
+from utils.logging import get_logger
+
+logger = get_logger()
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return psutil.cpu_count() or 1
+
+
+class WorkerLoadMonitor:
+    """Callable passed as WorkerOptions.load_fnc; returns load in [0, 1]."""
+
+    def __init__(
+        self,
+        max_calls: int = MAX_CONCURRENT_CALLS,
+        memory_budget_mb: float = WORKER_MEMORY_BUDGET_MB,
+        load_threshold: float = LOAD_THRESHOLD,
+    ):
+        self.max_calls = max(1, max_calls)
+        self.memory_budget_mb = memory_budget_mb
+        self.load_threshold = load_threshold
+        self.cores = _available_cores()
+        self._root = psutil.Process()
+        self._procs: Dict[int, psutil.Process] = {}
+        self._lock = threading.Lock()
+        self._snapshot: dict = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _sample_tree(self) -> tuple[float, float]:
+        """(cpu percent of one core, RSS in MB) summed over the worker and its job processes."""
+        try:
+            current = [self._root] + self._root.children(recursive=True)
+        except psutil.Error:
+            current = [self._root]
+        alive = {}
+        cpu = rss = 0.0
+        for proc in current:
+            # Reuse Process objects so cpu_percent() measures since the previous sample
+            proc = self._procs.get(proc.pid, proc)
+            try:
+                cpu += proc.cpu_percent(interval=None)
+                rss += proc.memory_info().rss
+            except psutil.Error:
+                continue
+            alive[proc.pid] = proc
+        self._procs = alive
+        return cpu, rss / (1024 * 1024)
+
+    def measure(self, active_calls: int) -> dict:
+        cpu_percent, rss_mb = self._sample_tree()
+        cpu_capacity = 100.0 * self.cores
+
+        call_load = active_calls / self.max_calls * self.load_threshold
+        cpu_load = cpu_percent / cpu_capacity
+        memory_load = rss_mb / self.memory_budget_mb * self.load_threshold if self.memory_budget_mb > 0 else 0.0
+
+        # Headroom: how many more calls fit before any limit is hit
+        slots = self.max_calls - active_calls
+        if self.memory_budget_mb > 0:
+            rss_per_call = rss_mb / active_calls if active_calls else float(JOB_MEMORY_WARN_MB)
+            memory_headroom = math.floor((self.memory_budget_mb - rss_mb) / rss_per_call) if rss_per_call > 0 else slots
+        else:
+            memory_headroom = slots
+        if active_calls and cpu_percent > 0:
+            cpu_per_call = cpu_percent / active_calls
+            cpu_headroom = math.floor((cpu_capacity * self.load_threshold - cpu_percent) / cpu_per_call)
+        else:
+            cpu_headroom = slots if cpu_load < self.load_threshold else 0
+        headroom = max(0, min(slots, memory_headroom, cpu_headroom))
+
+        load = max(call_load, cpu_load, memory_load)
+        if headroom == 0:
+            # Another call would cross a limit: stop dispatch now rather than after it lands
+            load = max(load, self.load_threshold)
+        load = min(1.0, load)
+
+        snapshot = {
+            "active_calls": active_calls,
+            "max_calls": self.max_calls,
+            "headroom_calls": headroom,
+            "cpu_percent": round(cpu_percent, 1),
+            "cpu_cores": self.cores,
+            "rss_mb": round(rss_mb, 1),
+            "rss_per_call_mb": round(rss_mb / active_calls, 1) if active_calls else None,
+            "memory_budget_mb": self.memory_budget_mb,
+            # Unrounded: rounding could lift a just-under-threshold load to the threshold
+            "load": load,
+            "load_threshold": self.load_threshold,
+            "accepting_calls": headroom > 0,
+            "sampled_at": time.time(),
+        }
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def __call__(self, worker) -> float:
+        if self._server is None:
+            self.start_http_server()
+        return self.measure(len(worker.active_jobs))["load"]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._snapshot)
+
+    def prometheus(self) -> str:
+        snap = self.snapshot()
+        lines = []
+        for name, key, help_text in (
+            ("survey_agent_active_calls", "active_calls", "Calls currently running on this worker"),
+            ("survey_agent_max_calls", "max_calls", "Configured max concurrent calls per worker"),
+            ("survey_agent_headroom_calls", "headroom_calls", "Additional calls this worker can take"),
+            ("survey_agent_cpu_percent", "cpu_percent", "CPU use of the worker process tree (100 = one core)"),
+            ("survey_agent_rss_mb", "rss_mb", "Resident memory of the worker process tree"),
+            ("survey_agent_load", "load", "Load reported to LiveKit (0-1)"),
+            ("survey_agent_load_threshold", "load_threshold", "Load at which the worker stops accepting jobs"),
+        ):
+            value = snap.get(key)
+            if value is None:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port: int = WORKER_METRICS_PORT) -> None:
+        """Serve /metrics and /health from a daemon thread (never on the event loop)."""
+        monitor = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = monitor.prometheus().encode(), "text/plain; version=0.0.4"
+                elif self.path == "/health":
+                    body, content_type = json.dumps({"status": "ok", **monitor.snapshot()}).encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(("0.0.0.0", port), _Handler)
+        except OSError as e:
+            logger.error(f"Worker metrics server failed to bind :{port}: {e}")
+            # Don't retry on every load sample
+            self._server = False
+            return
+        threading.Thread(target=self._server.serve_forever, name="worker-metrics", daemon=True).start()
+        logger.info(f"Worker metrics on :{port}/metrics (max {self.max_calls} calls, threshold {self.load_threshold})")
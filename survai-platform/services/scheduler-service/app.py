@@ -1,6 +1,6 @@
 """
 Scheduler Service -- Port 8070
-APScheduler for delayed calls and recurring campaigns.
+Postgres job queue for delayed calls and recurring campaigns; safe to run as several replicas.
 """
 
 import sys
@@ -22,12 +22,27 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Scheduler Service starting up...")
-    from routes.scheduler import get_scheduler
-    sched = get_scheduler()
-    sched.start()
+    import job_queue
+    from campaign_executor import get_campaign_executor
+    from job_history import get_history_writer
+    executor = get_campaign_executor()
+    try:
+        resumed = executor.resume_interrupted()
+        if resumed:
+            logger.info(f"Resumed {resumed} interrupted campaign run(s)")
+    except Exception as e:
+        logger.error(f"Campaign run resume error: {e}")
+    try:
+        from routes.scheduler import ensure_system_jobs
+        ensure_system_jobs()
+    except Exception as e:
+        logger.error(f"System job setup error: {e}")
+    job_queue.start_worker(on_heartbeat=executor.heartbeat)
     yield
     logger.info("Scheduler Service shutting down...")
-    sched.shutdown(wait=False)
+    job_queue.stop_worker()
+    executor.shutdown()
+    get_history_writer().stop()
 
 
 app = FastAPI(
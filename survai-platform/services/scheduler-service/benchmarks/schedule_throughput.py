@@ -0,0 +1,161 @@
+"""
+Scheduling throughput: call jobs persisted per second, one at a time vs bulk.
+
+Modes (each run once per batch size in --batches):
+  - single: one job per write, like /scheduler/schedule-call
+  - bulk:   --jobs jobs through enqueue_many / /scheduler/schedule-calls in
+            batches of the given size, one transaction per batch
+  - dedup:  the same bulk batches submitted again; every job is a duplicate
+            of a pending one (the path a retried callback import takes)
+
+By default the benchmark writes through job_queue directly (DB_* env, same
+as the service). With --url it goes through a running scheduler-service
+instead, so HTTP and validation costs are included.
+
+Benchmark jobs are scheduled a year out so no worker claims them, and are
+deleted from scheduled_jobs afterwards (this needs DB access in --url mode too).
+
+Usage:
+    python -m benchmarks.schedule_throughput                      # direct, 5000 jobs
+    python -m benchmarks.schedule_throughput --jobs 20000 --batches 500,2000,10000
+    python -m benchmarks.schedule_throughput --url http://localhost:8070 --single-jobs 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import job_queue  # noqa: E402
+from db import sql_execute  # noqa: E402
+
+FAR_FUTURE = timedelta(days=365)
+
+
+def _jobs(prefix: str, count: int) -> list:
+    run_at = datetime.now(timezone.utc) + FAR_FUTURE
+    return [
+        {
+            "payload": {"survey_id": f"{prefix}-{i}", "phone": f"+1555{i:07d}"},
+            "run_at": run_at,
+            "dedup_key": f"call:{prefix}-{i}",
+        }
+        for i in range(count)
+    ]
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class DirectTarget:
+    name = "direct"
+
+    def single(self, job: dict) -> None:
+        job_queue.enqueue("call", job["payload"], job["run_at"], max_attempts=3, dedup_key=job["dedup_key"])
+
+    def bulk(self, jobs: list) -> list:
+        return job_queue.enqueue_many("call", jobs, max_attempts=3)
+
+
+class HttpTarget:
+    name = "http"
+
+    def __init__(self, url: str):
+        self.base = url.rstrip("/") + "/api/scheduler"
+        self.client = httpx.Client(timeout=300.0)
+
+    def single(self, job: dict) -> None:
+        r = self.client.post(
+            f"{self.base}/schedule-call",
+            params={
+                "survey_id": job["payload"]["survey_id"],
+                "phone": job["payload"]["phone"],
+                "delay_seconds": int(FAR_FUTURE.total_seconds()),
+            },
+        )
+        r.raise_for_status()
+
+    def bulk(self, jobs: list) -> list:
+        calls = [{**job["payload"], "run_at": job["run_at"].isoformat()} for job in jobs]
+        r = self.client.post(f"{self.base}/schedule-calls", json={"calls": calls})
+        r.raise_for_status()
+        return r.json()["jobs"]
+
+
+def _timed(label: str, batch: int, count: int, fn) -> dict:
+    started = time.perf_counter()
+    statuses = fn()
+    seconds = time.perf_counter() - started
+    row = {
+        "mode": label,
+        "batch": batch,
+        "jobs": count,
+        "seconds": round(seconds, 3),
+        "jobs_per_second": round(count / seconds, 1) if seconds else 0.0,
+    }
+    if statuses:
+        row["statuses"] = {s: sum(1 for r in statuses if r["status"] == s) for s in {r["status"] for r in statuses}}
+    print(f"  {label:<7} batch={batch:<6} {count:>7} jobs  {seconds:>8.2f}s  {row['jobs_per_second']:>9.1f} jobs/s",
+          file=sys.stderr)
+    return row
+
+
+def run(target, total: int, single_count: int, batches: list) -> list:
+    run_id = f"bench-{uuid4().hex[:8]}"
+    results = []
+    try:
+        if single_count:
+            jobs = _jobs(f"{run_id}-single", single_count)
+
+            def _single():
+                for job in jobs:
+                    target.single(job)
+
+            results.append(_timed("single", 1, single_count, _single))
+        for batch in batches:
+            jobs = _jobs(f"{run_id}-b{batch}", total)
+
+            def _bulk(jobs=jobs, batch=batch):
+                out = []
+                for chunk in _chunks(jobs, batch):
+                    out.extend(target.bulk(chunk))
+                return out
+
+            results.append(_timed("bulk", batch, total, _bulk))
+            results.append(_timed("dedup", batch, total, _bulk))
+    finally:
+        sql_execute("DELETE FROM scheduled_jobs WHERE dedup_key LIKE :prefix", {"prefix": f"call:{run_id}-%"})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=5000, help="jobs per bulk run")
+    parser.add_argument("--single-jobs", type=int, default=500, help="jobs for the one-at-a-time baseline (0 to skip)")
+    parser.add_argument("--batches", default="100,1000,5000", help="comma-separated bulk batch sizes")
+    parser.add_argument("--url", help="scheduler-service base URL (default: write through job_queue directly)")
+    parser.add_argument("--json", help="write the results here")
+    args = parser.parse_args()
+
+    target = HttpTarget(args.url) if args.url else DirectTarget()
+    batches = [int(b) for b in args.batches.split(",") if b]
+    print(f"{target.name}: {args.single_jobs} single, {args.jobs} per bulk run, batches {batches}", file=sys.stderr)
+    results = run(target, args.jobs, args.single_jobs, batches)
+
+    single = next((r for r in results if r["mode"] == "single"), None)
+    best = max((r for r in results if r["mode"] == "bulk"), key=lambda r: r["jobs_per_second"], default=None)
+    if single and best:
+        speedup = best["jobs_per_second"] / single["jobs_per_second"] if single["jobs_per_second"] else 0.0
+        print(f"best bulk (batch {best['batch']}): {speedup:.0f}x the one-at-a-time rate", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"target": target.name, "results": results}, f, indent=2)
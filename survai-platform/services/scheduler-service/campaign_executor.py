@@ -0,0 +1,452 @@
+"""
+Campaign execution: dial a campaign's audience with bounded concurrency.
+
+A run places calls through voice-service's make-call with:
+  - at most max_concurrency calls in flight per run
+  - at most calls_per_minute dispatches per run (evenly spaced)
+  - at most TENANT_MAX_CONCURRENT_CALLS in flight per tenant across all runs
+    and replicas (counted in campaign_run_calls, see below)
+  - dispatches only inside the calling-hour window (campaign timezone)
+  - holds dialing through hours with a poor answer rate (retry_planner)
+
+Every survey is recorded in campaign_run_calls before it is dialed, so a run
+interrupted by a restart resumes with the surveys it has not attempted yet
+and never dials a rider twice. Before a page of the audience is dialed, its
+phones are sent to livekit-agent's /riders/warm so the agent's rider lookups
+for those calls hit its cache; warming is best effort and never holds a run. Runs are tracked in campaign_runs; at most
+one run per campaign is active at a time.
+
+A run is owned by one replica through a lease it renews on every heartbeat.
+When a replica stops or dies, another one adopts the run once the lease is
+released or expires; cancelling a run on any replica stops it on its owner
+at the owner's next heartbeat.
+
+The tenant cap is enforced in Postgres: a call takes a slot by inserting
+its 'dialing' ledger row under a transaction-scoped advisory lock on the
+tenant, only while fewer than TENANT_MAX_CONCURRENT_CALLS of the tenant's
+rows are 'dialing'. Rows still 'dialing' after TENANT_SLOT_STALE_SECONDS
+(left by a replica that died mid-call) stop counting. Each replica also
+keeps an in-process semaphore per tenant, so its own runs queue locally
+rather than polling the database for a slot.
+
+All runs of a replica share one event loop on a background thread, so one
+slow call only holds its own slot.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, time as dtime, timedelta, timezone
+from typing import Dict, Optional
+from uuid import uuid4
+from zoneinfo import ZoneInfo
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from db import get_engine, sql_execute
+from retry_planner import get_planner
+
+logger = logging.getLogger(__name__)
+
+VOICE_SERVICE_URL = os.getenv("VOICE_SERVICE_URL", "http://voice-service:8017")
+CAMPAIGN_MAX_CONCURRENCY = int(os.getenv("CAMPAIGN_MAX_CONCURRENCY", "10"))
+CAMPAIGN_CALLS_PER_MINUTE = float(os.getenv("CAMPAIGN_CALLS_PER_MINUTE", "30"))
+TENANT_MAX_CONCURRENT_CALLS = int(os.getenv("TENANT_MAX_CONCURRENT_CALLS", "20"))
+CALLING_HOURS_START = os.getenv("CALLING_HOURS_START", "09:00")
+CALLING_HOURS_END = os.getenv("CALLING_HOURS_END", "20:00")
+CALLING_TIMEZONE = os.getenv("CALLING_TIMEZONE", "America/New_York")
+MAKE_CALL_TIMEOUT = float(os.getenv("MAKE_CALL_TIMEOUT", "30"))
+LIVEKIT_AGENT_URL = os.getenv("LIVEKIT_AGENT_URL", "http://livekit-agent:8000")
+RIDER_WARM_TIMEOUT = float(os.getenv("RIDER_WARM_TIMEOUT", "10"))
+AUDIENCE_PAGE_SIZE = 500
+RUN_LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", "60"))
+# A 'dialing' row older than this is from a replica that died mid-call and no longer holds a tenant slot
+TENANT_SLOT_STALE_SECONDS = float(os.getenv("TENANT_SLOT_STALE_SECONDS", str(MAKE_CALL_TIMEOUT * 2)))
+TENANT_SLOT_POLL_SECONDS = 1.0
+
+
+def _parse_hhmm(value: str) -> dtime:
+    hours, minutes = value.split(":")
+    return dtime(int(hours), int(minutes))
+
+
+class CallingWindow:
+    """Daily [start, end) local-time window in which calls may be placed."""
+
+    def __init__(self, start: str = CALLING_HOURS_START, end: str = CALLING_HOURS_END, tz: str = CALLING_TIMEZONE):
+        self.start = _parse_hhmm(start)
+        self.end = _parse_hhmm(end)
+        self.tz = ZoneInfo(tz)
+
+    def seconds_until_open(self, now: Optional[datetime] = None) -> float:
+        """0 if calls may be placed now, else seconds until the window next opens."""
+        local = (now or datetime.now(self.tz)).astimezone(self.tz)
+        if self.start <= local.time() < self.end:
+            return 0.0
+        opens = local.replace(hour=self.start.hour, minute=self.start.minute, second=0, microsecond=0)
+        if local.time() >= self.end:
+            opens += timedelta(days=1)
+        return (opens - local).total_seconds()
+
+
+class RunSettings:
+    """Per-run limits: env defaults, overridden by campaigns.config['execution']."""
+
+    def __init__(self, config: Optional[dict] = None):
+        config = (config or {}).get("execution", {}) if isinstance(config, dict) else {}
+        hours = config.get("calling_hours", {})
+        self.max_concurrency = max(1, int(config.get("max_concurrency", CAMPAIGN_MAX_CONCURRENCY)))
+        # Hold dialing through hours the answer-rate model rates poorly
+        self.optimize_call_times = bool(config.get("optimize_call_times", True))
+        self.calls_per_minute = max(0.1, float(config.get("calls_per_minute", CAMPAIGN_CALLS_PER_MINUTE)))
+        self.window = CallingWindow(
+            hours.get("start", CALLING_HOURS_START),
+            hours.get("end", CALLING_HOURS_END),
+            hours.get("timezone", CALLING_TIMEZONE),
+        )
+
+
+class CampaignExecutor:
+    """Runs campaigns on a dedicated event loop thread."""
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="campaign-executor", daemon=True)
+        self._thread.start()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tenant_slots: Dict[str, asyncio.Semaphore] = {}
+        self._runs: Dict[str, asyncio.Task] = {}
+
+    # ─── Public API (any thread) ─────────────────────────────────────────────
+
+    def start_run(self, campaign_id: str) -> Optional[str]:
+        """Start a run for the campaign; returns its run id, or None if one is already active."""
+        run_id = str(uuid4())
+        try:
+            sql_execute(
+                """INSERT INTO campaign_runs (id, campaign_id, status, started_at, updated_at, lease_owner, lease_expires_at)
+                   VALUES (:id, :cid, 'running', NOW(), NOW(), :owner, NOW() + make_interval(secs => :lease))""",
+                {"id": run_id, "cid": campaign_id, "owner": self.owner, "lease": RUN_LEASE_SECONDS},
+            )
+        except IntegrityError:
+            logger.info(f"Campaign {campaign_id} already has an active run; not starting another")
+            return None
+        self._submit(run_id, campaign_id)
+        return run_id
+
+    def resume_interrupted(self) -> int:
+        """Adopt runs whose owner stopped or died (lease released or expired). Returns how many."""
+        runs = sql_execute(
+            """UPDATE campaign_runs r
+               SET lease_owner = :owner, lease_expires_at = NOW() + make_interval(secs => :lease), updated_at = NOW()
+               FROM (
+                   SELECT id FROM campaign_runs
+                   WHERE status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+                   FOR UPDATE SKIP LOCKED
+               ) orphaned
+               WHERE r.id = orphaned.id
+               RETURNING r.id, r.campaign_id""",
+            {"owner": self.owner, "lease": RUN_LEASE_SECONDS},
+        )
+        for run in runs:
+            logger.info(f"Resuming campaign run {run['id']} (campaign {run['campaign_id']})")
+            self._submit(run["id"], run["campaign_id"])
+        return len(runs)
+
+    def heartbeat(self) -> None:
+        """Renew the leases of this replica's runs; stop runs cancelled elsewhere; adopt orphans."""
+        active = list(self._runs)
+        if active:
+            renewed = sql_execute(
+                """UPDATE campaign_runs
+                   SET lease_expires_at = NOW() + make_interval(secs => :lease), updated_at = NOW()
+                   WHERE id = ANY(:ids) AND lease_owner = :owner AND status = 'running'
+                   RETURNING id""",
+                {"ids": active, "owner": self.owner, "lease": RUN_LEASE_SECONDS},
+            )
+            kept = {row["id"] for row in renewed}
+            for run_id in active:
+                task = self._runs.get(run_id)
+                if run_id not in kept and task is not None:
+                    logger.info(f"Campaign run {run_id} was cancelled or taken over; stopping it here")
+                    self._loop.call_soon_threadsafe(task.cancel)
+        self.resume_interrupted()
+
+    def cancel_run(self, run_id: str) -> bool:
+        """Cancel a run on whichever replica owns it. False if it is not running."""
+        rows = sql_execute(
+            """UPDATE campaign_runs SET status = 'cancelled', finished_at = NOW(), updated_at = NOW()
+               WHERE id = :id AND status = 'running'
+               RETURNING id""",
+            {"id": run_id},
+        )
+        task = self._runs.get(run_id)
+        if task is not None:
+            self._loop.call_soon_threadsafe(task.cancel)
+        return bool(rows)
+
+    def shutdown(self) -> None:
+        """Stop dispatching; active runs stay 'running' and are adopted by another replica or the next start."""
+        async def _stop():
+            tasks = list(self._runs.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._client is not None:
+                await self._client.aclose()
+
+        active = list(self._runs)
+        asyncio.run_coroutine_threadsafe(_stop(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if active:
+            sql_execute(
+                """UPDATE campaign_runs SET lease_owner = NULL, lease_expires_at = NULL
+                   WHERE id = ANY(:ids) AND lease_owner = :owner AND status = 'running'""",
+                {"ids": active, "owner": self.owner},
+            )
+
+    # ─── Run loop ────────────────────────────────────────────────────────────
+
+    def _submit(self, run_id: str, campaign_id: str) -> None:
+        def _create():
+            if run_id in self._runs:
+                return
+            task = self._loop.create_task(self._run(run_id, campaign_id))
+            self._runs[run_id] = task
+            task.add_done_callback(lambda _: self._runs.pop(run_id, None))
+
+        self._loop.call_soon_threadsafe(_create)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=MAKE_CALL_TIMEOUT,
+                limits=httpx.Limits(max_connections=CAMPAIGN_MAX_CONCURRENCY * 4),
+            )
+        return self._client
+
+    def _tenant_slot(self, tenant_id: str) -> asyncio.Semaphore:
+        if tenant_id not in self._tenant_slots:
+            self._tenant_slots[tenant_id] = asyncio.Semaphore(TENANT_MAX_CONCURRENT_CALLS)
+        return self._tenant_slots[tenant_id]
+
+    async def _db(self, query: str, params: Optional[dict] = None):
+        return await asyncio.to_thread(sql_execute, query, params)
+
+    async def _run(self, run_id: str, campaign_id: str) -> None:
+        status, error = "completed", None
+        try:
+            campaign = await self._db("SELECT config FROM campaigns WHERE id = :id", {"id": campaign_id})
+            if not campaign:
+                raise ValueError(f"Campaign {campaign_id} not found")
+            settings = RunSettings(campaign[0].get("config"))
+            dispatched = await self._dispatch_audience(run_id, campaign_id, settings)
+            logger.info(f"Campaign run {run_id} ({campaign_id}): dispatched {dispatched} calls")
+        except asyncio.CancelledError:
+            # Shutdown or cancel_run(): leave the row as is so a restart can resume
+            raise
+        except Exception as e:
+            status, error = "failed", str(e)
+            logger.error(f"Campaign run {run_id} error: {e}")
+        await self._db(
+            """UPDATE campaign_runs SET status = :status, error = :error, finished_at = NOW(), updated_at = NOW(),
+                      lease_owner = NULL, lease_expires_at = NULL
+               WHERE id = :id AND status = 'running' AND lease_owner = :owner""",
+            {"id": run_id, "status": status, "error": error, "owner": self.owner},
+        )
+
+    async def _dispatch_audience(self, run_id: str, campaign_id: str, settings: RunSettings) -> int:
+        run_slots = asyncio.Semaphore(settings.max_concurrency)
+        interval = 60.0 / settings.calls_per_minute
+        loop = asyncio.get_running_loop()
+        next_slot = loop.time()
+        in_flight = set()
+        dispatched = 0
+        after = ""
+        planner = get_planner()
+        yield_checked = set()  # (tenant, hour) already found good enough to dial
+
+        try:
+            while True:
+                # Surveys this run has not attempted yet (idx_surveys_campaign_dialable + ledger PK)
+                page = await self._db(
+                    """SELECT s.id, s.phone, COALESCE(s.tenant_id, '') AS tenant_id
+                       FROM surveys s
+                       WHERE s.campaign_id = :cid AND s.status = 'In-Progress'
+                         AND s.phone IS NOT NULL AND s.phone != '' AND s.id > :after
+                         AND NOT EXISTS (
+                             SELECT 1 FROM campaign_run_calls c WHERE c.run_id = :rid AND c.survey_id = s.id
+                         )
+                       ORDER BY s.id
+                       LIMIT :limit""",
+                    {"cid": campaign_id, "rid": run_id, "after": after, "limit": AUDIENCE_PAGE_SIZE},
+                )
+                if not page:
+                    break
+                after = page[-1]["id"]
+                await self._warm_riders(run_id, page)
+
+                for survey in page:
+                    wait = settings.window.seconds_until_open()
+                    if wait:
+                        logger.info(f"Campaign run {run_id}: outside calling hours, waiting {wait / 60:.0f} min")
+                        await asyncio.sleep(wait)
+                        next_slot = loop.time()
+
+                    if settings.optimize_call_times:
+                        hour_key = (survey["tenant_id"], datetime.now(timezone.utc).strftime("%Y%m%d%H"))
+                        if hour_key not in yield_checked:
+                            wait = await asyncio.to_thread(
+                                planner.seconds_until_good_hour, survey["tenant_id"], settings.window
+                            )
+                            if wait:
+                                logger.info(f"Campaign run {run_id}: low answer rate this hour, waiting {wait / 60:.0f} min")
+                                await asyncio.sleep(wait)
+                                next_slot = loop.time()
+                            else:
+                                yield_checked.add(hour_key)
+
+                    now = loop.time()
+                    if next_slot > now:
+                        await asyncio.sleep(next_slot - now)
+                    next_slot = max(next_slot, now) + interval
+
+                    await run_slots.acquire()
+                    tenant_slot = self._tenant_slot(survey["tenant_id"])
+                    await tenant_slot.acquire()
+                    task = asyncio.create_task(self._dial(run_id, survey))
+                    in_flight.add(task)
+
+                    def _release(t, tenant_slot=tenant_slot):
+                        in_flight.discard(t)
+                        tenant_slot.release()
+                        run_slots.release()
+
+                    task.add_done_callback(_release)
+                    dispatched += 1
+
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+        except asyncio.CancelledError:
+            for task in list(in_flight):
+                task.cancel()
+            raise
+        return dispatched
+
+    async def _warm_riders(self, run_id: str, page: list) -> None:
+        """Load the page's riders into livekit-agent's cache ahead of its calls."""
+        try:
+            r = await self._get_client().post(
+                f"{LIVEKIT_AGENT_URL}/riders/warm",
+                json={"phone_numbers": [survey["phone"] for survey in page]},
+                timeout=RIDER_WARM_TIMEOUT,
+            )
+            r.raise_for_status()
+            logger.info(f"Campaign run {run_id}: warmed riders for {len(page)} phones ({r.json().get('riders_found')} found)")
+        except Exception as e:
+            logger.warning(f"Campaign run {run_id}: rider warm failed, dialing with a cold cache: {e}")
+
+    async def _dial(self, run_id: str, survey: dict) -> None:
+        # Recorded before dialing: a restart never dials this survey again in this run
+        while True:
+            claim = await asyncio.to_thread(_claim_call, run_id, survey)
+            if claim != "full":
+                break
+            # Every slot of the tenant is taken by calls on this or other replicas
+            await asyncio.sleep(TENANT_SLOT_POLL_SECONDS)
+        if claim == "duplicate":
+            # Another replica dialed it while this one still thought it owned the run
+            return
+        status, error = "dispatched", None
+        try:
+            r = await self._get_client().post(
+                f"{VOICE_SERVICE_URL}/api/voice/make-call",
+                params={"survey_id": survey["id"], "phone": survey["phone"]},
+            )
+            r.raise_for_status()
+            logger.info(f"Campaign call triggered: survey={survey['id']}")
+        except Exception as e:
+            status, error = "failed", str(e)[:500]
+            logger.error(f"Campaign call failed for survey {survey['id']}: {e}")
+        await self._db(
+            """UPDATE campaign_run_calls SET status = :status, error = :error, finished_at = NOW()
+               WHERE run_id = :rid AND survey_id = :sid""",
+            {"rid": run_id, "sid": survey["id"], "status": status, "error": error},
+        )
+
+
+def _claim_call(run_id: str, survey: dict) -> str:
+    """
+    Record the survey as 'dialing' if its tenant has a free slot across all replicas.
+    Returns 'claimed', 'full' (no slot; nothing recorded) or 'duplicate' (already in the ledger).
+    """
+    with get_engine().begin() as conn:
+        # Serialises claims for the tenant until commit, so two replicas can't both take the last slot
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('campaign_tenant_calls:' || :tenant))"),
+                     {"tenant": survey["tenant_id"]})
+        in_flight = conn.execute(
+            text("""SELECT COUNT(*) FROM campaign_run_calls
+                    WHERE tenant_id = :tenant AND status = 'dialing'
+                      AND dispatched_at > NOW() - make_interval(secs => :stale)"""),
+            {"tenant": survey["tenant_id"], "stale": TENANT_SLOT_STALE_SECONDS},
+        ).scalar()
+        if in_flight >= TENANT_MAX_CONCURRENT_CALLS:
+            return "full"
+        recorded = conn.execute(
+            text("""INSERT INTO campaign_run_calls (run_id, survey_id, tenant_id, status, dispatched_at)
+                    VALUES (:rid, :sid, :tenant, 'dialing', NOW()) ON CONFLICT DO NOTHING
+                    RETURNING survey_id"""),
+            {"rid": run_id, "sid": survey["id"], "tenant": survey["tenant_id"]},
+        ).fetchone()
+    return "claimed" if recorded else "duplicate"
+
+
+def run_progress(run_id: str) -> Optional[dict]:
+    """Counts for a run; 'dialing' left by a crash means the outcome is unknown (not retried)."""
+    rows = sql_execute(
+        """SELECT r.id, r.campaign_id, r.status, r.error, r.started_at, r.updated_at, r.finished_at,
+                  COUNT(c.survey_id) AS attempted,
+                  COUNT(c.survey_id) FILTER (WHERE c.status = 'dispatched') AS dispatched,
+                  COUNT(c.survey_id) FILTER (WHERE c.status = 'failed') AS failed,
+                  COUNT(c.survey_id) FILTER (WHERE c.status = 'dialing') AS dialing,
+                  (SELECT COUNT(*) FROM surveys s
+                   WHERE s.campaign_id = r.campaign_id AND s.status = 'In-Progress'
+                     AND s.phone IS NOT NULL AND s.phone != ''
+                     AND NOT EXISTS (
+                         SELECT 1 FROM campaign_run_calls c2 WHERE c2.run_id = r.id AND c2.survey_id = s.id
+                     )) AS remaining
+           FROM campaign_runs r
+           LEFT JOIN campaign_run_calls c ON c.run_id = r.id
+           WHERE r.id = :id
+           GROUP BY r.id""",
+        {"id": run_id},
+    )
+    if not rows:
+        return None
+    row = dict(rows[0])
+    for key in ("started_at", "updated_at", "finished_at"):
+        row[key] = row[key].isoformat() if row[key] else None
+    return row
+
+
+_executor: Optional[CampaignExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_campaign_executor() -> CampaignExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = CampaignExecutor()
+    return _executor
+
+
+def run_campaign_job(campaign_id: str) -> None:
+    """Entry point for scheduled campaign jobs: start a run on this replica."""
+    logger.info(f"Campaign job executing: {campaign_id}")
+    get_campaign_executor().start_run(campaign_id)
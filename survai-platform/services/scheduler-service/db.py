@@ -1,6 +1,6 @@
 """
 Database operations for the Scheduler Service.
-Reads/Writes: campaigns, surveys, job_history.
+Reads/Writes: campaigns, surveys, job_history, scheduled_jobs, campaign_runs.
 """
 
 import os
@@ -29,7 +29,7 @@ def get_engine():
 def sql_execute(query: str, params: Union[dict, List[dict], None] = None) -> List[Dict[str, Any]]:
     """
     Execute a SQL query. For SELECT: returns list of dicts.
-    For mutations: commits and returns empty list.
+    For mutations: commits and returns empty list (or the RETURNING rows).
     """
     engine = get_engine()
     with engine.connect() as conn:
@@ -41,6 +41,7 @@ def sql_execute(query: str, params: Union[dict, List[dict], None] = None) -> Lis
         if result.returns_rows:
             rows = result.fetchall()
             columns = result.keys()
+            conn.commit()
             return [dict(zip(columns, row)) for row in rows]
         conn.commit()
         return []
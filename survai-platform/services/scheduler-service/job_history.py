@@ -0,0 +1,146 @@
+"""
+Buffered job_history writer and job metrics.
+
+Job outcomes are queued in memory and written in batches (one multi-row
+INSERT through the service's connection pool) when JOB_HISTORY_BATCH_SIZE
+outcomes are waiting or JOB_HISTORY_FLUSH_SECONDS have passed, instead of
+one connection and INSERT per job. A failed flush keeps the batch for the
+next attempt, up to JOB_HISTORY_MAX_BUFFER rows; beyond that the oldest
+are dropped (history is best-effort, jobs never wait on it).
+"""
+
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from db import sql_execute
+
+logger = logging.getLogger(__name__)
+
+JOB_HISTORY_BATCH_SIZE = int(os.getenv("JOB_HISTORY_BATCH_SIZE", "200"))
+JOB_HISTORY_FLUSH_SECONDS = float(os.getenv("JOB_HISTORY_FLUSH_SECONDS", "2"))
+JOB_HISTORY_MAX_BUFFER = 50000
+
+
+class JobHistoryWriter:
+    def __init__(self, batch_size: int = JOB_HISTORY_BATCH_SIZE, flush_seconds: float = JOB_HISTORY_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._buffer: deque = deque(maxlen=JOB_HISTORY_MAX_BUFFER)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="job-history", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+
+    def record(self, job_id: str, job_type: str, status: str, duration_ms: Optional[int] = None,
+               error: Optional[str] = None, run_time: Optional[datetime] = None) -> None:
+        """Queue one outcome (status: SUCCESS or FAILED)."""
+        with self._lock:
+            self._buffer.append({
+                "job_id": job_id,
+                "job_type": job_type,
+                "status": status,
+                "duration_ms": duration_ms,
+                "error": error[:1000] if error else None,
+                # job_history.run_time is naive UTC
+                "run_time": (run_time or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(tzinfo=None),
+            })
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            if not batch:
+                return 0
+            try:
+                sql_execute(
+                    """INSERT INTO job_history (job_id, job_type, run_time, status, duration_ms, error)
+                       VALUES (:job_id, :job_type, :run_time, :status, :duration_ms, :error)""",
+                    batch,
+                )
+            except Exception as e:
+                self.flush_errors += 1
+                logger.error(f"Job history flush failed ({len(batch)} rows kept for retry): {e}")
+                with self._lock:
+                    self._buffer.extendleft(reversed(batch))
+                return 0
+            self.written += len(batch)
+            self.flushes += 1
+            return len(batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            buffered = len(self._buffer)
+        return {
+            "buffered": buffered,
+            "written": self.written,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+        }
+
+
+def job_metrics(hours: int = 24) -> list:
+    """Success/failure counts and run-time percentiles per job type over the last `hours`."""
+    rows = sql_execute(
+        """SELECT COALESCE(job_type, 'unknown') AS job_type,
+                  COUNT(*) AS runs,
+                  COUNT(*) FILTER (WHERE status = 'SUCCESS') AS succeeded,
+                  COUNT(*) FILTER (WHERE status = 'FAILED') AS failed,
+                  percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms) AS p50_ms,
+                  percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms) AS p95_ms,
+                  percentile_cont(0.99) WITHIN GROUP (ORDER BY duration_ms) AS p99_ms,
+                  MAX(duration_ms) AS max_ms
+           FROM job_history
+           WHERE run_time > (NOW() AT TIME ZONE 'UTC') - make_interval(hours => :hours)
+           GROUP BY 1
+           ORDER BY runs DESC""",
+        {"hours": hours},
+    )
+    for row in rows:
+        row["success_rate"] = round(row["succeeded"] / row["runs"], 4) if row["runs"] else 0.0
+        row["failure_rate"] = round(row["failed"] / row["runs"], 4) if row["runs"] else 0.0
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            row[key] = round(row[key], 1) if row[key] is not None else None
+    return rows
+
+
+_writer: Optional[JobHistoryWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_history_writer() -> JobHistoryWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = JobHistoryWriter()
+            _writer.start()
+    return _writer
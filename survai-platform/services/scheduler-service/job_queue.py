@@ -0,0 +1,517 @@
+"""
+Postgres-backed job queue for scheduler-service.
+
+Jobs live in scheduled_jobs. Any number of replicas run a JobWorker against
+the same table:
+  - due jobs are claimed with FOR UPDATE SKIP LOCKED, so each job goes to
+    exactly one replica and replicas never wait on each other's claims
+  - a claimed job carries a lease (lease_owner, lease_expires_at) that the
+    worker renews while the job runs; if a replica dies, its jobs are
+    reclaimed by another replica once the lease expires. An expired lease
+    counts as a failed attempt: a job that has used all of its attempts
+    (one that keeps killing or hanging its replica) is not reclaimed but
+    failed by the next heartbeat, or, if recurring, moved to its next run
+  - results are written only while the worker still holds the lease, so a
+    job reclaimed after a stall is not completed twice
+  - failed jobs are retried with a delay up to max_attempts; recurring jobs
+    (interval_seconds) are rescheduled after each run
+
+Each worker publishes its counters to scheduler_workers on every heartbeat;
+queue_stats() combines them with the queue depth for all replicas.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from db import get_engine, sql_execute
+from job_history import get_history_writer
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_WORKER_CONCURRENCY = int(os.getenv("SCHEDULER_WORKER_CONCURRENCY", "8"))
+SCHEDULER_POLL_SECONDS = float(os.getenv("SCHEDULER_POLL_SECONDS", "1"))
+SCHEDULER_LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", "60"))
+ENQUEUE_BATCH_SIZE = 5000
+# Workers not seen for this long are left out of queue_stats()
+WORKER_STALE_SECONDS = SCHEDULER_LEASE_SECONDS * 2
+
+# kind -> handler(payload); a handler raising marks the attempt failed
+_handlers: Dict[str, Callable[[dict], None]] = {}
+# kind -> retry_delay(payload, attempts) in seconds
+_retry_delays: Dict[str, Callable[[dict, int], float]] = {}
+
+
+def register_handler(kind: str, handler: Callable[[dict], None],
+                     retry_delay: Optional[Callable[[dict, int], float]] = None) -> None:
+    _handlers[kind] = handler
+    if retry_delay is not None:
+        _retry_delays[kind] = retry_delay
+
+
+def enqueue(
+    kind: str,
+    payload: dict,
+    run_at: datetime,
+    job_id: Optional[str] = None,
+    max_attempts: int = 1,
+    interval_seconds: Optional[int] = None,
+    dedup_key: Optional[str] = None,
+) -> str:
+    """
+    Add a job; returns its id. If a pending or running job already has this
+    dedup_key, nothing is added and that job's id is returned.
+    """
+    job_id = job_id or str(uuid4())
+    rows = sql_execute(
+        """INSERT INTO scheduled_jobs (id, kind, payload, run_at, max_attempts, interval_seconds, dedup_key)
+           VALUES (:id, :kind, CAST(:payload AS JSONB), :run_at, :max_attempts, :interval_seconds, :dedup_key)
+           ON CONFLICT (dedup_key) WHERE status IN ('pending', 'running') DO NOTHING
+           RETURNING id""",
+        {
+            "id": job_id,
+            "kind": kind,
+            "payload": json.dumps(payload),
+            "run_at": run_at,
+            "max_attempts": max_attempts,
+            "interval_seconds": interval_seconds,
+            "dedup_key": dedup_key,
+        },
+    )
+    if rows:
+        return job_id
+    existing = sql_execute(
+        "SELECT id FROM scheduled_jobs WHERE dedup_key = :key AND status IN ('pending', 'running')",
+        {"key": dedup_key},
+    )
+    return existing[0]["id"] if existing else job_id
+
+
+def enqueue_many(kind: str, jobs: List[dict], max_attempts: int = 1, reschedule_duplicates: bool = False) -> List[dict]:
+    """
+    Add many jobs in one transaction. Each job is {"payload", "run_at", "dedup_key"}.
+
+    Jobs sharing a dedup_key with each other, or with a pending/running job,
+    collapse into one (the last one in the list wins). With
+    reschedule_duplicates, an existing pending job takes the new run_at and
+    payload; otherwise it is left as is.
+
+    Returns one {"job_id", "status", "run_at"} per input job, in order; status
+    is 'scheduled', 'rescheduled' or 'duplicate', and run_at is when the job
+    that took it will run (for a duplicate, the pending job's time).
+    """
+    # Last entry per key; jobs without a key are always new
+    latest: Dict[str, int] = {}
+    for i, job in enumerate(jobs):
+        if job.get("dedup_key"):
+            latest[job["dedup_key"]] = i
+    rows = []
+    for i, job in enumerate(jobs):
+        key = job.get("dedup_key")
+        if key and latest[key] != i:
+            continue
+        rows.append({
+            "idx": i,
+            "id": str(uuid4()),
+            "payload": job["payload"],
+            "run_at": job["run_at"].isoformat(),
+            "dedup_key": key,
+        })
+
+    conflict = (
+        "DO UPDATE SET run_at = EXCLUDED.run_at, payload = EXCLUDED.payload, updated_at = NOW() "
+        "WHERE scheduled_jobs.status = 'pending'"
+        if reschedule_duplicates else "DO NOTHING"
+    )
+    insert = text(f"""
+        INSERT INTO scheduled_jobs (id, kind, payload, run_at, max_attempts, dedup_key)
+        SELECT r.id, :kind, r.payload, r.run_at, :max_attempts, r.dedup_key
+        FROM jsonb_to_recordset(CAST(:rows AS JSONB))
+             AS r(id TEXT, payload JSONB, run_at TIMESTAMPTZ, dedup_key TEXT)
+        ON CONFLICT (dedup_key) WHERE status IN ('pending', 'running') {conflict}
+        RETURNING id, dedup_key, run_at, (xmax = 0) AS inserted
+    """)
+    existing = text("""
+        SELECT id, dedup_key, run_at FROM scheduled_jobs
+        WHERE dedup_key = ANY(:keys) AND status IN ('pending', 'running')
+    """)
+
+    results: List[Optional[dict]] = [None] * len(jobs)
+    by_key: Dict[str, dict] = {}
+    with get_engine().begin() as conn:
+        for start in range(0, len(rows), ENQUEUE_BATCH_SIZE):
+            batch = rows[start:start + ENQUEUE_BATCH_SIZE]
+            written = conn.execute(
+                insert, {"kind": kind, "max_attempts": max_attempts, "rows": json.dumps(batch)}
+            ).mappings().all()
+            written_ids = {row["id"] for row in written}
+            for row in written:
+                if row["dedup_key"]:
+                    by_key[row["dedup_key"]] = {
+                        "job_id": row["id"],
+                        "status": "scheduled" if row["inserted"] else "rescheduled",
+                        "run_at": row["run_at"],
+                    }
+            skipped = [r["dedup_key"] for r in batch if r["dedup_key"] and r["dedup_key"] not in by_key]
+            if skipped:
+                for row in conn.execute(existing, {"keys": skipped}).mappings():
+                    by_key[row["dedup_key"]] = {"job_id": row["id"], "status": "duplicate", "run_at": row["run_at"]}
+            for r in batch:
+                if not r["dedup_key"]:
+                    results[r["idx"]] = {
+                        "job_id": r["id"],
+                        "status": "scheduled" if r["id"] in written_ids else "duplicate",
+                        "run_at": jobs[r["idx"]]["run_at"],
+                    }
+
+    for i, job in enumerate(jobs):
+        if results[i] is None:
+            key = job["dedup_key"]
+            result = dict(by_key.get(key) or {"job_id": None, "status": "duplicate", "run_at": None})
+            if latest[key] != i:
+                result["status"] = "duplicate"
+            results[i] = result
+    return results
+
+
+def cancel(job_id: str) -> bool:
+    """Cancel a pending or running job (a running attempt finishes, but is not retried or rescheduled)."""
+    rows = sql_execute(
+        """UPDATE scheduled_jobs SET status = 'cancelled', finished_at = NOW(), updated_at = NOW()
+           WHERE id = :id AND status IN ('pending', 'running')
+           RETURNING id""",
+        {"id": job_id},
+    )
+    return bool(rows)
+
+
+def list_active(limit: int = 500) -> List[dict]:
+    return sql_execute(
+        """SELECT id, kind, run_at, status, attempts, lease_owner
+           FROM scheduled_jobs
+           WHERE status IN ('pending', 'running')
+           ORDER BY run_at
+           LIMIT :limit""",
+        {"limit": limit},
+    )
+
+
+class JobWorker:
+    """Claims due jobs and runs them on a thread pool; one per replica."""
+
+    def __init__(self, concurrency: int = SCHEDULER_WORKER_CONCURRENCY, lease_seconds: int = SCHEDULER_LEASE_SECONDS,
+                 poll_seconds: float = SCHEDULER_POLL_SECONDS, on_heartbeat: Optional[Callable[[], None]] = None):
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._on_heartbeat = on_heartbeat
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job")
+        self._running: Dict[str, Future] = {}  # claimed job id -> its pool future
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._started_at = time.time()
+        self._finished_at: deque = deque(maxlen=10000)
+        self._stats = {
+            "claimed": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retried": 0,
+            "reclaimed": 0,
+            "leases_lost": 0,
+            "leases_expired": 0,
+            "claim_queries": 0,
+            "claim_errors": 0,
+            "lag_seconds_total": 0.0,
+            "run_seconds_total": 0.0,
+        }
+
+    # ─── Lifecycle ───────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        for target, name in ((self._claim_loop, "job-claim"), (self._heartbeat_loop, "job-heartbeat")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Job worker {self.worker_id} started (concurrency={self.concurrency})")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop claiming; jobs claimed but not started go back to the queue."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            unstarted = [job_id for job_id, future in self._running.items() if future.cancelled()]
+        if unstarted:
+            # Let another replica pick them up now instead of after the lease expires.
+            # Jobs already running keep their lease: they finish here or expire and are reclaimed.
+            sql_execute(
+                """UPDATE scheduled_jobs SET status = 'pending', attempts = attempts - 1,
+                          lease_owner = NULL, lease_expires_at = NULL, updated_at = NOW()
+                   WHERE id = ANY(:ids) AND lease_owner = :owner AND status = 'running'""",
+                {"ids": unstarted, "owner": self.worker_id},
+            )
+        sql_execute("DELETE FROM scheduler_workers WHERE id = :id", {"id": self.worker_id})
+
+    def wake(self) -> None:
+        """Claim now instead of at the next poll (e.g. after enqueueing a job due immediately)."""
+        self._wake.set()
+
+    # ─── Claiming ────────────────────────────────────────────────────────────
+
+    def _count(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    def _free_slots(self) -> int:
+        with self._lock:
+            return self.concurrency - len(self._running)
+
+    def _claim(self, limit: int) -> List[dict]:
+        self._count("claim_queries")
+        return sql_execute(
+            """UPDATE scheduled_jobs j
+               SET status = 'running', lease_owner = :owner,
+                   lease_expires_at = NOW() + make_interval(secs => :lease),
+                   attempts = j.attempts + 1, updated_at = NOW()
+               FROM (
+                   SELECT id, status AS prev_status FROM scheduled_jobs
+                   WHERE (status = 'pending' AND run_at <= NOW())
+                      OR (status = 'running' AND lease_expires_at < NOW() AND attempts < max_attempts)
+                   ORDER BY run_at
+                   LIMIT :limit
+                   FOR UPDATE SKIP LOCKED
+               ) due
+               WHERE j.id = due.id
+               RETURNING j.id, j.kind, j.payload, j.run_at, j.attempts, j.max_attempts, j.interval_seconds,
+                         due.prev_status""",
+            {"owner": self.worker_id, "lease": self.lease_seconds, "limit": limit},
+        )
+
+    def _claim_loop(self) -> None:
+        while not self._stop.is_set():
+            claimed = []
+            free = self._free_slots()
+            if free > 0:
+                try:
+                    claimed = self._claim(free)
+                except Exception as e:
+                    self._count("claim_errors")
+                    logger.error(f"Job claim error: {e}")
+            now = datetime.now(timezone.utc)
+            for job in claimed:
+                self._count("claimed")
+                if job["prev_status"] == "running":
+                    self._count("reclaimed")
+                    logger.warning(f"Reclaimed job {job['id']} after its lease expired")
+                self._count("lag_seconds_total", max(0.0, (now - _aware(job["run_at"])).total_seconds()))
+                with self._lock:
+                    self._running[job["id"]] = self._pool.submit(self._execute, job)
+            # A full batch means more may be due: claim again right away
+            if claimed and len(claimed) == free:
+                continue
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    # ─── Running ─────────────────────────────────────────────────────────────
+
+    def _execute(self, job: dict) -> None:
+        started = time.monotonic()
+        started_at = datetime.now(timezone.utc)
+        error = None
+        try:
+            handler = _handlers.get(job["kind"])
+            if handler is None:
+                raise ValueError(f"No handler for job kind '{job['kind']}'")
+            handler(job["payload"] or {})
+        except Exception as e:
+            error = str(e)[:1000]
+            logger.error(f"Job {job['id']} ({job['kind']}) failed (attempt {job['attempts']}/{job['max_attempts']}): {e}")
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._running.pop(job["id"], None)
+                self._stats["run_seconds_total"] += elapsed
+                self._finished_at.append(time.time())
+            get_history_writer().record(
+                job["id"], job["kind"], "FAILED" if error else "SUCCESS",
+                duration_ms=int(elapsed * 1000), error=error, run_time=started_at,
+            )
+        try:
+            self._complete(job, error)
+        except Exception as e:
+            logger.error(f"Job {job['id']} result write error: {e}")
+        self._wake.set()
+
+    def _complete(self, job: dict, error: Optional[str]) -> None:
+        params = {"id": job["id"], "owner": self.worker_id, "error": error}
+        retry = error is not None and job["attempts"] < job["max_attempts"]
+        if retry:
+            delay = _retry_delays.get(job["kind"], lambda payload, attempts: 0.0)(job["payload"] or {}, job["attempts"])
+            query = """UPDATE scheduled_jobs
+                       SET status = 'pending', run_at = NOW() + make_interval(secs => :delay),
+                           lease_owner = NULL, lease_expires_at = NULL, last_error = :error, updated_at = NOW()"""
+            params["delay"] = delay
+        elif job["interval_seconds"]:
+            # Next occurrence after now, on the original cadence
+            query = """UPDATE scheduled_jobs
+                       SET status = 'pending', attempts = 0,
+                           run_at = run_at + make_interval(secs => interval_seconds) * GREATEST(1, CEIL(
+                               EXTRACT(EPOCH FROM NOW() - run_at) / interval_seconds)),
+                           lease_owner = NULL, lease_expires_at = NULL, last_error = :error, updated_at = NOW()"""
+        else:
+            query = """UPDATE scheduled_jobs
+                       SET status = :status, lease_owner = NULL, lease_expires_at = NULL,
+                           last_error = :error, finished_at = NOW(), updated_at = NOW()"""
+            params["status"] = "failed" if error else "succeeded"
+        rows = sql_execute(
+            query + " WHERE id = :id AND lease_owner = :owner AND status = 'running' RETURNING id",
+            params,
+        )
+        if not rows:
+            # Cancelled meanwhile, or the lease expired and another replica took the job
+            self._count("leases_lost")
+            logger.warning(f"Job {job['id']} finished without its lease; result not recorded")
+            return
+        self._count("failed" if error else "succeeded")
+        if retry:
+            self._count("retried")
+            logger.info(f"Job {job['id']} will retry in {params['delay']:.0f}s (attempt {job['attempts'] + 1})")
+
+    # ─── Heartbeat ───────────────────────────────────────────────────────────
+
+    def _heartbeat_loop(self) -> None:
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            try:
+                self._heartbeat()
+            except Exception as e:
+                logger.error(f"Job heartbeat error: {e}")
+            if self._on_heartbeat is not None:
+                try:
+                    self._on_heartbeat()
+                except Exception as e:
+                    logger.error(f"Heartbeat hook error: {e}")
+
+    def _heartbeat(self) -> None:
+        with self._lock:
+            running = list(self._running)
+        if running:
+            sql_execute(
+                """UPDATE scheduled_jobs SET lease_expires_at = NOW() + make_interval(secs => :lease)
+                   WHERE id = ANY(:ids) AND lease_owner = :owner AND status = 'running'""",
+                {"ids": running, "owner": self.worker_id, "lease": self.lease_seconds},
+            )
+        self._expire_exhausted()
+        sql_execute(
+            """INSERT INTO scheduler_workers (id, started_at, last_seen, stats)
+               VALUES (:id, to_timestamp(:started), NOW(), CAST(:stats AS JSONB))
+               ON CONFLICT (id) DO UPDATE SET last_seen = NOW(), stats = EXCLUDED.stats""",
+            {"id": self.worker_id, "started": self._started_at, "stats": json.dumps(self.stats())},
+        )
+
+    def _expire_exhausted(self) -> None:
+        """Fail (or, if recurring, reschedule) running jobs whose lease expired on their last attempt."""
+        rows = sql_execute(
+            """UPDATE scheduled_jobs
+               SET status = CASE WHEN interval_seconds IS NULL THEN 'failed' ELSE 'pending' END,
+                   run_at = CASE WHEN interval_seconds IS NULL THEN run_at
+                                 ELSE run_at + make_interval(secs => interval_seconds) * GREATEST(1, CEIL(
+                                     EXTRACT(EPOCH FROM NOW() - run_at) / interval_seconds)) END,
+                   attempts = CASE WHEN interval_seconds IS NULL THEN attempts ELSE 0 END,
+                   finished_at = CASE WHEN interval_seconds IS NULL THEN NOW() END,
+                   last_error = 'lease expired: worker ' || COALESCE(lease_owner, '?')
+                                || ' stopped renewing it on attempt ' || attempts || '/' || max_attempts,
+                   lease_owner = NULL, lease_expires_at = NULL, updated_at = NOW()
+               WHERE status = 'running' AND lease_expires_at < NOW() AND attempts >= max_attempts
+               RETURNING id, kind, last_error""",
+            {},
+        )
+        for row in rows:
+            self._count("leases_expired")
+            logger.warning(f"Job {row['id']} ({row['kind']}) failed: {row['last_error']}")
+            get_history_writer().record(row["id"], row["kind"], "FAILED", error=row["last_error"])
+
+    def stats(self) -> dict:
+        cutoff = time.time() - 60
+        with self._lock:
+            stats = dict(self._stats)
+            running = len(self._running)
+            last_minute = sum(1 for t in self._finished_at if t >= cutoff)
+        finished = stats["succeeded"] + stats["failed"]
+        return {
+            **{k: v for k, v in stats.items() if not k.endswith("_total")},
+            "running": running,
+            "concurrency": self.concurrency,
+            "jobs_last_minute": last_minute,
+            "avg_start_lag_seconds": round(stats["lag_seconds_total"] / stats["claimed"], 3) if stats["claimed"] else 0.0,
+            "avg_run_seconds": round(stats["run_seconds_total"] / finished, 3) if finished else 0.0,
+            "uptime_seconds": round(time.time() - self._started_at),
+        }
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def queue_stats() -> dict:
+    """Queue depth plus per-replica throughput for every live worker."""
+    depth = sql_execute(
+        """SELECT COUNT(*) FILTER (WHERE status = 'pending' AND run_at <= NOW()) AS due,
+                  COUNT(*) FILTER (WHERE status = 'pending' AND run_at > NOW()) AS scheduled,
+                  COUNT(*) FILTER (WHERE status = 'running') AS running,
+                  COUNT(*) FILTER (WHERE status = 'running' AND lease_expires_at < NOW()) AS expired_leases,
+                  COALESCE(EXTRACT(EPOCH FROM NOW() - MIN(run_at) FILTER (
+                      WHERE status = 'pending' AND run_at <= NOW())), 0) AS oldest_due_seconds
+           FROM scheduled_jobs
+           WHERE status IN ('pending', 'running')"""
+    )[0]
+    workers = sql_execute(
+        """SELECT id, started_at, last_seen, stats FROM scheduler_workers
+           WHERE last_seen > NOW() - make_interval(secs => :stale)
+           ORDER BY started_at""",
+        {"stale": WORKER_STALE_SECONDS},
+    )
+    return {
+        "queue": {k: (round(float(v), 1) if k == "oldest_due_seconds" else v) for k, v in depth.items()},
+        "workers": [
+            {"id": w["id"], "last_seen": w["last_seen"].isoformat(), **(w["stats"] or {})} for w in workers
+        ],
+        "jobs_last_minute": sum((w["stats"] or {}).get("jobs_last_minute", 0) for w in workers),
+    }
+
+
+_worker: Optional[JobWorker] = None
+
+
+def get_worker() -> Optional[JobWorker]:
+    return _worker
+
+
+def start_worker(on_heartbeat: Optional[Callable[[], None]] = None) -> JobWorker:
+    global _worker
+    if _worker is None:
+        _worker = JobWorker(on_heartbeat=on_heartbeat)
+        _worker.start()
+    return _worker
+
+
+def stop_worker() -> None:
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
@@ -0,0 +1,290 @@
+"""
+Answer-rate model and call-time planner.
+
+The model is the recency-weighted share of dials that were answered, per
+tenant, day of week and hour of day (in CALLING_TIMEZONE), learned from
+call_transcripts. refresh_model() refits it (nightly, as a scheduled job)
+into answer_rate_model, which every replica reads.
+
+Sparse cells are shrunk towards broader estimates:
+    tenant/day/hour -> all tenants/day/hour -> all tenants/hour -> overall
+each with PRIOR_DIALS pseudo-dials, so a cell with a handful of calls does
+not swing the plan.
+
+The planner uses the model to:
+  - pick the retry time for an unanswered call: the in-window hour with the
+    best answer rate over the next RETRY_HORIZON_HOURS, discounted for how
+    long the survey has to wait
+  - hold campaign dialing through hours that answer much worse than the
+    best hours of the day
+With no history yet every hour scores the same, which gives the earliest
+allowed time and never holds a campaign.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+
+from db import get_engine, sql_execute
+
+logger = logging.getLogger(__name__)
+
+CALLING_TIMEZONE = os.getenv("CALLING_TIMEZONE", "America/New_York")
+ANSWER_MODEL_HISTORY_DAYS = int(os.getenv("ANSWER_MODEL_HISTORY_DAYS", "90"))
+# Calls this many days old count half as much as today's
+ANSWER_MODEL_HALF_LIFE_DAYS = float(os.getenv("ANSWER_MODEL_HALF_LIFE_DAYS", "21"))
+ANSWER_MODEL_REFRESH_HOUR = int(os.getenv("ANSWER_MODEL_REFRESH_HOUR", "3"))
+RETRY_HORIZON_HOURS = int(os.getenv("RETRY_HORIZON_HOURS", "72"))
+# Score multiplier per day of waiting: how much yield a later slot must add to be worth the delay
+RETRY_DAILY_DISCOUNT = float(os.getenv("RETRY_DAILY_DISCOUNT", "0.85"))
+# Campaign dialing pauses in hours answering below this share of the day's best hour
+CAMPAIGN_MIN_RELATIVE_YIELD = float(os.getenv("CAMPAIGN_MIN_RELATIVE_YIELD", "0.6"))
+PRIOR_DIALS = 20.0
+MODEL_RELOAD_SECONDS = 3600
+ALL_TENANTS = "*"
+
+
+def refresh_model() -> int:
+    """Refit answer_rate_model from call history. Returns the number of cells written."""
+    fit = text("""
+        SELECT COALESCE(s.tenant_id, '') AS tenant_id,
+               EXTRACT(DOW FROM local_start)::int AS dow,
+               EXTRACT(HOUR FROM local_start)::int AS hour,
+               SUM(weight) AS dials,
+               SUM(weight) FILTER (WHERE answered) AS answers
+        FROM (
+            SELECT ct.survey_id,
+                   ct.call_started_at AT TIME ZONE 'UTC' AT TIME ZONE :tz AS local_start,
+                   ct.call_answered_at IS NOT NULL AS answered,
+                   POWER(0.5, EXTRACT(EPOCH FROM (NOW() AT TIME ZONE 'UTC') - ct.call_started_at) / 86400.0 / :half_life)
+                       AS weight
+            FROM call_transcripts ct
+            WHERE ct.call_started_at > (NOW() AT TIME ZONE 'UTC') - make_interval(days => :days)
+              AND ct.call_status IN ('completed', 'no_answer')
+              AND COALESCE(ct.channel, 'phone') = 'phone'
+        ) calls
+        JOIN surveys s ON s.id = calls.survey_id
+        GROUP BY 1, 2, 3
+    """)
+    with get_engine().begin() as conn:
+        rows = conn.execute(fit, {
+            "tz": CALLING_TIMEZONE,
+            "half_life": ANSWER_MODEL_HALF_LIFE_DAYS,
+            "days": ANSWER_MODEL_HISTORY_DAYS,
+        }).mappings().all()
+        totals: Dict[Tuple[int, int], list] = {}
+        cells = []
+        for row in rows:
+            cells.append({
+                "tenant_id": row["tenant_id"], "dow": row["dow"], "hour": row["hour"],
+                "dials": float(row["dials"] or 0), "answers": float(row["answers"] or 0),
+            })
+            total = totals.setdefault((row["dow"], row["hour"]), [0.0, 0.0])
+            total[0] += float(row["dials"] or 0)
+            total[1] += float(row["answers"] or 0)
+        cells.extend(
+            {"tenant_id": ALL_TENANTS, "dow": dow, "hour": hour, "dials": d, "answers": a}
+            for (dow, hour), (d, a) in totals.items()
+        )
+        conn.execute(text("DELETE FROM answer_rate_model"))
+        if cells:
+            conn.execute(
+                text("""INSERT INTO answer_rate_model (tenant_id, dow, hour, dials, answers, fitted_at)
+                        VALUES (:tenant_id, :dow, :hour, :dials, :answers, NOW())"""),
+                cells,
+            )
+    logger.info(f"Answer-rate model refit: {len(cells)} cells from {ANSWER_MODEL_HISTORY_DAYS} days of calls")
+    get_planner().invalidate()
+    return len(cells)
+
+
+def next_refresh_time(now: Optional[datetime] = None) -> datetime:
+    """Next ANSWER_MODEL_REFRESH_HOUR:00 in CALLING_TIMEZONE."""
+    tz = ZoneInfo(CALLING_TIMEZONE)
+    local = (now or datetime.now(tz)).astimezone(tz)
+    at = local.replace(hour=ANSWER_MODEL_REFRESH_HOUR, minute=0, second=0, microsecond=0)
+    if at <= local:
+        at += timedelta(days=1)
+    return at.astimezone(timezone.utc)
+
+
+def find_unanswered(max_attempts: int, limit: int = 5000):
+    """
+    Surveys still in progress whose latest call (in the last RETRY_HORIZON_HOURS)
+    went unanswered, with fewer than max_attempts calls so far and no call job
+    created since that call.
+    """
+    return sql_execute(
+        """SELECT s.id AS survey_id, s.phone, COALESCE(s.tenant_id, '') AS tenant_id, c.config AS campaign_config,
+                  ct.call_attempts, ct.call_ended_at
+           FROM (
+               SELECT DISTINCT ON (survey_id) survey_id, call_status, call_attempts, call_started_at, call_ended_at
+               FROM call_transcripts
+               WHERE call_started_at > (NOW() AT TIME ZONE 'UTC') - make_interval(hours => :horizon)
+                 AND survey_id IS NOT NULL
+               ORDER BY survey_id, call_started_at DESC
+           ) ct
+           JOIN surveys s ON s.id = ct.survey_id
+           LEFT JOIN campaigns c ON c.id = s.campaign_id
+           WHERE ct.call_status = 'no_answer'
+             AND COALESCE(ct.call_attempts, 1) < :max_attempts
+             AND s.status = 'In-Progress' AND s.phone IS NOT NULL AND s.phone != ''
+             AND NOT EXISTS (
+                 SELECT 1 FROM scheduled_jobs j
+                 WHERE j.dedup_key = 'call:' || s.id AND j.created_at >= ct.call_started_at AT TIME ZONE 'UTC'
+             )
+           LIMIT :limit""",
+        {"horizon": RETRY_HORIZON_HOURS, "max_attempts": max_attempts, "limit": limit},
+    )
+
+
+class AnswerRatePlanner:
+    """In-memory copy of answer_rate_model with the shrunk estimates and slot planning."""
+
+    def __init__(self, tz: str = CALLING_TIMEZONE):
+        self.tz = ZoneInfo(tz)
+        self._cells: Dict[Tuple[str, int, int], Tuple[float, float]] = {}
+        self._hour_totals: Dict[int, Tuple[float, float]] = {}
+        self._overall: Optional[float] = None
+        self._fitted_at: Optional[datetime] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        self._loaded_at = 0.0
+
+    def _ensure_loaded(self) -> None:
+        if time.monotonic() - self._loaded_at < MODEL_RELOAD_SECONDS and self._loaded_at:
+            return
+        with self._lock:
+            if time.monotonic() - self._loaded_at < MODEL_RELOAD_SECONDS and self._loaded_at:
+                return
+            try:
+                rows = sql_execute("SELECT tenant_id, dow, hour, dials, answers, fitted_at FROM answer_rate_model")
+            except Exception as e:
+                # Keep planning with what is loaded (or flat) rather than failing the caller
+                logger.error(f"Answer-rate model load error: {e}")
+                self._loaded_at = time.monotonic()
+                return
+            cells = {(r["tenant_id"], r["dow"], r["hour"]): (r["dials"], r["answers"]) for r in rows}
+            hour_totals: Dict[int, Tuple[float, float]] = {}
+            dials = answers = 0.0
+            for (tenant, _, hour), (d, a) in cells.items():
+                if tenant != ALL_TENANTS:
+                    continue
+                prev = hour_totals.get(hour, (0.0, 0.0))
+                hour_totals[hour] = (prev[0] + d, prev[1] + a)
+                dials += d
+                answers += a
+            self._cells = cells
+            self._hour_totals = hour_totals
+            self._overall = answers / dials if dials else None
+            self._fitted_at = max((r["fitted_at"] for r in rows), default=None)
+            self._loaded_at = time.monotonic()
+
+    def rate(self, tenant_id: str, dow: int, hour: int) -> Optional[float]:
+        """Estimated answer rate for a local day of week (0 = Sunday) and hour; None with no history."""
+        self._ensure_loaded()
+        if self._overall is None:
+            return None
+        d, a = self._hour_totals.get(hour, (0.0, 0.0))
+        p = (a + PRIOR_DIALS * self._overall) / (d + PRIOR_DIALS)
+        d, a = self._cells.get((ALL_TENANTS, dow, hour), (0.0, 0.0))
+        p = (a + PRIOR_DIALS * p) / (d + PRIOR_DIALS)
+        if tenant_id == ALL_TENANTS:
+            return p
+        d, a = self._cells.get((tenant_id or "", dow, hour), (0.0, 0.0))
+        return (a + PRIOR_DIALS * p) / (d + PRIOR_DIALS)
+
+    def _rate_at(self, tenant_id: str, at: datetime) -> float:
+        local = at.astimezone(self.tz)
+        # Python: Monday = 0; Postgres DOW: Sunday = 0
+        rate = self.rate(tenant_id, (local.weekday() + 1) % 7, local.hour)
+        return 1.0 if rate is None else rate
+
+    def _open_hours(self, window, start: datetime, hours: int):
+        """Start of every whole or partial hour from `start` for `hours` hours that is inside the window."""
+        cursor = start
+        end = start + timedelta(hours=hours)
+        while cursor < end:
+            wait = window.seconds_until_open(cursor)
+            if wait:
+                cursor += timedelta(seconds=wait)
+                continue
+            yield cursor
+            cursor = cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+    def next_slot(self, tenant_id: str, earliest: datetime, window, key: str = "",
+                  horizon_hours: int = RETRY_HORIZON_HOURS) -> datetime:
+        """Best time at or after `earliest` to call, spread within the chosen hour by `key`."""
+        best, best_score = None, -1.0
+        for slot in self._open_hours(window, earliest, horizon_hours):
+            days = (slot - earliest).total_seconds() / 86400
+            score = self._rate_at(tenant_id, slot) * RETRY_DAILY_DISCOUNT ** days
+            if score > best_score + 1e-9:
+                best, best_score = slot, score
+        if best is None:
+            return earliest + timedelta(seconds=window.seconds_until_open(earliest))
+        # Spread retries over the hour (stable per key) so a slot's calls don't all dial at :00
+        hour_end = best.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        room = (hour_end - best).total_seconds() - 60
+        if room <= 0 or window.seconds_until_open(hour_end - timedelta(seconds=1)):
+            return best
+        offset = int(hashlib.sha1(key.encode()).hexdigest(), 16) % int(room) if key else 0
+        return best + timedelta(seconds=offset)
+
+    def seconds_until_good_hour(self, tenant_id: str, window, now: Optional[datetime] = None) -> float:
+        """
+        0 if the current hour answers at least CAMPAIGN_MIN_RELATIVE_YIELD of
+        the best in-window hour in the next 24h; else seconds until such an hour.
+        """
+        now = now or datetime.now(timezone.utc)
+        hours = [(slot, self._rate_at(tenant_id, slot)) for slot in self._open_hours(window, now, 24)]
+        if not hours:
+            return 0.0
+        threshold = CAMPAIGN_MIN_RELATIVE_YIELD * max(rate for _, rate in hours)
+        for slot, rate in hours:
+            if rate >= threshold:
+                return max(0.0, (slot - now).total_seconds())
+        return 0.0
+
+    def describe(self, tenant_id: str = ALL_TENANTS) -> dict:
+        """The estimated rate for every day/hour, for inspection."""
+        self._ensure_loaded()
+        grid = []
+        for dow in range(7):
+            for hour in range(24):
+                rate = self.rate(tenant_id, dow, hour)
+                dials = self._cells.get((tenant_id, dow, hour), (0.0, 0.0))[0]
+                grid.append({
+                    "dow": dow,
+                    "hour": hour,
+                    "answer_rate": round(rate, 4) if rate is not None else None,
+                    "weighted_dials": round(dials, 1),
+                })
+        return {
+            "tenant_id": tenant_id,
+            "timezone": str(self.tz),
+            "fitted_at": self._fitted_at.isoformat() if self._fitted_at else None,
+            "overall_answer_rate": round(self._overall, 4) if self._overall is not None else None,
+            "rates": grid,
+        }
+
+
+_planner: Optional[AnswerRatePlanner] = None
+_planner_lock = threading.Lock()
+
+
+def get_planner() -> AnswerRatePlanner:
+    global _planner
+    with _planner_lock:
+        if _planner is None:
+            _planner = AnswerRatePlanner()
+    return _planner
@@ -1,64 +1,110 @@
 """
-Scheduler routes: schedule calls, campaigns, cancel jobs, list jobs.
-Jobs persist in Postgres — survive container restarts.
+Scheduler routes: schedule calls, campaigns, cancel jobs, list jobs, campaign runs.
+Jobs persist in Postgres (scheduled_jobs) and are run by whichever replica claims them.
 """
 
+import asyncio
 import logging
 import os
 from datetime import datetime, timedelta, timezone
-from typing import Optional
 from uuid import uuid4
 
 import httpx
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from fastapi import APIRouter, HTTPException
 
-from db import get_engine, sql_execute
+from shared.models.common import ScheduleCallsRequestP
+
+import job_queue
+import retry_planner
+from job_history import get_history_writer, job_metrics
+from campaign_executor import RunSettings, get_campaign_executor, run_campaign_job, run_progress
+from db import sql_execute
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/scheduler", tags=["scheduler"])
 
-_scheduler: Optional[BackgroundScheduler] = None
-
 MAX_RETRIES = 2
 RETRY_DELAY_SECONDS = 10
+MAX_BULK_CALLS = 10000
+# Unanswered calls: total dials per survey, and the minimum gap before redialing
+NO_ANSWER_MAX_ATTEMPTS = int(os.getenv("NO_ANSWER_MAX_ATTEMPTS", "3"))
+NO_ANSWER_MIN_GAP_MINUTES = int(os.getenv("NO_ANSWER_MIN_GAP_MINUTES", "120"))
+NO_ANSWER_SWEEP_MINUTES = int(os.getenv("NO_ANSWER_SWEEP_MINUTES", "10"))
 
 
-def get_scheduler() -> BackgroundScheduler:
-    global _scheduler
-    if _scheduler is None:
-        engine = get_engine()
-        jobstore = SQLAlchemyJobStore(engine=engine)
-        _scheduler = BackgroundScheduler(
-            jobstores={"default": jobstore},
-            job_defaults={"coalesce": True, "max_instances": 1},
-        )
-    return _scheduler
-
-
-def _make_call_job(survey_id: str, phone: str, attempt: int = 1):
-    """Background job: call voice-service with retry."""
+def _make_call_job(payload: dict):
+    """Job handler: call voice-service. Raising fails the attempt; the queue retries it."""
+    survey_id, phone = payload["survey_id"], payload["phone"]
     voice_url = os.getenv("VOICE_SERVICE_URL", "http://voice-service:8017")
     url = f"{voice_url}/api/voice/make-call"
-    try:
-        with httpx.Client(timeout=30.0) as client:
-            r = client.post(url, params={"survey_id": survey_id, "phone": phone})
-            r.raise_for_status()
-            logger.info(f"Scheduled call completed: survey={survey_id}, phone={phone}")
-    except Exception as e:
-        logger.error(f"Scheduled call failed (attempt {attempt}/{MAX_RETRIES+1}): survey={survey_id}, error={e}")
-        if attempt <= MAX_RETRIES:
-            sched = get_scheduler()
-            retry_at = datetime.now(timezone.utc) + timedelta(seconds=RETRY_DELAY_SECONDS * attempt)
-            sched.add_job(
-                _make_call_job,
-                "date",
-                run_date=retry_at,
-                args=[survey_id, phone, attempt + 1],
-                id=f"retry_{survey_id}_{attempt + 1}",
-            )
-            logger.info(f"Retrying in {RETRY_DELAY_SECONDS * attempt}s (attempt {attempt + 1})")
+    with httpx.Client(timeout=30.0) as client:
+        r = client.post(url, params={"survey_id": survey_id, "phone": phone})
+        r.raise_for_status()
+        logger.info(f"Scheduled call completed: survey={survey_id}, phone={phone}")
+
+
+def _call_retry_delay(payload: dict, attempts: int) -> float:
+    # voice-service did not accept the call (not an unanswered phone): retry soon
+    return RETRY_DELAY_SECONDS * attempts
+
+
+def _no_answer_sweep(payload: dict):
+    """Job handler: schedule a redial for each unanswered call, at its best answer-rate slot."""
+    planner = retry_planner.get_planner()
+    gap = timedelta(minutes=NO_ANSWER_MIN_GAP_MINUTES)
+    now = datetime.now(timezone.utc)
+    jobs = []
+    for row in retry_planner.find_unanswered(NO_ANSWER_MAX_ATTEMPTS):
+        ended = row["call_ended_at"].replace(tzinfo=timezone.utc) if row["call_ended_at"] else now
+        window = RunSettings(row["campaign_config"]).window
+        run_at = planner.next_slot(row["tenant_id"], max(now, ended + gap), window, key=row["survey_id"])
+        jobs.append({
+            "payload": {"survey_id": row["survey_id"], "phone": row["phone"]},
+            "run_at": run_at,
+            "dedup_key": _call_dedup_key(row["survey_id"]),
+        })
+    if jobs:
+        results = job_queue.enqueue_many("call", jobs, max_attempts=MAX_RETRIES + 1)
+        scheduled = sum(1 for r in results if r["status"] == "scheduled")
+        logger.info(f"No-answer sweep: scheduled {scheduled} redials ({len(jobs) - scheduled} already pending)")
+
+
+def _answer_model_refresh(payload: dict):
+    retry_planner.refresh_model()
+
+
+def _campaign_job(payload: dict):
+    run_campaign_job(payload["campaign_id"])
+
+
+job_queue.register_handler("call", _make_call_job, retry_delay=_call_retry_delay)
+job_queue.register_handler("campaign", _campaign_job)
+job_queue.register_handler("no_answer_sweep", _no_answer_sweep)
+job_queue.register_handler("answer_model_refresh", _answer_model_refresh)
+
+
+def ensure_system_jobs():
+    """Create the recurring maintenance jobs once (the dedup key makes this a no-op on every later start)."""
+    now = datetime.now(timezone.utc)
+    job_queue.enqueue(
+        "no_answer_sweep", {}, now,
+        interval_seconds=NO_ANSWER_SWEEP_MINUTES * 60, dedup_key="system:no_answer_sweep",
+    )
+    job_queue.enqueue(
+        "answer_model_refresh", {}, retry_planner.next_refresh_time(now),
+        interval_seconds=24 * 3600, dedup_key="system:answer_model_refresh",
+    )
+
+
+def _call_dedup_key(survey_id: str) -> str:
+    # At most one pending/running call job per survey
+    return f"call:{survey_id}"
+
+
+def _wake_worker():
+    worker = job_queue.get_worker()
+    if worker is not None:
+        worker.wake()
 
 
 @router.post("/schedule-call")
@@ -67,22 +113,32 @@ async def schedule_call(
     phone: str,
     delay_seconds: int = 60,
 ):
-    """Schedule a delayed call. Job persists in Postgres."""
+    """
+    Schedule a delayed call. Job persists in Postgres. A survey with a call already pending
+    keeps that one: the response then has status "duplicate", that job's id and its run_at.
+    """
     try:
-        job_id = str(uuid4())
         run_at = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
-
-        sched = get_scheduler()
-        sched.add_job(
-            _make_call_job,
-            "date",
-            run_date=run_at,
-            id=job_id,
-            args=[survey_id, phone, 1],
+        new_job_id = str(uuid4())
+        job_id = job_queue.enqueue(
+            "call",
+            {"survey_id": survey_id, "phone": phone},
+            run_at,
+            job_id=new_job_id,
+            max_attempts=MAX_RETRIES + 1,
+            dedup_key=_call_dedup_key(survey_id),
         )
+        status = "scheduled"
+        if job_id != new_job_id:
+            status = "duplicate"
+            existing = sql_execute("SELECT run_at FROM scheduled_jobs WHERE id = :id", {"id": job_id})
+            if existing and existing[0]["run_at"]:
+                run_at = existing[0]["run_at"]
+        elif delay_seconds <= 0:
+            _wake_worker()
 
         return {
-            "status": "scheduled",
+            "status": status,
             "job_id": job_id,
             "run_at": run_at.isoformat(),
             "survey_id": survey_id,
@@ -93,6 +149,58 @@ async def schedule_call(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/schedule-calls")
+async def schedule_calls(request: ScheduleCallsRequestP):
+    """
+    Schedule many calls in one transaction. Calls for the same survey (in the
+    request, or already pending) collapse into one job; on_duplicate decides
+    whether a pending job keeps its time or moves to the new one.
+    """
+    if len(request.calls) > MAX_BULK_CALLS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_CALLS} calls per request")
+    try:
+        now = datetime.now(timezone.utc)
+        jobs = []
+        for call in request.calls:
+            run_at = call.run_at or now + timedelta(seconds=call.delay_seconds)
+            if run_at.tzinfo is None:
+                run_at = run_at.replace(tzinfo=timezone.utc)
+            jobs.append({
+                "payload": {"survey_id": call.survey_id, "phone": call.phone},
+                "run_at": run_at,
+                "dedup_key": _call_dedup_key(call.survey_id),
+            })
+        results = await asyncio.to_thread(
+            job_queue.enqueue_many,
+            "call",
+            jobs,
+            max_attempts=MAX_RETRIES + 1,
+            reschedule_duplicates=request.on_duplicate == "reschedule",
+        )
+        # Only for calls actually added or moved: a duplicate keeps its pending job's time
+        if any(job["run_at"] <= now for job, result in zip(jobs, results) if result["status"] != "duplicate"):
+            _wake_worker()
+
+        counts = {"scheduled": 0, "rescheduled": 0, "duplicate": 0}
+        for result in results:
+            counts[result["status"]] += 1
+        return {
+            **counts,
+            "jobs": [
+                {
+                    "survey_id": call.survey_id,
+                    "job_id": result["job_id"],
+                    "status": result["status"],
+                    "run_at": (result["run_at"] or job["run_at"]).isoformat(),
+                }
+                for call, job, result in zip(request.calls, jobs, results)
+            ],
+        }
+    except Exception as e:
+        logger.error(f"Schedule calls error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/schedule-campaign")
 async def schedule_campaign(
     campaign_id: str,
@@ -105,8 +213,6 @@ async def schedule_campaign(
         if not campaign:
             raise HTTPException(status_code=404, detail=f"Campaign {campaign_id} not found")
 
-        job_id = str(uuid4())
-        sched = get_scheduler()
         if frequency == "daily":
             interval_hours = 24
         elif frequency == "weekly":
@@ -117,41 +223,14 @@ async def schedule_campaign(
             interval_hours = 24
 
         run_date = datetime.now(timezone.utc) + timedelta(minutes=next_run_offset_minutes)
-
-        def _campaign_job():
-            """Execute campaign: find all pending surveys and trigger calls."""
-            logger.info(f"Campaign job executing: {campaign_id}")
-            try:
-                surveys = sql_execute(
-                    """SELECT s.id, s.phone, s.rider_name
-                       FROM surveys s
-                       WHERE s.campaign_id = :cid AND s.status = 'In-Progress'
-                       AND s.phone IS NOT NULL AND s.phone != ''""",
-                    {"cid": campaign_id},
-                )
-                voice_url = os.getenv("VOICE_SERVICE_URL", "http://voice-service:8017")
-                for survey in surveys:
-                    try:
-                        with httpx.Client(timeout=30.0) as client:
-                            r = client.post(
-                                f"{voice_url}/api/voice/make-call",
-                                params={"survey_id": survey["id"], "phone": survey["phone"]},
-                            )
-                            r.raise_for_status()
-                            logger.info(f"Campaign call triggered: survey={survey['id']}")
-                    except Exception as call_err:
-                        logger.error(f"Campaign call failed for survey {survey['id']}: {call_err}")
-                logger.info(f"Campaign {campaign_id}: triggered {len(surveys)} calls")
-            except Exception as e:
-                logger.error(f"Campaign job error: {e}")
-
-        sched.add_job(
-            _campaign_job,
-            "interval",
-            hours=interval_hours,
-            id=job_id,
-            start_date=run_date,
+        job_id = job_queue.enqueue(
+            "campaign",
+            {"campaign_id": campaign_id},
+            run_date,
+            interval_seconds=interval_hours * 3600,
         )
+        if next_run_offset_minutes <= 0:
+            _wake_worker()
 
         return {
             "status": "scheduled",
@@ -166,15 +245,55 @@ async def schedule_campaign(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/run-campaign/{campaign_id}")
+async def run_campaign(campaign_id: str):
+    """Start a campaign run now (paced, concurrent dialing of its pending surveys)."""
+    try:
+        campaign = sql_execute("SELECT id FROM campaigns WHERE id = :id", {"id": campaign_id})
+        if not campaign:
+            raise HTTPException(status_code=404, detail=f"Campaign {campaign_id} not found")
+        run_id = get_campaign_executor().start_run(campaign_id)
+        if run_id is None:
+            raise HTTPException(status_code=409, detail=f"Campaign {campaign_id} already has an active run")
+        return {"status": "running", "run_id": run_id, "campaign_id": campaign_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Run campaign error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/campaign-runs/{run_id}")
+async def get_campaign_run(run_id: str):
+    """Progress of a campaign run."""
+    try:
+        progress = run_progress(run_id)
+        if progress is None:
+            raise HTTPException(status_code=404, detail=f"Campaign run {run_id} not found")
+        return progress
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get campaign run error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/campaign-runs/{run_id}/cancel")
+async def cancel_campaign_run(run_id: str):
+    """Stop a campaign run; calls already in flight are not hung up."""
+    try:
+        get_campaign_executor().cancel_run(run_id)
+        return {"status": "cancelled", "run_id": run_id}
+    except Exception as e:
+        logger.error(f"Cancel campaign run error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.delete("/cancel/{job_id}")
 async def cancel_job(job_id: str):
-    """Cancel a scheduled job."""
+    """Cancel a scheduled job (and its pending retries or recurrences)."""
     try:
-        sched = get_scheduler()
-        try:
-            sched.remove_job(job_id)
-        except Exception:
-            pass
+        job_queue.cancel(job_id)
         return {"status": "cancelled", "job_id": job_id}
     except Exception as e:
         logger.error(f"Cancel job error: {e}")
@@ -183,17 +302,61 @@ async def cancel_job(job_id: str):
 
 @router.get("/jobs")
 async def list_jobs():
-    """List pending jobs."""
+    """List pending and running jobs."""
     try:
-        sched = get_scheduler()
         jobs = []
-        for j in sched.get_jobs():
+        for j in job_queue.list_active():
             jobs.append({
-                "job_id": j.id,
-                "next_run": j.next_run_time.isoformat() if j.next_run_time else None,
-                "name": j.name,
+                "job_id": j["id"],
+                "next_run": j["run_at"].isoformat() if j["run_at"] else None,
+                "name": j["kind"],
+                "status": j["status"],
+                "attempts": j["attempts"],
+                "worker": j["lease_owner"],
             })
         return {"jobs": jobs}
     except Exception as e:
         logger.error(f"List jobs error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/answer-rates")
+async def answer_rates(tenant_id: str = retry_planner.ALL_TENANTS):
+    """Learned answer rate per day of week (0 = Sunday) and hour, as used to plan call times."""
+    try:
+        return await asyncio.to_thread(retry_planner.get_planner().describe, tenant_id)
+    except Exception as e:
+        logger.error(f"Answer rates error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/answer-rates/refresh")
+async def refresh_answer_rates():
+    """Refit the answer-rate model now instead of waiting for the nightly job."""
+    try:
+        cells = await asyncio.to_thread(retry_planner.refresh_model)
+        return {"status": "refreshed", "cells": cells}
+    except Exception as e:
+        logger.error(f"Answer rates refresh error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/metrics")
+async def metrics(hours: int = 24):
+    """Success/failure rates and run-time percentiles per job type, from job_history."""
+    try:
+        job_types = await asyncio.to_thread(job_metrics, hours)
+        return {"window_hours": hours, "job_types": job_types, "history_writer": get_history_writer().stats()}
+    except Exception as e:
+        logger.error(f"Job metrics error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/throughput")
+async def throughput():
+    """Queue depth and per-replica job throughput."""
+    try:
+        return job_queue.queue_stats()
+    except Exception as e:
+        logger.error(f"Throughput stats error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
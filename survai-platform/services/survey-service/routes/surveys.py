@@ -19,6 +19,7 @@ from mailersend import EmailBuilder, MailerSendClient
 from pydantic import BaseModel
 
 from shared.models.common import (
+    CallbackBatchRequest,
     CallbackRequest,
     Email,
     MakeCallRequest,
@@ -141,6 +142,8 @@ async def process_survey_questions_background(qna_data: dict):
         survey_id = qna_data.pop("SurveyId", None)
         if not survey_id:
             return
+        # Partial submissions from dropped calls keep the survey open
+        completed = qna_data.pop("Completed", True) is not False
 
         questions = transform_qna(qna_data)
         survey_data = await get_survey_questions(survey_id)
@@ -184,15 +187,16 @@ async def process_survey_questions_background(qna_data: dict):
                 },
             )
 
-        sql_execute(
-            """UPDATE surveys SET status = :status, completion_date = :completion_date WHERE id = :survey_id""",
-            {
-                "survey_id": survey_id,
-                "status": "Completed",
-                "completion_date": str(get_current_time())[:19].replace("T", " "),
-            },
-        )
-        logger.info(f"Processed survey questions for survey {survey_id}")
+        if completed:
+            sql_execute(
+                """UPDATE surveys SET status = :status, completion_date = :completion_date WHERE id = :survey_id""",
+                {
+                    "survey_id": survey_id,
+                    "status": "Completed",
+                    "completion_date": str(get_current_time())[:19].replace("T", " "),
+                },
+            )
+        logger.info(f"Processed survey questions for survey {survey_id} (completed={completed})")
     except Exception as e:
         logger.warning(f"Error processing survey questions: {e}")
 
@@ -818,7 +822,7 @@ async def sendemail(email: Email):
 
 @router.post("/surveys/callback")
 async def schedule_callback(request: CallbackRequest):
-    """Schedule callback via scheduler-service (single scheduler instance)."""
+    """Schedule callback via scheduler-service."""
     delay_seconds = request.delay_minutes * 60
     try:
         async with httpx.AsyncClient(timeout=15.0) as client:
@@ -837,6 +841,26 @@ async def schedule_callback(request: CallbackRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/surveys/callbacks")
+async def schedule_callbacks(request: CallbackBatchRequest):
+    """Schedule many callbacks with one scheduler-service request."""
+    calls = [
+        {"survey_id": cb.survey_id, "phone": cb.phone, "delay_seconds": cb.delay_minutes * 60}
+        for cb in request.callbacks
+    ]
+    try:
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            resp = await client.post(
+                f"{SCHEDULER_SERVICE_URL}/api/scheduler/schedule-calls",
+                json={"calls": calls},
+            )
+            resp.raise_for_status()
+            return resp.json()
+    except Exception as e:
+        logger.error(f"Failed to schedule callbacks via scheduler-service: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ─── Aliases for frontend backward compatibility ─────────────────────────────
 
 @router.post("/surveys/{survey_id}/csat")
@@ -4,6 +4,7 @@ Voice Service -- Port 8017
 Handles all voice/call operations:
 - LiveKit call initiation via SIP
 - Transcript storage and retrieval
+- Call lifecycle ingestion from LiveKit webhooks
 - Email fallback
 
 Gets its intelligence from brain-service. No AI/LLM logic here.
@@ -15,6 +16,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from livekit_webhooks import get_call_event_writer
 from routes.voice import router as voice_router, agent_router
 
 logging.basicConfig(level=logging.INFO)
@@ -24,8 +26,11 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Voice Service starting up...")
+    writer = get_call_event_writer()
+    writer.start()
     yield
     logger.info("Voice Service shutting down...")
+    await writer.stop()
 
 
 app = FastAPI(
@@ -211,6 +211,67 @@ def store_transcript(
     return transcript_id
 
 
+# ─── Call Lifecycle (written in bulk from LiveKit webhooks) ──────────────────
+
+_UPSERT_CALL_LIFECYCLE = """
+INSERT INTO call_transcripts
+    (id, call_id, survey_id, call_started_at, call_answered_at, call_ended_at,
+     call_status, call_attempts, call_duration_seconds, recording_url, channel)
+VALUES
+    (:id, :call_id, (SELECT id FROM surveys WHERE id = :survey_id),
+     :started, :answered, :ended,
+     :status,
+     (SELECT COUNT(*) + 1 FROM call_transcripts WHERE survey_id = :survey_id),
+     :duration, :recording_url, 'phone')
+ON CONFLICT (call_id) DO UPDATE SET
+    call_started_at  = LEAST(call_transcripts.call_started_at, EXCLUDED.call_started_at),
+    call_answered_at = LEAST(call_transcripts.call_answered_at, EXCLUDED.call_answered_at),
+    call_ended_at    = GREATEST(call_transcripts.call_ended_at, EXCLUDED.call_ended_at),
+    recording_url    = COALESCE(EXCLUDED.recording_url, call_transcripts.recording_url),
+    call_status = CASE
+        WHEN GREATEST(call_transcripts.call_ended_at, EXCLUDED.call_ended_at) IS NOT NULL THEN
+            CASE WHEN LEAST(call_transcripts.call_answered_at, EXCLUDED.call_answered_at) IS NOT NULL
+                 THEN 'completed' ELSE 'no_answer' END
+        WHEN LEAST(call_transcripts.call_answered_at, EXCLUDED.call_answered_at) IS NOT NULL THEN 'in_progress'
+        ELSE 'dialing'
+    END,
+    call_duration_seconds = COALESCE(
+        EXTRACT(EPOCH FROM (
+            GREATEST(call_transcripts.call_ended_at, EXCLUDED.call_ended_at)
+            - LEAST(call_transcripts.call_answered_at, EXCLUDED.call_answered_at)
+        ))::int,
+        0
+    )
+"""
+
+
+async def upsert_call_lifecycle(rows: List[Dict[str, Any]]) -> int:
+    """
+    Persist a batch of merged call lifecycle rows in one transaction.
+
+    Each row is keyed by call_id (the LiveKit room name). Timestamps merge
+    order-independently (earliest start/answer, latest end), so webhooks
+    arriving out of order or across batches converge on the same state.
+    """
+    if not rows:
+        return 0
+    params = [{"id": str(uuid4()), **row} for row in rows]
+    engine = get_async_engine()
+    async with engine.begin() as conn:
+        await conn.execute(text(_UPSERT_CALL_LIFECYCLE), params)
+    return len(params)
+
+
+async def get_call_lifecycle(call_id: str) -> Optional[Dict[str, Any]]:
+    rows = await async_execute(
+        """SELECT call_id, survey_id, call_status, call_started_at, call_answered_at,
+                  call_ended_at, call_duration_seconds, call_attempts, recording_url
+           FROM call_transcripts WHERE call_id = :call_id""",
+        {"call_id": call_id},
+    )
+    return rows[0] if rows else None
+
+
 def get_transcript(survey_id: str) -> Optional[Dict[str, Any]]:
     transcripts = sql_execute(
         """SELECT * FROM call_transcripts
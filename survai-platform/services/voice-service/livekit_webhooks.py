@@ -0,0 +1,232 @@
+"""
+LiveKit Webhook Ingestion for Voice Service.
+
+LiveKit POSTs room/participant/egress events to /api/voice/livekit-webhook.
+Events are verified against the LiveKit API secret, reduced to call lifecycle
+transitions and buffered in memory; a background task merges them per call
+and persists each batch into call_transcripts in a single transaction.
+
+Dashboards and retries read call state from Postgres instead of calling
+room.list_rooms / room.list_participants on demand.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from livekit import api
+from livekit.protocol.models import ParticipantInfo
+
+from db import upsert_call_lifecycle
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "200"))
+WEBHOOK_FLUSH_INTERVAL_SECONDS = float(os.getenv("WEBHOOK_FLUSH_INTERVAL_SECONDS", "2.0"))
+
+ROOM_PREFIX = "survey-"
+SIP_CALL_STATUS = "sip.callStatus"
+
+
+def _get_webhook_receiver() -> api.WebhookReceiver:
+    return api.WebhookReceiver(
+        api.TokenVerifier(
+            api_key=os.getenv("LIVEKIT_API_KEY", ""),
+            api_secret=os.getenv("LIVEKIT_API_SECRET", ""),
+        )
+    )
+
+
+def verify_webhook(body: str, auth_header: str) -> api.WebhookEvent:
+    """Verify the signed Authorization header and parse the event. Raises on mismatch."""
+    return _get_webhook_receiver().receive(body, auth_header)
+
+
+def survey_id_from_room(room_name: str) -> Optional[str]:
+    """Room names are survey-{survey_id}-{8 hex}, see livekit_dispatcher."""
+    if not room_name or not room_name.startswith(ROOM_PREFIX):
+        return None
+    survey_id, _, suffix = room_name[len(ROOM_PREFIX):].rpartition("-")
+    if not survey_id or len(suffix) != 8:
+        return None
+    return survey_id
+
+
+def _ts(seconds: int) -> Optional[datetime]:
+    if not seconds:
+        return None
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _egress_location(egress: Any) -> Optional[str]:
+    for result in getattr(egress, "file_results", None) or []:
+        if result.location:
+            return result.location
+    file_info = getattr(egress, "file", None)
+    if file_info is not None and file_info.location:
+        return file_info.location
+    return None
+
+
+def event_to_transition(event: api.WebhookEvent) -> Optional[Dict[str, Any]]:
+    """
+    Reduce a webhook event to a lifecycle transition for one call.
+
+    Returns None for events that do not belong to a survey call or carry no
+    lifecycle information (track events, non-SIP participants, a SIP
+    participant that is still dialing or ringing, ...).
+    """
+    kind = event.event
+    at = _ts(event.created_at) or datetime.now(timezone.utc).replace(tzinfo=None)
+
+    if kind.startswith("egress_"):
+        room_name = event.egress_info.room_name
+    else:
+        room_name = event.room.name
+    survey_id = survey_id_from_room(room_name)
+    if not survey_id:
+        return None
+
+    transition = {"call_id": room_name, "survey_id": survey_id}
+
+    if kind == "room_started":
+        transition["started"] = _ts(event.room.creation_time) or at
+    elif kind == "room_finished":
+        transition["ended"] = at
+    elif kind in ("participant_joined", "participant_attributes_changed", "participant_left"):
+        # Only the dialed phone (the SIP participant) says anything about the call; agents,
+        # egress/ingress and standard participants join whether or not anyone picked up
+        participant = event.participant
+        if participant.kind != ParticipantInfo.SIP:
+            return None
+        if kind == "participant_left":
+            transition["ended"] = at
+        elif participant.attributes.get(SIP_CALL_STATUS) == "active":
+            # The SIP participant joins while still dialing/ringing; active means answered
+            transition["answered"] = at
+        else:
+            return None
+    elif kind == "egress_ended":
+        location = _egress_location(event.egress_info)
+        if not location:
+            return None
+        transition["recording_url"] = location
+    else:
+        return None
+    return transition
+
+
+def _merge(rows: Dict[str, Dict[str, Any]], transition: Dict[str, Any]) -> None:
+    row = rows.setdefault(transition["call_id"], {
+        "call_id": transition["call_id"],
+        "survey_id": transition["survey_id"],
+        "started": None,
+        "answered": None,
+        "ended": None,
+        "recording_url": None,
+    })
+    for field, pick in (("started", min), ("answered", min), ("ended", max)):
+        value = transition.get(field)
+        if value is not None:
+            row[field] = value if row[field] is None else pick(row[field], value)
+    if transition.get("recording_url"):
+        row["recording_url"] = transition["recording_url"]
+
+
+def _finalize(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Derive status/duration for the INSERT branch (the UPDATE branch derives them in SQL)."""
+    answered, ended = row["answered"], row["ended"]
+    if ended is not None:
+        status = "completed" if answered is not None else "no_answer"
+    elif answered is not None:
+        status = "in_progress"
+    else:
+        status = "dialing"
+    duration = int((ended - answered).total_seconds()) if answered and ended else 0
+    return {**row, "status": status, "duration": max(duration, 0)}
+
+
+class CallEventWriter:
+    """Buffers lifecycle transitions and flushes them to Postgres on size/time thresholds."""
+
+    def __init__(
+        self,
+        batch_size: int = WEBHOOK_BATCH_SIZE,
+        flush_interval: float = WEBHOOK_FLUSH_INTERVAL_SECONDS,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.events_received = 0
+        self.rows_written = 0
+        self.flush_failures = 0
+
+    def submit(self, transition: Dict[str, Any]) -> None:
+        self._pending.append(transition)
+        self.events_received += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, []
+        merged: Dict[str, Dict[str, Any]] = {}
+        for transition in batch:
+            _merge(merged, transition)
+        try:
+            written = await upsert_call_lifecycle([_finalize(r) for r in merged.values()])
+        except Exception as e:
+            # Put the batch back so the next flush retries it.
+            self._pending = batch + self._pending
+            self.flush_failures += 1
+            logger.error(f"Call lifecycle flush failed ({len(batch)} events): {e}")
+            return 0
+        self.rows_written += written
+        logger.info(f"Persisted {len(batch)} webhook events as {written} call lifecycle rows")
+        return written
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "events_received": self.events_received,
+            "events_pending": len(self._pending),
+            "rows_written": self.rows_written,
+            "flush_failures": self.flush_failures,
+        }
+
+
+_writer: Optional[CallEventWriter] = None
+
+
+def get_call_event_writer() -> CallEventWriter:
+    global _writer
+    if _writer is None:
+        _writer = CallEventWriter()
+    return _writer
@@ -3,6 +3,7 @@ Voice Service API routes.
 
 Handles LiveKit call lifecycle:
 - Initiate calls via LiveKit SIP
+- Lifecycle ingestion from LiveKit webhooks
 - Transcript retrieval
 - Email fallback
 """
@@ -16,6 +17,7 @@ import httpx
 from fastapi import APIRouter, HTTPException, Request
 
 from db import (
+    get_call_lifecycle,
     get_rider_data,
     get_survey_with_questions,
     get_template_config,
@@ -26,6 +28,7 @@ from db import (
     store_transcript,
     update_survey_status,
 )
+from livekit_webhooks import event_to_transition, get_call_event_writer, verify_webhook
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/voice", tags=["voice"])
@@ -89,6 +92,7 @@ async def make_call(
 
     company_name = template_config.get("company_name") or os.getenv("ORGANIZATION_NAME", "IT Curves")
     callback_url = os.getenv("SURVEY_SUBMIT_URL", "http://survey-service:8020/api/answers/qna_phone")
+    metrics_url = os.getenv("CALL_METRICS_URL", "http://analytics-service:8060/api/analytics/call-metrics")
 
     survey_context = {
         "recipient_name": rider_name or "",
@@ -97,6 +101,7 @@ async def make_call(
         "language": language,
         "questions": questions,
         "callback_url": callback_url,
+        "metrics_url": metrics_url,
     }
 
     try:
@@ -169,6 +174,43 @@ async def get_survey_transcript(survey_id: str):
     return transcript
 
 
+@router.post("/livekit-webhook")
+async def livekit_webhook(request: Request):
+    """
+    Receive LiveKit room/participant/egress webhooks.
+
+    The signed Authorization header is verified before anything is queued;
+    transitions are persisted in batches by the background CallEventWriter.
+    """
+    body = (await request.body()).decode("utf-8")
+    auth_header = request.headers.get("Authorization", "")
+    try:
+        event = verify_webhook(body, auth_header)
+    except Exception as e:
+        logger.warning(f"Rejected LiveKit webhook: {e}")
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    transition = event_to_transition(event)
+    if transition:
+        get_call_event_writer().submit(transition)
+    return {"status": "accepted", "event": event.event, "queued": transition is not None}
+
+
+@router.get("/call-status/{call_id}")
+async def get_call_status(call_id: str):
+    """Call lifecycle as recorded from LiveKit webhooks — no live LiveKit API call."""
+    call = await get_call_lifecycle(call_id)
+    if not call:
+        raise HTTPException(status_code=404, detail=f"No lifecycle recorded for call {call_id}")
+    return call
+
+
+@router.get("/webhook-stats")
+async def webhook_stats():
+    """Counters for the webhook ingestion buffer."""
+    return get_call_event_writer().stats()
+
+
 @router.post("/send-email-fallback")
 async def send_email_fallback(
     survey_id: str,
@@ -214,12 +214,31 @@ class CallbackRequest(BaseModel):
     provider: Literal["livekit"] = "livekit"
 
 
+class CallbackBatchRequest(BaseModel):
+    callbacks: List[CallbackRequest]
+
+
 class EmailFallbackRequest(BaseModel):
     survey_id: str
     email: str
     survey_url: str
 
 
+# ─── Scheduler ────────────────────────────────────────────────────────────────
+
+class ScheduledCallP(BaseModel):
+    survey_id: str
+    phone: str
+    run_at: Optional[datetime] = None
+    delay_seconds: int = 60
+
+
+class ScheduleCallsRequestP(BaseModel):
+    calls: List[ScheduledCallP]
+    # A survey that already has a pending call: keep it as is, or move it to the new time
+    on_duplicate: Literal["keep", "reschedule"] = "keep"
+
+
 # ─── Analytics ────────────────────────────────────────────────────────────────
 
 class AnalyticsSummary(BaseModel):